@@ -0,0 +1,209 @@
+from collections import Counter
+
+import numpy as np
+
+from blackjack import RANK_HARD_VALUES
+from cards import RANKS, SUITS
+from simulation import SimulationResult, Strategy
+from strategy_table import DOUBLE_DOWN, HIT, SPLIT, STAND, StrategyTable, compile_strategy, kinds_and_totals
+RANK_VALUES = np.frombuffer(RANK_HARD_VALUES, dtype=np.uint8).astype(np.int16)  # indexed by rank index
+BATCH_SIZE = 16_384
+DEAL_DEPTH = 32  # rounds almost never deal more cards than this, see shuffled_payouts
+
+
+def shuffle_columns(rng: np.random.Generator, shoes: np.ndarray, start: int, stop: int):
+    """
+    Runs steps start to stop of a Fisher-Yates shuffle on every row of shoes at once, in place. After steps 0 to
+    stop, the first stop cards of each row are distributed exactly like the top of a fully shuffled shoe
+    """
+    rows = np.arange(len(shoes))
+    for column in range(start, stop):
+        swap = rng.integers(column, shoes.shape[1], size=len(shoes))
+        shoes[rows, column], shoes[rows, swap] = shoes[rows, swap], shoes[rows, column]
+
+
+def shuffled_shoes(rng: np.random.Generator, num_shoes: int, num_decks: int = 6, depth: int = None) -> np.ndarray:
+    """
+    Generates independently shuffled shoes
+    :param depth: if given, only the first depth cards of each shoe are shuffled
+    :return: uint8 matrix with one shoe of rank indices (see cards.RANKS) per row
+    """
+    shoe = np.repeat(np.arange(len(RANKS), dtype=np.uint8), len(SUITS) * num_decks)
+    shoes = np.tile(shoe, (num_shoes, 1))
+    if depth is None:
+        return rng.permuted(shoes, axis=1)
+    shuffle_columns(rng, shoes, 0, min(depth, shoes.shape[1]))
+    return shoes
+
+
+def play_rounds(strategy_table: StrategyTable, shoes: np.ndarray, bet: int) -> tuple:
+    """
+    Plays one round of blackjack per row of shoes at once, following the same rules and dealing order as
+    simulation.play_round: one player card, the dealer's upcard, a second player card, the player's actions
+    (a split hand draws its second card straight away and cannot be split again), then the dealer draws a hole
+    card and draws until their largest card total is at least 17
+    :param shoes: matrix with one shoe of rank indices per round
+    :return: the player's payout for each round and the number of cards dealt in each round
+    """
+    num_rounds = len(shoes)
+    rounds = np.arange(num_rounds)
+    values = RANK_VALUES[shoes[:, :3]]
+    position = np.full(num_rounds, 3)
+
+    # player hands, two slots per round for a split
+    hard = np.zeros((num_rounds, 2), dtype=np.int16)
+    aces = np.zeros((num_rounds, 2), dtype=np.int16)
+    num_cards = np.zeros((num_rounds, 2), dtype=np.int16)
+    first_value = np.zeros((num_rounds, 2), dtype=np.int16)
+    second_value = np.zeros((num_rounds, 2), dtype=np.int16)
+    bets = np.zeros((num_rounds, 2), dtype=np.int64)
+    bets[:, 0] = bet
+    first_value[:, 0], second_value[:, 0] = values[:, 0], values[:, 2]
+    hard[:, 0] = values[:, 0] + values[:, 2]
+    aces[:, 0] = (shoes[:, 0] == 0).astype(np.int16) + (shoes[:, 2] == 0)
+    num_cards[:, 0] = 2
+    is_split = np.zeros(num_rounds, dtype=bool)
+    num_hands = np.ones(num_rounds, dtype=np.int16)
+    current = np.zeros(num_rounds, dtype=np.int16)
+    upcard = np.where(shoes[:, 1] == 0, 11, values[:, 1])
+
+    def draw(live, hand):
+        card = shoes[live, position[live]]
+        position[live] += 1
+        hard[live, hand] += RANK_VALUES[card]
+        aces[live, hand] += card == 0
+        num_cards[live, hand] += 1
+        return RANK_VALUES[card]
+
+    def advance(live):
+        current[live] += 1
+
+    active = rounds
+    while len(active):
+        hand = current[active]
+        hand_hard, hand_aces, hand_cards = hard[active, hand], aces[active, hand], num_cards[active, hand]
+        finished = (hand_hard > 21) | ((hand_cards == 2) & (hand_aces > 0) & (hand_hard == 11))
+        advance(active[finished])
+
+        live, hand = active[~finished], hand[~finished]
+        hand_hard, hand_aces, hand_cards = hand_hard[~finished], hand_aces[~finished], hand_cards[~finished]
+        can_double = (hand_cards == 2) & ~is_split[live]
+        can_split = can_double & (first_value[live, hand] == second_value[live, hand])
+        kind, total = kinds_and_totals(hand_hard, hand_aces > 0, can_split)
+        action = strategy_table.actions[kind, total, upcard[live], can_double.astype(np.int8)]
+
+        if np.any((action == DOUBLE_DOWN) & ~can_double):
+            raise Exception("Can't double down after hitting")
+        if np.any((action == SPLIT) & ~can_split):
+            raise Exception("Can't Split Busted Hand")
+
+        hitting = action == HIT
+        draw(live[hitting], hand[hitting])
+
+        advance(live[action == STAND])
+
+        doubling = action == DOUBLE_DOWN
+        bets[live[doubling], hand[doubling]] *= 2
+        draw(live[doubling], hand[doubling])
+        advance(live[doubling])
+
+        splitting = live[action == SPLIT]
+        is_split[splitting] = True
+        num_hands[splitting] = 2
+        bets[splitting, 1] = bets[splitting, 0]
+        hard[splitting, 1], aces[splitting, 1] = first_value[splitting, 0], aces[splitting, 0] // 2
+        hard[splitting, 0], aces[splitting, 0] = first_value[splitting, 0], aces[splitting, 0] // 2
+        num_cards[splitting] = 1
+        second_value[splitting, 0] = draw(splitting, 0)
+        second_value[splitting, 1] = draw(splitting, 1)
+        first_value[splitting, 1] = first_value[splitting, 0]
+
+        active = active[current[active] < num_hands[active]]
+
+    dealer_hard = values[:, 1].astype(np.int16)
+    dealer_aces = (shoes[:, 1] == 0).astype(np.int16)
+    dealer_cards = np.ones(num_rounds, dtype=np.int16)
+    drawing = rounds
+    while len(drawing):
+        card = shoes[drawing, position[drawing]]
+        position[drawing] += 1
+        dealer_hard[drawing] += RANK_VALUES[card]
+        dealer_aces[drawing] += card == 0
+        dealer_cards[drawing] += 1
+        drawing = drawing[dealer_hard[drawing] + 10 * dealer_aces[drawing] < 17]
+
+    dealer_blackjack = (dealer_cards == 2) & (dealer_aces > 0) & (dealer_hard == 11)
+    dealer_busted = dealer_hard > 21
+    dealer_total = np.where((dealer_aces > 0) & (dealer_hard <= 11), dealer_hard + 10, dealer_hard)
+
+    player_blackjack = (num_cards == 2) & (aces > 0) & (hard == 11)
+    player_busted = hard > 21
+    player_total = np.where((aces > 0) & (hard <= 11), hard + 10, hard)
+    dealer_blackjack, dealer_busted, dealer_total = (column[:, None] for column in
+                                                     (dealer_blackjack, dealer_busted, dealer_total))
+    result = np.select([player_blackjack & dealer_blackjack, player_blackjack, dealer_blackjack, player_busted,
+                        dealer_busted],
+                       [0, 1, -1, -1, 1],
+                       np.sign(player_total - dealer_total))
+    result[:, 1] *= num_hands == 2
+    return (result * bets).sum(axis=1), position
+
+
+def payouts_to_result(payouts: np.ndarray) -> SimulationResult:
+    payout_values, occurrences = np.unique(payouts, return_counts=True)
+    return SimulationResult(Counter(dict(zip(payout_values.tolist(), occurrences.tolist()))))
+
+
+def shuffled_payouts(strategy_table: StrategyTable, bet, num_rounds, rng, num_decks=6) -> np.ndarray:
+    """
+    Plays num_rounds rounds from freshly shuffled shoes. Only the top DEAL_DEPTH cards of each shoe are shuffled up
+    front; the rare rounds that deal deeper have the rest of their shoe shuffled and are replayed, which leaves every
+    round dealt from a uniformly shuffled shoe
+    """
+    shoes = shuffled_shoes(rng, num_rounds, num_decks, DEAL_DEPTH)
+    payouts, cards_dealt = play_rounds(strategy_table, shoes, bet)
+    too_deep = np.flatnonzero(cards_dealt > DEAL_DEPTH)
+    if len(too_deep):
+        deep_shoes = shoes[too_deep]
+        shuffle_columns(rng, deep_shoes, DEAL_DEPTH, deep_shoes.shape[1])
+        payouts[too_deep], _ = play_rounds(strategy_table, deep_shoes, bet)
+    return payouts
+
+
+def batched_payouts(strategy_table: StrategyTable, bet, num_rounds, rng, num_decks=6, batch_size=BATCH_SIZE):
+    for start in range(0, num_rounds, batch_size):
+        yield shuffled_payouts(strategy_table, bet, min(batch_size, num_rounds - start), rng, num_decks)
+
+
+def run_batch_simulation(strategy: Strategy, num_rounds, rng=None, num_decks=6) -> SimulationResult:
+    """
+    Batch engine for table-driven strategies: plays num_rounds rounds, each from a freshly shuffled shoe (like
+    simulation.run_single_simulation), and collects the payout of every round
+    :param rng: numpy Generator or seed
+    """
+    if strategy.bet_size is not None:
+        raise ValueError(f"{strategy.name} sizes its bets from the shoe, which the batch engine doesn't track")
+    rng = np.random.default_rng(rng)
+    strategy_table = compile_strategy(strategy)
+    return payouts_to_result(np.concatenate(list(batched_payouts(strategy_table, strategy.bet, num_rounds, rng,
+                                                                 num_decks))))
+
+
+def run_batch_simulation_multi_round(strategy: Strategy, num_rounds, num_runs, rng=None,
+                                     num_decks=6) -> SimulationResult:
+    """
+    Batch version of simulation.run_simulation_multi_round for table-driven strategies, except that every round is
+    dealt from a freshly shuffled shoe rather than from a shoe lasting the whole run
+    :param rng: numpy Generator or seed
+    """
+    if strategy.bet_size is not None:
+        raise ValueError(f"{strategy.name} sizes its bets from the shoe, which the batch engine doesn't track")
+    rng = np.random.default_rng(rng)
+    strategy_table = compile_strategy(strategy)
+    runs_per_batch = max(1, BATCH_SIZE // num_rounds)
+    run_winnings = []
+    for start in range(0, num_runs, runs_per_batch):
+        batch_runs = min(runs_per_batch, num_runs - start)
+        payouts = shuffled_payouts(strategy_table, strategy.bet, batch_runs * num_rounds, rng, num_decks)
+        run_winnings.append(payouts.reshape(batch_runs, num_rounds).sum(axis=1))
+    return payouts_to_result(np.concatenate(run_winnings))
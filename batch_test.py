@@ -0,0 +1,54 @@
+import unittest
+
+import numpy as np
+
+import batch
+from batch import play_rounds, shuffled_shoes, run_batch_simulation, run_batch_simulation_multi_round
+from blackjack import Player, table_payout
+from cards import CARDS, SUITS, Shoe
+from simulation import play_round, always_stand_strategy, always_hit_strategy, always_double_down, \
+    hit_under_seventeen, double_down_on_eleven, always_split_when_possible, play_known_strategy
+from strategy_table import compile_strategy
+
+table_strategies = [always_stand_strategy, always_hit_strategy, always_double_down, hit_under_seventeen,
+                    double_down_on_eleven, always_split_when_possible, play_known_strategy]
+
+
+def scalar_payout(strategy, shoe_row):
+    dealing_shoe = Shoe.from_cards([CARDS[rank_index * len(SUITS)] for rank_index in shoe_row])
+    return table_payout(play_round(strategy, dealing_shoe))[Player("Maddie")]
+
+
+class BatchTests(unittest.TestCase):
+    def test_shuffled_shoes(self):
+        shoes = shuffled_shoes(np.random.default_rng(1), 10, 2)
+        self.assertEqual((10, 104), shoes.shape)
+        for shoe in shoes:
+            self.assertEqual([8] * 13, np.bincount(shoe).tolist())
+        partial = shuffled_shoes(np.random.default_rng(1), 10, 2, depth=5)
+        self.assertEqual(sorted(shoes[0]), sorted(partial[0]))
+
+    def test_matches_scalar_engine(self):
+        shoes = shuffled_shoes(np.random.default_rng(7), 400)
+        for strategy in table_strategies:
+            payouts, cards_dealt = play_rounds(compile_strategy(strategy), shoes, strategy.bet)
+            self.assertTrue(np.all(cards_dealt >= 4))
+            self.assertEqual([scalar_payout(strategy, row) for row in shoes], payouts.tolist(), strategy.name)
+
+    def test_deep_rounds_are_replayed(self):
+        depth = batch.DEAL_DEPTH
+        try:
+            batch.DEAL_DEPTH = 4
+            result = run_batch_simulation(always_hit_strategy, 2000, 3)
+        finally:
+            batch.DEAL_DEPTH = depth
+        self.assertEqual(2000, result.total_games())
+
+    def test_multi_round(self):
+        result = run_batch_simulation_multi_round(play_known_strategy, 20, 500, 3)
+        self.assertEqual(500, result.total_games())
+        self.assertEqual(result, run_batch_simulation_multi_round(play_known_strategy, 20, 500, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,181 @@
+"""
+Benchmarks for the simulation's hot paths (micro) and end-to-end throughput (macro).
+
+    python benchmark.py --output before.json
+    python benchmark.py --output after.json
+    python benchmark.py --compare before.json after.json
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+from batch import run_batch_simulation
+from blackjack import BettingBox, Dealer, Hand, Player, Table, hand_result, shoe
+from cards import Card, Deck, Rank, Suit
+from simulation import all_strategies, known_strategy, play_known_strategy, run_simulation, run_simulation_chunk, \
+    run_single_simulation
+
+BENCHMARK_SEED = 5
+
+
+class Benchmark(NamedTuple):
+    name: str
+    make: Callable[[], Callable[[], object]]  # builds the timed function; setup cost is not timed
+    operations: int  # operations performed by one call of the timed function, e.g. cards drawn or rounds played
+
+
+def repeat_calls(fn, times):
+    def run():
+        for _ in range(times):
+            fn()
+
+    return run
+
+
+def draw_all(deck):
+    def run():
+        card, remaining = deck.draw_card()
+        while card is not None:
+            card, remaining = remaining.draw_card()
+
+    return run
+
+
+def sample_table() -> Table:
+    betting_box = BettingBox(Hand([Card(Rank.ACE, Suit.HEART), Card(Rank.SIX, Suit.CLUB)]), Player("Maddie"), 10)
+    return Table([betting_box], Dealer(Hand([Card(Rank.FIVE, Suit.SPADE)]), Deck([])), 0)
+
+
+def sample_dealer() -> Dealer:
+    return Dealer(Hand([Card(Rank.TEN, Suit.SPADE), Card(Rank.SEVEN, Suit.HEART)]), Deck([]))
+
+
+def micro_benchmarks(scale: int) -> list:
+    multi_ace_hand = Hand([Card(Rank.ACE, suit) for suit in Suit] + [Card(Rank.TWO, Suit.CLUB)])
+    table = sample_table()
+    return [
+        Benchmark("deck.draw_card", lambda: draw_all(Deck(Deck.standard_deck().cards * 6)), 312),
+        Benchmark("shoe.draw_card", lambda: draw_all(shoe(Deck.standard_deck(), 6)), 312),
+        Benchmark("shoe", lambda: repeat_calls(lambda: shoe(Deck.standard_deck(), 6), 10 * scale), 10 * scale),
+        Benchmark("deck.shuffle", lambda: repeat_calls(Deck(Deck.standard_deck().cards * 6).shuffle, 10 * scale),
+                  10 * scale),
+        Benchmark("shoe.shuffle", lambda: repeat_calls(shoe(Deck.standard_deck(), 6).shuffle, 10 * scale), 10 * scale),
+        Benchmark("hand.card_totals", lambda: repeat_calls(multi_ace_hand.card_totals, 1000 * scale), 1000 * scale),
+        Benchmark("hand_result", lambda: repeat_calls(lambda: hand_result(table.betting_boxes[0], sample_dealer()),
+                                                      1000 * scale), 1000 * scale),
+        Benchmark("known_strategy", lambda: repeat_calls(lambda: known_strategy(table), 1000 * scale), 1000 * scale),
+        Benchmark("known_strategy.memoized", lambda: repeat_calls(lambda: play_known_strategy.get_action(table),
+                                                                  1000 * scale), 1000 * scale),
+    ]
+
+
+def macro_benchmarks(scale: int) -> list:
+    benchmarks = [Benchmark(f"run_single_simulation/{strategy.name}",
+                            lambda strategy=strategy: repeat_calls(lambda: run_single_simulation(strategy), 20 * scale),
+                            20 * scale)
+                  for strategy in all_strategies]
+    benchmarks += [Benchmark(f"run_simulation_chunk/{strategy.name}",
+                             lambda strategy=strategy: lambda: run_simulation_chunk(strategy, 100, 2 * scale,
+                                                                                    BENCHMARK_SEED),
+                             200 * scale)
+                   for strategy in all_strategies]
+    benchmarks += [Benchmark(f"run_simulation/{engine}/Known Strategy",
+                             lambda fast=fast: lambda: run_simulation(play_known_strategy, 200 * scale, fast=fast),
+                             200 * scale)
+                   for engine, fast in [("reference", False), ("fast", True)]]
+    benchmarks.append(Benchmark("run_batch_simulation/Known Strategy",
+                                lambda: lambda: run_batch_simulation(play_known_strategy, 2000 * scale,
+                                                                     BENCHMARK_SEED),
+                                2000 * scale))
+    return benchmarks
+
+
+def run_benchmark(benchmark: Benchmark, repeat: int, warmup: int) -> dict:
+    random.seed(BENCHMARK_SEED)
+    fn = benchmark.make()
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        random.seed(BENCHMARK_SEED)
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    median = statistics.median(timings)
+    return {"operations": benchmark.operations,
+            "repeat": repeat,
+            "min": min(timings),
+            "median": median,
+            "mean": statistics.mean(timings),
+            "stdev": statistics.stdev(timings) if repeat > 1 else 0.0,
+            "operations_per_second": benchmark.operations / median}
+
+
+def run_benchmarks(benchmarks, repeat=5, warmup=1, name_filter=None) -> dict:
+    results = {}
+    for benchmark in benchmarks:
+        if name_filter and name_filter not in benchmark.name:
+            continue
+        results[benchmark.name] = run_benchmark(benchmark, repeat, warmup)
+        print(f"{benchmark.name:<55} {results[benchmark.name]['operations_per_second']:>14,.0f} ops/s "
+              f"(median {results[benchmark.name]['median'] * 1000:.2f} ms)", file=sys.stderr)
+    return {"python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "seed": BENCHMARK_SEED,
+            "benchmarks": results}
+
+
+def compare(before: dict, after: dict) -> list:
+    """
+    :return: (name, median before, median after, speedup) for every benchmark present in both reports
+    """
+    rows = []
+    for name, old in before["benchmarks"].items():
+        new = after["benchmarks"].get(name)
+        if new is not None:
+            rows.append((name, old["median"], new["median"], old["median"] / new["median"]))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the blackjack simulation.")
+    parser.add_argument("--repeat", type=int, default=5, help="timed repetitions per benchmark")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed repetitions before timing")
+    parser.add_argument("--scale", type=int, default=5, help="multiplies the work done per repetition")
+    parser.add_argument("--filter", default=None, help="only run benchmarks whose name contains this")
+    parser.add_argument("--micro-only", action="store_true", help="skip the end-to-end benchmarks")
+    parser.add_argument("--output", default=None, help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"),
+                        help="compare two JSON reports instead of running benchmarks")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        reports = []
+        for path in args.compare:
+            with open(path) as f:
+                reports.append(json.load(f))
+        for name, before, after, speedup in compare(*reports):
+            print(f"{name:<55} {before * 1000:>10.2f} ms {after * 1000:>10.2f} ms {speedup:>7.2f}x")
+        return
+
+    benchmarks = micro_benchmarks(args.scale)
+    if not args.micro_only:
+        benchmarks += macro_benchmarks(args.scale)
+    report = run_benchmarks(benchmarks, args.repeat, args.warmup, args.filter)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+import unittest
+
+from benchmark import compare, macro_benchmarks, micro_benchmarks, run_benchmarks
+
+
+class BenchmarkTests(unittest.TestCase):
+    def test_run_benchmarks(self):
+        report = run_benchmarks(micro_benchmarks(1) + macro_benchmarks(1), repeat=2, warmup=0,
+                                name_filter="Always Stand")
+        self.assertEqual({"run_single_simulation/Always Stand", "run_simulation_chunk/Always Stand"},
+                         set(report["benchmarks"]))
+        for result in report["benchmarks"].values():
+            self.assertGreater(result["operations_per_second"], 0)
+            self.assertLessEqual(result["min"], result["median"])
+
+    def test_compare(self):
+        before = {"benchmarks": {"a": {"median": 2.0}, "b": {"median": 1.0}}}
+        after = {"benchmarks": {"a": {"median": 1.0}, "c": {"median": 1.0}}}
+        self.assertEqual([("a", 2.0, 1.0, 2.0)], compare(before, after))
+
+
+if __name__ == '__main__':
+    unittest.main()
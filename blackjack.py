@@ -1,57 +1,70 @@
+from array import array
 from collections import Counter
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import unique, Enum, auto
-from itertools import product
-from typing import NamedTuple
+from typing import NamedTuple, Union
 
-from cards import Deck, Card, Rank
+from cards import Deck, Card, Rank, Shoe, ShoeExhausted, RANKS, CARD_RANK_INDEX, CARD_CODES
 
 
-def card_value(card: Card) -> set[int]:
-    face_cards = [Rank.JACK,
-                  Rank.QUEEN,
-                  Rank.KING]
-    if card.rank == Rank.ACE:
-        return {1, 11}
-    elif card.rank in face_cards:
-        return {10}
-    else:
-        return {card.rank.value}
+RANK_HARD_VALUES = bytes((1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10))  # indexed like cards.RANKS
+CARD_HARD_VALUES = bytes(RANK_HARD_VALUES[rank_index] for rank_index in CARD_RANK_INDEX)  # indexed by card code
+CARD_IS_ACE = bytes(RANKS[rank_index] == Rank.ACE for rank_index in CARD_RANK_INDEX)  # indexed by card code
+
+HARD_VALUES = {rank: RANK_HARD_VALUES[rank_index] for rank_index, rank in enumerate(RANKS)}
+CARD_VALUES = {rank: frozenset({1, 11}) if rank == Rank.ACE else frozenset({value}) for rank, value in
+               HARD_VALUES.items()}
+
+
+def card_value(card: Card) -> frozenset[int]:
+    return CARD_VALUES[card.rank]
+
+
+def hard_value(card: Card) -> int:
+    """
+    Value of a card when an ace is counted as 1
+    """
+    return HARD_VALUES[card.rank]
 
 
 # TODO do I want to make the card order agnostic?
 @dataclass(frozen=True)
 class Hand:
+    """
+    A player's or dealer's hand. Alongside the cards the hand keeps its hard total (aces counted as 1)
+    and its number of aces, which add_card updates in constant time and every other method answers from.
+    """
     cards: list[Card]
+    hard_total: int = field(default=None, compare=False, repr=False)
+    num_aces: int = field(default=None, compare=False, repr=False)
+
+    def __post_init__(self):
+        if self.hard_total is None:
+            object.__setattr__(self, "hard_total", sum(map(hard_value, self.cards)))
+            object.__setattr__(self, "num_aces", sum(1 for card in self.cards if card.rank == Rank.ACE))
 
     def card_totals(self) -> set[int]:
-        return set(map(sum, product(*list(map(card_value, self.cards)))))
+        return set(range(self.hard_total, self.hard_total + 10 * self.num_aces + 1, 10))
 
     def largest_card_total(self) -> int:
-        totals = self.card_totals()
-        rev_set = set()
-        for total in totals:
-            if total <= 21:
-                rev_set.add(total)
-        return max(rev_set)
+        if self.is_soft():
+            return self.hard_total + 10
+        if self.is_busted():
+            raise ValueError("Busted hand has no card total")
+        return self.hard_total
 
     def is_busted(self) -> bool:
-        for element in self.card_totals():
-            if element <= 21:
-                return False
-        return True
+        return self.hard_total > 21
 
     def add_card(self, card: Card):
-        new_hand = self.cards.copy() + [card]
-        return Hand(new_hand)
+        new_hand = self.cards + [card]
+        return Hand(new_hand, self.hard_total + hard_value(card), self.num_aces + (card.rank == Rank.ACE))
 
     def is_blackjack(self):
-        if len(self.cards) == 2 and 21 in self.card_totals():
-            return True
-        return False
+        return len(self.cards) == 2 and self.num_aces > 0 and self.hard_total == 11
 
     def is_soft(self):
-        return len(list(filter(lambda t: t <= 21, self.card_totals()))) > 1
+        return self.num_aces > 0 and self.hard_total <= 11
 
     @classmethod
     def emptyHand(cls):
@@ -88,10 +101,10 @@ class BettingBox(NamedTuple):
 
 class Dealer(NamedTuple):
     hand: Hand
-    shoe: Deck
+    shoe: Union[Deck, Shoe]
 
     @classmethod
-    def emptyDealer(cls, deck: Deck):
+    def emptyDealer(cls, deck: Union[Deck, Shoe]):
         return Dealer(Hand.emptyHand(), deck)
 
 
@@ -130,8 +143,20 @@ class HandResult(Enum):
     Loss = auto()
 
 
-def shoe(deck: Deck, num_of_decks: int) -> Deck:
-    return Deck([card for card in deck.cards for _ in range(num_of_decks)])
+def shoe(deck: Deck, num_of_decks: int) -> Shoe:
+    codes = [CARD_CODES[card] for card in deck.cards]
+    return Shoe(array("B", [code for code in codes for _ in range(num_of_decks)]))
+
+
+def deal_card(deck) -> tuple:
+    """
+    :return: (the top card of deck, the rest of deck)
+    :raise ShoeExhausted: if deck is empty
+    """
+    card, deck = deck.draw_card()
+    if card is None:
+        raise ShoeExhausted("The shoe ran out of cards in the middle of a round")
+    return card, deck
 
 
 # "hole card" games
@@ -141,14 +166,14 @@ def initial_draw(table: Table) -> Table:
 
     for betting_box in table.betting_boxes:
         hand = betting_box.hand
-        card, deck = deck.draw_card()
+        card, deck = deal_card(deck)
         hand = hand.add_card(card)
         betting_boxes.append(betting_box._replace(hand=hand))
-    card, deck = deck.draw_card()
+    card, deck = deal_card(deck)
     dealer_hand = table.dealer.hand.add_card(card)
     for i, betting_box in enumerate(betting_boxes):
         hand = betting_box.hand
-        card, deck = deck.draw_card()
+        card, deck = deal_card(deck)
         hand = hand.add_card(card)
         betting_boxes[i] = betting_box._replace(hand=hand)
 
@@ -161,7 +186,7 @@ def hit(table: Table) -> Table:
         print(table)
         raise Exception("Can't Hit Busted Hand")
 
-    card, deck = table.dealer.shoe.draw_card()
+    card, deck = deal_card(table.dealer.shoe)
     hand = current_betting_box.hand.add_card(card)
     table = table.replace_betting_box(table.player_turn, current_betting_box._replace(hand=hand))
 
@@ -186,7 +211,7 @@ def double_down(table: Table) -> Table:
         raise Exception("Can't double down after hitting")
 
     new_bet = current_betting_box.bet * 2
-    card, deck = table.dealer.shoe.draw_card()
+    card, deck = deal_card(table.dealer.shoe)
     hand = current_betting_box.hand.add_card(card)
     table = table.replace_betting_box(table.player_turn, current_betting_box._replace(hand=hand, bet=new_bet))
 
@@ -204,9 +229,9 @@ def split(table: Table) -> Table:
     card_1 = current_betting_box.hand.cards[0]
     card_2 = current_betting_box.hand.cards[1]
 
-    card, deck = deck.draw_card()
+    card, deck = deal_card(deck)
     betting_box1 = BettingBox(Hand([card_1, card]), current_betting_box.player, current_betting_box.bet, split=True)
-    card, deck = deck.draw_card()
+    card, deck = deal_card(deck)
     betting_box2 = BettingBox(Hand([card_2, card]), current_betting_box.player, current_betting_box.bet, split=True)
 
     betting_boxes = table.betting_boxes[:table.player_turn]
@@ -218,10 +243,10 @@ def split(table: Table) -> Table:
 
 def dealer_moves(table: Table) -> Table:
     deck = table.dealer.shoe
-    card, deck = deck.draw_card()
+    card, deck = deal_card(deck)
     dealer_hand = table.dealer.hand.add_card(card)
-    while max(dealer_hand.card_totals()) < 17:
-        card, deck = deck.draw_card()
+    while dealer_hand.hard_total + 10 * dealer_hand.num_aces < 17:
+        card, deck = deal_card(deck)
         dealer_hand = dealer_hand.add_card(card)
     return table._replace(dealer=table.dealer._replace(hand=dealer_hand, shoe=deck))
 
@@ -252,11 +277,11 @@ def hand_result(betting_box: BettingBox, dealer: Dealer) -> HandResult:
     elif dealer.hand.is_busted():
         return HandResult.Win
     else:
-        filtered = list(filter(lambda x: x <= 21, betting_box.hand.card_totals()))
-        dealer_filtered = list(filter(lambda x: x <= 21, dealer.hand.card_totals()))
-        if max(filtered) > max(dealer_filtered):
+        player_total = betting_box.hand.largest_card_total()
+        dealer_total = dealer.hand.largest_card_total()
+        if player_total > dealer_total:
             return HandResult.Win
-        elif max(filtered) < max(dealer_filtered):
+        elif player_total < dealer_total:
             return HandResult.Loss
         else:
             return HandResult.Tie
@@ -26,6 +26,21 @@ class BlackjackTests(unittest.TestCase):
                   Card(Rank.TEN, Suit.SPADE)]).is_busted())
         self.assertFalse(Hand([]).is_busted())
 
+    def test_hand_state(self):
+        hand = Hand([Card(Rank.ACE, Suit.HEART), Card(Rank.ACE, Suit.SPADE)])
+        self.assertEqual((2, 2), (hand.hard_total, hand.num_aces))
+        self.assertTrue(hand.is_soft())
+        self.assertEqual(12, hand.largest_card_total())
+        hand = hand.add_card(Card(Rank.NINE, Suit.CLUB))
+        self.assertEqual((11, 2), (hand.hard_total, hand.num_aces))
+        self.assertEqual({11, 21, 31}, hand.card_totals())
+        self.assertEqual(21, hand.largest_card_total())
+        self.assertFalse(hand.is_blackjack())
+        hand = hand.add_card(Card(Rank.KING, Suit.CLUB))
+        self.assertFalse(hand.is_soft())
+        self.assertEqual(21, hand.largest_card_total())
+        self.assertTrue(Hand([Card(Rank.ACE, Suit.HEART), Card(Rank.QUEEN, Suit.SPADE)]).is_blackjack())
+
     def test_add_card(self):
         self.assertEqual(Hand([]).add_card(Card(Rank.KING, Suit.HEART)), Hand([Card(Rank.KING, Suit.HEART)]))
         self.assertEqual(Hand([Card(Rank.KING, Suit.HEART)]).add_card(Card(Rank.KING, Suit.SPADE)),
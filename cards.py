@@ -1,8 +1,9 @@
-from dataclasses import dataclass
+from array import array
+from dataclasses import dataclass, field
 from enum import Enum, auto, unique
-from typing import List
+from typing import Iterable, List, Optional
 from itertools import product
-from random import shuffle
+from random import Random, shuffle
 
 
 @unique
@@ -55,17 +56,41 @@ class Card:
         return f"{self.rank}{self.suit}"
 
 
+# Compact encoding: a card is the integer rank_index * 4 + suit_index (0-51), which is also its position
+# in the standard deck. CARDS holds one shared Card per code, so decoding never allocates.
+RANKS = tuple(Rank)
+SUITS = tuple(Suit)
+CARDS = tuple(Card(rank, suit) for rank, suit in product(RANKS, SUITS))
+CARD_CODES = {card: code for code, card in enumerate(CARDS)}
+CARD_RANK_INDEX = bytes(code // len(SUITS) for code in range(len(CARDS)))
+# room behind the cut card for a round started just before it comes out: the dealer's hand, and per betting box at most
+# two hands (there are no resplits), which rarely take more than this many cards together
+DEALER_CARDS_BEHIND_CUT_CARD = 11
+BOX_CARDS_BEHIND_CUT_CARD = 9
+
+
+def encode_card(card: Card) -> int:
+    return CARD_CODES[card]
+
+
+def decode_card(code: int) -> Card:
+    return CARDS[code]
+
+
 @dataclass(frozen=True)
 class Deck:
     cards: List[Card]
 
     @staticmethod
     def standard_deck():
-        return Deck([Card(*tup) for tup in product(Rank, Suit)])
+        return Deck(list(CARDS))
 
-    def shuffle(self):
+    def shuffle(self, rng: Optional[Random] = None):
+        """
+        :param rng: random number generator to shuffle with, instead of the global one
+        """
         copy = self.cards.copy()
-        shuffle(copy)
+        (shuffle if rng is None else rng.shuffle)(copy)
         return Deck(copy)
 
     def __len__(self):
@@ -79,3 +104,171 @@ class Deck:
     def __repr__(self) -> str:
         cards = "".join(map(repr, self.cards))
         return f"({cards})"
+
+
+class ShoeCounts:
+    """
+    Counts of the cards dealt from one shoe buffer, shared by every Shoe dealing from it. The number of cards of each
+    rank dealt before every position is built once, the first time it's needed, after which the ranks left and any
+    running count at a position are lookups rather than scans of the cards left.
+    """
+
+    def __init__(self, buffer: array):
+        self.buffer = buffer
+        self.dealt_by_position = None
+        self.running_counts = {}
+
+    def dealt(self, position: int) -> tuple:
+        """
+        :return: number of cards of each rank (in RANKS order) dealt before position
+        """
+        if self.dealt_by_position is None:
+            dealt = [0] * len(RANKS)
+            self.dealt_by_position = [tuple(dealt)]
+            for code in self.buffer:
+                dealt[CARD_RANK_INDEX[code]] += 1
+                self.dealt_by_position.append(tuple(dealt))
+        return self.dealt_by_position[position]
+
+    def ranks_left(self, position: int) -> tuple:
+        """
+        :return: number of cards of each rank (in RANKS order) left at position
+        """
+        return tuple(total - dealt for total, dealt in zip(self.dealt(len(self.buffer)), self.dealt(position)))
+
+    def running_count(self, tags: tuple, position: int) -> int:
+        """
+        :param tags: value each card dealt adds to the count, by rank (in RANKS order)
+        :return: sum of the tags of the cards dealt before position
+        """
+        counts = self.running_counts.get(tags)
+        if counts is None:
+            counts = self.running_counts[tags] = array("i", [0])
+            for code in self.buffer:
+                counts.append(counts[-1] + tags[CARD_RANK_INDEX[code]])
+        return counts[position]
+
+
+class ShoeExhausted(Exception):
+    """
+    Raised when a round needs a card and the shoe has none left
+    """
+
+
+def cards_behind_cut_card(seats: int = 1) -> int:
+    """
+    :return: the fewest cards to leave behind the cut card of a shoe dealing to a table of seats betting boxes
+    """
+    return DEALER_CARDS_BEHIND_CUT_CARD + BOX_CARDS_BEHIND_CUT_CARD * seats
+
+
+def cut_card_position(num_cards: int, penetration: float, seats: int = 1) -> int:
+    """
+    :param seats: number of betting boxes dealt to in a round
+    :return: number of cards dealt from a shoe of num_cards cards before its cut card comes out
+    :raise ValueError: if penetration is not in (0, 1) or leaves fewer than cards_behind_cut_card(seats) cards behind
+    the cut card, which a round started just before the cut card could run out of
+    """
+    if not 0 < penetration < 1:
+        raise ValueError(f"Penetration must be in (0, 1), got {penetration}")
+    cut_card = int(num_cards * penetration)
+    reserve = cards_behind_cut_card(seats)
+    if num_cards - cut_card < reserve:
+        raise ValueError(f"Penetration {penetration} leaves {num_cards - cut_card} of {num_cards} cards behind the cut "
+                         f"card, fewer than the {reserve} needed for {seats} betting box(es)")
+    return cut_card
+
+
+@dataclass(frozen=True, eq=False)
+class Shoe:
+    """
+    A dealing shoe that keeps its cards as encoded bytes in a fixed backing buffer and tracks a cursor into it.
+    Drawing a card returns a new Shoe sharing the same buffer with the cursor advanced, so dealing
+    is constant time while the shoe still behaves like an immutable Deck.
+    The buffer keeps the cards already dealt, so the whole shoe can be reshuffled once the cursor passes cut_card.
+    Shoes dealing from the same buffer share its ShoeCounts, which answer what is left in the shoe.
+    """
+    buffer: array
+    position: int = 0
+    cut_card: Optional[int] = None
+    counts: Optional[ShoeCounts] = field(default=None, compare=False, repr=False)
+
+    @staticmethod
+    def from_cards(cards: Iterable[Card]):
+        buffer = array("B", map(encode_card, cards))
+        return Shoe(buffer, counts=ShoeCounts(buffer))
+
+    @staticmethod
+    def from_deck(deck: Deck):
+        return Shoe.from_cards(deck.cards)
+
+    @property
+    def cards(self) -> List[Card]:
+        return [CARDS[code] for code in self.buffer[self.position:]]
+
+    def shuffle(self, rng: Optional[Random] = None):
+        """
+        :param rng: random number generator to shuffle with, instead of the global one
+        """
+        copy = self.buffer[self.position:].tolist()
+        (shuffle if rng is None else rng.shuffle)(copy)
+        buffer = array("B", copy)
+        cut_card = None if self.cut_card is None else max(self.cut_card - self.position, 0)
+        return Shoe(buffer, 0, cut_card, ShoeCounts(buffer))
+
+    def with_penetration(self, penetration: float, seats: int = 1):
+        """
+        Places the cut card so that the shoe needs reshuffling after penetration (0-1) of all of its cards, including
+        the ones already dealt, have been dealt. The cut card then stays in place when the shoe is reshuffled.
+        :param seats: number of betting boxes dealt to in a round, see cut_card_position
+        """
+        return Shoe(self.buffer, self.position, cut_card_position(len(self.buffer), penetration, seats), self.counts)
+
+    def needs_reshuffle(self) -> bool:
+        return self.cut_card is not None and self.position >= self.cut_card
+
+    def reshuffle(self):
+        """
+        Returns every card, including the ones already dealt, to the shoe and shuffles it
+        """
+        return Shoe(self.buffer, 0, self.cut_card).shuffle()
+
+    def __len__(self):
+        return len(self.buffer) - self.position
+
+    def shoe_counts(self) -> ShoeCounts:
+        if self.counts is None:
+            object.__setattr__(self, "counts", ShoeCounts(self.buffer))
+        return self.counts
+
+    def ranks_left(self) -> tuple:
+        """
+        :return: number of cards of each rank (in RANKS order) left in the shoe
+        """
+        return self.shoe_counts().ranks_left(self.position)
+
+    def running_count(self, tags: tuple) -> int:
+        """
+        :param tags: value each card dealt adds to the count, by rank (in RANKS order)
+        :return: sum of the tags of every card dealt from the shoe so far
+        """
+        return self.shoe_counts().running_count(tags, self.position)
+
+    def draw_code(self):
+        if self.position >= len(self.buffer):
+            return None, self
+        return self.buffer[self.position], Shoe(self.buffer, self.position + 1, self.cut_card, self.counts)
+
+    def draw_card(self):
+        if self.position >= len(self.buffer):
+            return None, self
+        return CARDS[self.buffer[self.position]], Shoe(self.buffer, self.position + 1, self.cut_card, self.counts)
+
+    def __eq__(self, other):
+        if isinstance(other, (Shoe, Deck)):
+            return len(self) == len(other) and self.cards == other.cards
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        cards = "".join(map(repr, self.cards))
+        return f"({cards})"
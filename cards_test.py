@@ -1,6 +1,7 @@
 import unittest
 
-from cards import Deck, Suit, Rank, Card
+from cards import Deck, Suit, Rank, Card, Shoe, encode_card, decode_card, CARDS, CARD_RANK_INDEX, RANKS, \
+    cards_behind_cut_card, cut_card_position
 
 
 class DeckTests(unittest.TestCase):
@@ -35,5 +36,84 @@ class DeckTests(unittest.TestCase):
         self.assertEqual(deck3, Deck([]))
 
 
+class CardEncodingTests(unittest.TestCase):
+    def test_codes_follow_standard_deck_order(self):
+        self.assertEqual(list(range(52)), list(map(encode_card, Deck.standard_deck().cards)))
+        for code in range(52):
+            self.assertEqual(code, encode_card(decode_card(code)))
+        king = encode_card(Card(Rank.KING, Suit.CLUB))
+        self.assertIs(CARDS[king], decode_card(king))
+
+    def test_rank_index(self):
+        self.assertEqual(Rank.ACE, RANKS[CARD_RANK_INDEX[encode_card(Card(Rank.ACE, Suit.DIAMOND))]])
+        self.assertEqual(Rank.TEN, RANKS[CARD_RANK_INDEX[encode_card(Card(Rank.TEN, Suit.HEART))]])
+
+
+class ShoeTests(unittest.TestCase):
+    def test_shoe_from_deck(self):
+        shoe = Shoe.from_deck(Deck.standard_deck())
+        self.assertEqual(52, len(shoe))
+        self.assertEqual(Deck.standard_deck(), shoe)
+        self.assertEqual(Deck.standard_deck().cards, shoe.cards)
+
+    def test_draw_card_advances_cursor(self):
+        shoe = Shoe.from_cards([Card(Rank.TEN, Suit.CLUB), Card(Rank.JACK, Suit.SPADE)])
+        card, shoe2 = shoe.draw_card()
+        self.assertEqual(card, Card(Rank.TEN, Suit.CLUB))
+        self.assertEqual(shoe2, Deck([Card(Rank.JACK, Suit.SPADE)]))
+        self.assertIs(shoe.buffer, shoe2.buffer)
+        self.assertEqual(2, len(shoe))
+        card2, shoe3 = shoe2.draw_card()
+        self.assertEqual(card2, Card(Rank.JACK, Suit.SPADE))
+        self.assertEqual(shoe3, Deck([]))
+        self.assertEqual((None, Deck([])), shoe3.draw_card())
+
+    def test_draw_code(self):
+        shoe = Shoe.from_cards([Card(Rank.ACE, Suit.SPADE)])
+        code, shoe2 = shoe.draw_code()
+        self.assertEqual(Card(Rank.ACE, Suit.SPADE), decode_card(code))
+        self.assertEqual(0, len(shoe2))
+
+    def test_penetration_and_reshuffle(self):
+        shoe = Shoe.from_deck(Deck.standard_deck()).with_penetration(0.5)
+        self.assertEqual(26, shoe.cut_card)
+        for _ in range(25):
+            _, shoe = shoe.draw_card()
+        self.assertFalse(shoe.needs_reshuffle())
+        _, shoe = shoe.draw_card()
+        self.assertTrue(shoe.needs_reshuffle())
+        reshuffled = shoe.reshuffle()
+        self.assertEqual(52, len(reshuffled))
+        self.assertEqual(frozenset(Deck.standard_deck().cards), frozenset(reshuffled.cards))
+        self.assertFalse(reshuffled.needs_reshuffle())
+        self.assertFalse(Shoe.from_deck(Deck.standard_deck()).needs_reshuffle())
+        self.assertRaises(ValueError, shoe.with_penetration, 0)
+        self.assertRaises(ValueError, shoe.with_penetration, 1)
+        self.assertRaises(ValueError, Shoe.from_deck(Deck.standard_deck()).with_penetration, 0.75)
+
+    def test_penetration_for_seats(self):
+        six_decks = Shoe.from_cards(Deck.standard_deck().cards * 6)
+        self.assertEqual(280, six_decks.with_penetration(0.9).cut_card)
+        self.assertRaises(ValueError, six_decks.with_penetration, 0.9, seats=7)
+        self.assertEqual(234, six_decks.with_penetration(0.75, seats=7).cut_card)
+        self.assertLessEqual(cards_behind_cut_card(7), 312 - cut_card_position(312, 0.76, seats=7))
+        self.assertRaises(ValueError, cut_card_position, 312, 0.77, seats=7)
+
+    def test_penetration_set_mid_shoe(self):
+        shoe = Shoe.from_deck(Deck.standard_deck())
+        for _ in range(10):
+            _, shoe = shoe.draw_card()
+        shoe = shoe.with_penetration(0.5)
+        self.assertEqual(26, shoe.cut_card)
+        self.assertEqual(26, shoe.reshuffle().cut_card)
+        self.assertEqual(16, shoe.shuffle().cut_card)
+
+    def test_shuffle_shoe(self):
+        _, shoe = Shoe.from_deck(Deck.standard_deck()).draw_card()
+        shuffled = shoe.shuffle()
+        self.assertEqual(51, len(shuffled))
+        self.assertEqual(frozenset(shoe.cards), frozenset(shuffled.cards))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,40 @@
+import os
+import pickle
+import time
+
+
+class Checkpoint:
+    """
+    A file holding the partial state of a long simulation, written atomically (to a temporary file which then replaces
+    the checkpoint) at most once every `every` seconds
+    """
+
+    def __init__(self, path, every: float = 60):
+        self.path = path
+        self.every = every
+        self.last_saved = time.monotonic()
+
+    def due(self) -> bool:
+        return time.monotonic() - self.last_saved >= self.every
+
+    def save(self, state: dict):
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary_path, self.path)
+        self.last_saved = time.monotonic()
+
+    def load(self):
+        """
+        :return: the last saved state, or None if there is no checkpoint
+        """
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, "rb") as f:
+            return pickle.load(f)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+from random import seed
+
+from checkpoint import Checkpoint
+from simulation import Strategy, always_hit_fn, always_stand_strategy, choose_random_strategy, run_all_simulations
+from strategy_table import MemoizedAction
+
+
+class Interrupted(Exception):
+    pass
+
+
+def interrupted_after(strategy: Strategy, calls: int) -> Strategy:
+    """
+    :return: the same strategy, except that it raises Interrupted once get_action has been called calls times
+    """
+    remaining = [calls]
+
+    def get_action(table):
+        remaining[0] -= 1
+        if remaining[0] < 0:
+            raise Interrupted()
+        return strategy.get_action(table)
+
+    return strategy._replace(get_action=get_action)
+
+
+class CheckpointTests(unittest.TestCase):
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint = Checkpoint(os.path.join(directory, "sweep.checkpoint"), every=3600)
+            self.assertIsNone(checkpoint.load())
+            self.assertFalse(checkpoint.due())
+            checkpoint.save({"runs_done": 3})
+            self.assertEqual({"runs_done": 3}, checkpoint.load())
+            checkpoint.clear()
+            self.assertIsNone(checkpoint.load())
+
+    def assert_resumes(self, **kwargs):
+        strategies = [always_stand_strategy, choose_random_strategy]
+        seed(7)
+        expected = run_all_simulations(strategies, 5, 600, **kwargs)
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint = Checkpoint(os.path.join(directory, "sweep.checkpoint"), every=0)
+            seed(7)
+            with self.assertRaises(Interrupted):
+                run_all_simulations([always_stand_strategy, interrupted_after(choose_random_strategy, 3000)], 5, 600,
+                                    checkpoint=checkpoint, **kwargs)
+            self.assertIsNotNone(checkpoint.load())
+            seed(11)  # the random state is restored from the checkpoint
+            resumed = run_all_simulations(strategies, 5, 600, checkpoint=checkpoint, **kwargs)
+        self.assertEqual(expected, resumed)
+
+    def test_resume_sequential(self):
+        self.assert_resumes()
+
+    def test_resume_chunked(self):
+        self.assert_resumes(workers=1, run_seed=3)
+
+    def test_different_simulation(self):
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint = Checkpoint(os.path.join(directory, "sweep.checkpoint"), every=0)
+            run_all_simulations([always_stand_strategy], 5, 10, checkpoint=checkpoint)
+            with self.assertRaises(ValueError):
+                run_all_simulations([always_stand_strategy], 5, 20, checkpoint=checkpoint)
+
+    def test_different_seed_or_strategy(self):
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint = Checkpoint(os.path.join(directory, "sweep.checkpoint"), every=0)
+            run_all_simulations([always_stand_strategy], 5, 10, checkpoint=checkpoint, random_seed=5)
+            with self.assertRaises(ValueError):
+                run_all_simulations([always_stand_strategy], 5, 10, checkpoint=checkpoint, random_seed=6)
+            changed = always_stand_strategy._replace(get_action=MemoizedAction(always_hit_fn))
+            with self.assertRaises(ValueError):
+                run_all_simulations([changed], 5, 10, checkpoint=checkpoint, random_seed=5)
+            run_all_simulations([always_stand_strategy], 5, 10, checkpoint=checkpoint, random_seed=5)
+
+
+if __name__ == '__main__':
+    unittest.main()
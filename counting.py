@@ -0,0 +1,55 @@
+from math import floor
+from typing import NamedTuple
+
+from cards import RANKS, SUITS, Rank, Shoe
+
+DECK_SIZE = len(RANKS) * len(SUITS)
+
+
+def rank_tags(tags: dict) -> tuple:
+    """
+    :param tags: dictionary of Rank to its tag, ranks missing from it are tagged 0
+    :return: the tags in cards.RANKS order, as Shoe.running_count takes them
+    """
+    return tuple(tags.get(rank, 0) for rank in RANKS)
+
+
+class CountingSystem(NamedTuple):
+    """
+    A card counting system: every card dealt adds its rank's tag to the running count. Unbalanced systems (whose
+    tags don't add up to 0 over a deck) start from an initial running count that brings them to 0 one deck from the
+    end of the shoe.
+    """
+    name: str
+    tags: tuple  # by rank, in cards.RANKS order
+
+    def running_count(self, shoe: Shoe) -> int:
+        num_decks = len(shoe.buffer) // DECK_SIZE
+        initial = -len(SUITS) * sum(self.tags) * (num_decks - 1)
+        return initial + shoe.running_count(self.tags)
+
+    def true_count(self, shoe: Shoe) -> float:
+        """
+        :return: running count per deck left in the shoe (at least half a deck)
+        """
+        return self.running_count(shoe) / max(len(shoe) / DECK_SIZE, 0.5)
+
+
+HI_LO = CountingSystem("Hi-Lo", rank_tags({Rank.TWO: 1, Rank.THREE: 1, Rank.FOUR: 1, Rank.FIVE: 1, Rank.SIX: 1,
+                                           Rank.TEN: -1, Rank.JACK: -1, Rank.QUEEN: -1, Rank.KING: -1, Rank.ACE: -1}))
+KO = CountingSystem("KO", rank_tags({Rank.TWO: 1, Rank.THREE: 1, Rank.FOUR: 1, Rank.FIVE: 1, Rank.SIX: 1,
+                                     Rank.SEVEN: 1, Rank.TEN: -1, Rank.JACK: -1, Rank.QUEEN: -1, Rank.KING: -1,
+                                     Rank.ACE: -1}))
+
+
+class BetSpread(NamedTuple):
+    """
+    Bet sizing by the count: one unit at a true count of 1 or less, and one more unit for every point above it, up to
+    max_units. Can be used as a strategy's bet_size.
+    """
+    system: CountingSystem
+    unit: int
+    max_units: int
+
+    def __call__(self, shoe: Shoe) -> int:
+        return self.unit * min(self.max_units, max(1, floor(self.system.true_count(shoe))))
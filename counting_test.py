@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+from random import Random, seed
+
+from cards import CARD_RANK_INDEX, RANKS, Deck, Rank, Shoe
+from counting import DECK_SIZE, HI_LO, KO, BetSpread
+from simulation import all_strategies, hi_lo_bet_spread, main, play_known_strategy, run_simulation
+
+
+def shuffled_shoe(num_decks: int, seed_value) -> Shoe:
+    return Shoe.from_cards(Deck.standard_deck().cards * num_decks).shuffle(Random(seed_value))
+
+
+def dealt(shoe: Shoe, num_cards: int) -> Shoe:
+    for _ in range(num_cards):
+        _, shoe = shoe.draw_code()
+    return shoe
+
+
+class ShoeCountsTests(unittest.TestCase):
+    def test_ranks_left(self):
+        shoe = shuffled_shoe(2, 1)
+        self.assertEqual(tuple([8] * len(RANKS)), shoe.ranks_left())
+        shoe = dealt(shoe, 30)
+        left = [0] * len(RANKS)
+        for code in shoe.buffer[shoe.position:]:
+            left[CARD_RANK_INDEX[code]] += 1
+        self.assertEqual(tuple(left), shoe.ranks_left())
+
+    def test_running_count_matches_scan(self):
+        shoe = shuffled_shoe(6, 2)
+        for num_cards in (0, 1, 100, 211):
+            shoe = dealt(shoe, num_cards)
+            expected = sum(HI_LO.tags[CARD_RANK_INDEX[code]] for code in shoe.buffer[:shoe.position])
+            self.assertEqual(expected, shoe.running_count(HI_LO.tags))
+            self.assertEqual(expected, HI_LO.running_count(shoe))
+
+    def test_counts_shared_by_shoes_dealt_from_one_buffer(self):
+        shoe = shuffled_shoe(1, 3)
+        later = dealt(shoe, 10).with_penetration(0.5)
+        self.assertIs(shoe.shoe_counts(), later.shoe_counts())
+        self.assertIsNot(shoe.shoe_counts(), shoe.reshuffle().shoe_counts())
+
+
+class CountingSystemTests(unittest.TestCase):
+    def test_balanced_count_ends_at_zero(self):
+        shoe = shuffled_shoe(6, 4)
+        self.assertEqual(0, HI_LO.running_count(shoe))
+        self.assertEqual(0, HI_LO.running_count(dealt(shoe, len(shoe))))
+
+    def test_unbalanced_count_reaches_zero_one_deck_from_the_end(self):
+        shoe = shuffled_shoe(6, 5)
+        self.assertEqual(-20, KO.running_count(shoe))
+        self.assertEqual(4, KO.running_count(dealt(shoe, len(shoe))))
+
+    def test_true_count(self):
+        shoe = Shoe.from_cards([card for card in Deck.standard_deck().cards if card.rank != Rank.FIVE] * 2)
+        shoe = dealt(shoe, 2 * DECK_SIZE - 2 * 4 - DECK_SIZE // 2)
+        self.assertAlmostEqual(HI_LO.running_count(shoe) / 0.5, HI_LO.true_count(shoe))
+
+
+class BetSpreadTests(unittest.TestCase):
+    def test_bet_by_true_count(self):
+        spread = BetSpread(HI_LO, 10, 4)
+        low = Shoe.from_cards([card for card in Deck.standard_deck().cards if card.rank in (Rank.TWO, Rank.THREE)])
+        high = Shoe.from_cards(Deck.standard_deck().cards)
+        self.assertEqual(10, spread(high))
+        self.assertEqual(10, spread(low))
+        self.assertEqual(40, spread(dealt(low, 3)))
+
+    def test_counting_strategy_bets_more_with_the_count(self):
+        seed(6)
+        result = run_simulation(hi_lo_bet_spread, 2000, keep_histogram=False)
+        seed(6)
+        flat = run_simulation(play_known_strategy, 2000, keep_histogram=False)
+        self.assertNotEqual(flat, result)
+
+    def test_counting_strategies_are_only_simulated_when_named(self):
+        self.assertNotIn(hi_lo_bet_spread, all_strategies)
+        with tempfile.TemporaryDirectory() as directory:
+            arguments = ["--runs", "5", "--rounds", "5", "--no-plots", "--output",
+                         os.path.join(directory, "results.csv")]
+            self.assertEqual([hi_lo_bet_spread], list(main(arguments + ["--strategies", "Hi-Lo Bet Spread"])))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping, Optional, Union
+
+from blackjack import CARD_HARD_VALUES
+from cards import Shoe
+
+BUST = "bust"
+BLACKJACK = "blackjack"
+CARD_VALUES = range(1, 11)  # hard card values, an ace is 1
+INFINITE_DECK = tuple(4 / 13 if value == 10 else 1 / 13 for value in CARD_VALUES)
+
+
+def full_composition(num_decks: int) -> tuple:
+    """
+    :return: number of cards of each hard value (ace first, then two to ten) in a fresh shoe of num_decks decks
+    """
+    return tuple(16 * num_decks if value == 10 else 4 * num_decks for value in CARD_VALUES)
+
+
+def shoe_composition(shoe: Shoe) -> tuple:
+    """
+    :return: number of cards of each hard value (ace first, then two to ten) left in shoe
+    """
+    composition = [0] * len(CARD_VALUES)
+    for code in shoe.buffer[shoe.position:]:
+        composition[CARD_HARD_VALUES[code] - 1] += 1
+    return tuple(composition)
+
+
+def remove_card(composition: tuple, value: int) -> tuple:
+    if composition[value - 1] == 0:
+        raise ValueError(f"No card of value {value} left in {composition}")
+    return composition[:value - 1] + (composition[value - 1] - 1,) + composition[value:]
+
+
+def card_draws(composition: Optional[tuple]) -> list:
+    """
+    :param composition: number of cards of each hard value left in the shoe, or None for an infinite deck
+    :return: (hard value, probability, composition left after drawing it) for every card that can be drawn next
+    """
+    if composition is None:
+        return [(value, probability, None) for value, probability in zip(CARD_VALUES, INFINITE_DECK)]
+    cards_left = sum(composition)
+    if cards_left == 0:
+        raise ValueError("The shoe ran out of cards")
+    return [(value, count / cards_left, remove_card(composition, value))
+            for value, count in zip(CARD_VALUES, composition) if count]
+
+
+@lru_cache(maxsize=4096)
+def dealer_distribution(upcard: int, composition: Optional[tuple] = None) -> Mapping[Union[int, str], float]:
+    """
+    Exact probability distribution of the dealer's final hand, playing by the rules of blackjack.dealer_moves
+    :param upcard: hard value of the dealer's upcard (1 for an ace)
+    :param composition: number of cards of each hard value left in the shoe (see shoe_composition), or None for an
+    infinite deck
+    :return: read-only mapping of final total, BUST or BLACKJACK to its probability. Results are cached by upcard and
+    composition, so repeated queries are free
+    """
+    if composition is None:
+        return MappingProxyType(dict(dealer_outcomes(upcard, int(upcard == 1), 1, None)))
+    return MappingProxyType(shoe_dealer_outcomes(upcard, composition))
+
+
+def shoe_dealer_outcomes(upcard: int, composition: tuple) -> dict:
+    """
+    Distribution of the final hand of a dealer showing upcard and drawing from composition, found by walking every
+    sequence of cards the dealer can draw while updating the card counts in place. For a finite shoe this is faster
+    than dealer_outcomes, as almost every sequence leaves a different composition to memoize on.
+    """
+    counts = list(composition)
+    distribution = {}
+
+    def draw(hard_total, num_aces, num_cards, cards_left, probability):
+        if num_cards >= 2 and hard_total + 10 * num_aces >= 17:  # same stopping rule as blackjack.dealer_moves
+            if num_cards == 2 and num_aces and hard_total == 11:
+                outcome = BLACKJACK
+            elif hard_total > 21:
+                outcome = BUST
+            else:
+                outcome = hard_total + 10 if num_aces and hard_total <= 11 else hard_total
+            distribution[outcome] = distribution.get(outcome, 0) + probability
+            return
+        if cards_left == 0:
+            raise ValueError("The shoe ran out of cards before the dealer finished")
+        for index, count in enumerate(counts):
+            if count:
+                counts[index] = count - 1
+                draw(hard_total + index + 1, num_aces + (index == 0), num_cards + 1, cards_left - 1,
+                     probability * count / cards_left)
+                counts[index] = count
+
+    draw(upcard, int(upcard == 1), 1, sum(counts), 1.0)
+    return distribution
+
+
+@lru_cache(maxsize=65536)
+def dealer_outcomes(hard_total: int, num_aces: int, num_cards: int, composition: Optional[tuple]) -> tuple:
+    """
+    Distribution of the final hand of a dealer currently holding num_cards cards, as (outcome, probability) pairs
+    """
+    if num_cards >= 2 and hard_total + 10 * num_aces >= 17:  # same stopping rule as blackjack.dealer_moves
+        if num_cards == 2 and num_aces and hard_total == 11:
+            return (BLACKJACK, 1.0),
+        if hard_total > 21:
+            return (BUST, 1.0),
+        return (hard_total + 10 if num_aces and hard_total <= 11 else hard_total, 1.0),
+
+    distribution = {}
+    for value, probability, remaining in card_draws(composition):
+        # only whether the dealer holds none, one or several aces matters to how the hand plays out
+        aces = min(num_aces + (value == 1), 2)
+        for outcome, outcome_probability in dealer_outcomes(hard_total + value, aces, num_cards + 1, remaining):
+            distribution[outcome] = distribution.get(outcome, 0) + probability * outcome_probability
+    return tuple(distribution.items())
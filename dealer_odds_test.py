@@ -0,0 +1,64 @@
+import unittest
+from collections import Counter
+from itertools import permutations
+
+from blackjack import Table, Dealer, Hand, dealer_moves
+from cards import Card, Deck, Rank, Suit, Shoe
+from dealer_odds import dealer_distribution, full_composition, shoe_composition, remove_card, BUST, BLACKJACK
+
+RANKS_BY_VALUE = {1: Rank.ACE, 2: Rank.TWO, 3: Rank.THREE, 4: Rank.FOUR, 5: Rank.FIVE, 6: Rank.SIX, 7: Rank.SEVEN,
+                  8: Rank.EIGHT, 9: Rank.NINE, 10: Rank.TEN}
+
+
+def played_out_distribution(upcard, values):
+    """
+    Distribution of dealer_moves over every ordering of a small shoe
+    """
+    outcomes = Counter()
+    orderings = list(permutations(values))
+    for ordering in orderings:
+        shoe = Deck([Card(RANKS_BY_VALUE[value], Suit.CLUB) for value in ordering])
+        dealer = dealer_moves(Table([], Dealer(Hand([Card(RANKS_BY_VALUE[upcard], Suit.HEART)]), shoe), 0)).dealer
+        if dealer.hand.is_blackjack():
+            outcomes[BLACKJACK] += 1
+        elif dealer.hand.is_busted():
+            outcomes[BUST] += 1
+        else:
+            outcomes[dealer.hand.largest_card_total()] += 1
+    return {outcome: count / len(orderings) for outcome, count in outcomes.items()}
+
+
+class DealerOddsTests(unittest.TestCase):
+    def test_matches_dealer_moves_on_small_shoe(self):
+        values = [1, 1, 5, 6, 10, 10, 3]
+        composition = tuple(values.count(value) for value in range(1, 11))
+        for upcard in (1, 6, 10):
+            expected = played_out_distribution(upcard, values)
+            actual = dealer_distribution(upcard, composition)
+            self.assertEqual(set(expected), set(actual))
+            for outcome, probability in expected.items():
+                self.assertAlmostEqual(probability, actual[outcome])
+
+    def test_distributions_sum_to_one(self):
+        for upcard in range(1, 11):
+            self.assertAlmostEqual(1, sum(dealer_distribution(upcard).values()))
+            self.assertAlmostEqual(1, sum(dealer_distribution(upcard, remove_card(full_composition(6), upcard))
+                                          .values()))
+        self.assertGreater(dealer_distribution(6)[BUST], dealer_distribution(10)[BUST])
+        self.assertNotIn(BLACKJACK, dealer_distribution(5))
+
+    def test_cached(self):
+        composition = remove_card(full_composition(1), 6)
+        self.assertIs(dealer_distribution(6, composition), dealer_distribution(6, composition))
+        with self.assertRaises(TypeError):
+            dealer_distribution(6)[17] = 1.0
+
+    def test_shoe_composition(self):
+        shoe = Shoe.from_deck(Deck.standard_deck())
+        self.assertEqual(full_composition(1), shoe_composition(shoe))
+        _, shoe = shoe.draw_card()
+        self.assertEqual(remove_card(full_composition(1), 1), shoe_composition(shoe))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+import argparse
+from typing import NamedTuple, Optional, Union
+
+from dealer_odds import BLACKJACK, BUST, card_draws, dealer_distribution, full_composition
+from strategy_table import ACTIONS, DOUBLE_DOWN, HIT, MAX_UPCARD, SPLIT, STAND, StrategyTable, compile_strategy, \
+    kind_and_total
+
+
+def upcard_key(upcard: int) -> int:
+    """
+    :return: the StrategyTable upcard of a dealer upcard of hard value upcard (an ace showing counts as 11)
+    """
+    return MAX_UPCARD if upcard == 1 else upcard
+
+
+class HandExpectedValue(NamedTuple):
+    probability: float  # of being dealt the hand against the upcard
+    expected_value: float  # per unit bet
+
+
+class ExpectedValue(NamedTuple):
+    expected_value: float  # per unit bet
+    hands: dict  # (hand kind, total, upcard) of the first two cards to HandExpectedValue
+
+
+class ExactEvaluator:
+    """
+    Computes the expected value of playing a StrategyTable by recursing over every card the player can draw, with
+    the dealer's final hand from dealer_odds, under the rules of blackjack.py: blackjack pays even money and ties with
+    a dealer blackjack, the dealer doesn't peek, a pair can be split once, split hands can't double down, and the
+    dealer draws by blackjack.dealer_moves. Values of hand states are memoized, keyed by the cards left.
+    With an infinite deck (composition None) the result is exact. With a finite composition every card drawn is
+    removed from it, except that the two hands of a split are each valued as if the other hadn't drawn any cards.
+    """
+
+    def __init__(self, strategy_table: StrategyTable, composition: Optional[tuple] = None):
+        self.actions = strategy_table.actions
+        self.composition = composition
+        self.stand_cache = {}
+        self.hand_cache = {}
+
+    def stand_ev(self, total: int, is_blackjack: bool, upcard: int, composition: Optional[tuple]) -> float:
+        """
+        :return: expected value per unit bet of standing on total (or a blackjack) against the dealer's upcard
+        """
+        key = (total, is_blackjack, upcard, composition)
+        ev = self.stand_cache.get(key)
+        if ev is None:
+            distribution = dealer_distribution(upcard, composition)
+            if is_blackjack:
+                ev = 1 - distribution.get(BLACKJACK, 0)
+            else:
+                ev = 0.0
+                for outcome, probability in distribution.items():
+                    if outcome == BLACKJACK:
+                        ev -= probability
+                    elif outcome == BUST or outcome < total:
+                        ev += probability
+                    elif outcome > total:
+                        ev -= probability
+            self.stand_cache[key] = ev
+        return ev
+
+    def doubled_ev(self, hard_total: int, has_ace: bool, upcard: int, composition: Optional[tuple]) -> float:
+        """
+        :return: expected value per unit of the original bet of doubling down on a hand
+        """
+        ev = 0.0
+        for value, probability, remaining in card_draws(composition):
+            total = hard_total + value
+            if total > 21:
+                ev -= probability
+            else:
+                soft = (has_ace or value == 1) and total <= 11
+                ev += probability * self.stand_ev(total + 10 if soft else total, False, upcard, remaining)
+        return 2 * ev
+
+    def hand_ev(self, hard_total: int, has_ace: bool, two_cards: bool, is_pair: bool, is_split: bool, upcard: int,
+                composition: Optional[tuple]) -> float:
+        """
+        :return: expected value per unit bet of a hand of hard_total, played by the strategy from here on
+        """
+        key = (hard_total, has_ace, two_cards, is_pair, is_split, upcard, composition)
+        ev = self.hand_cache.get(key)
+        if ev is not None:
+            return ev
+
+        soft = has_ace and hard_total <= 11
+        if hard_total > 21:
+            ev = -1.0
+        elif two_cards and soft and hard_total == 11:  # blackjack, which the player doesn't act on
+            ev = self.stand_ev(21, True, upcard, composition)
+        else:
+            can_double = two_cards and not is_split
+            kind, total = kind_and_total(hard_total, has_ace, is_pair)
+            action = self.actions.item(kind, total, upcard_key(upcard), int(can_double))
+            if action == STAND:
+                ev = self.stand_ev(hard_total + 10 if soft else hard_total, False, upcard, composition)
+            elif action == HIT:
+                ev = sum(probability * self.hand_ev(hard_total + value, has_ace or value == 1, False, False,
+                                                    is_split, upcard, remaining)
+                         for value, probability, remaining in card_draws(composition))
+            elif action == DOUBLE_DOWN:
+                if not can_double:
+                    raise ValueError(f"Strategy doubles down on {kind.name.lower()} {total} when it can't")
+                ev = self.doubled_ev(hard_total, has_ace, upcard, composition)
+            elif action == SPLIT:
+                if not is_pair:
+                    raise ValueError(f"Strategy splits {kind.name.lower()} {total}, which isn't a pair")
+                card = hard_total // 2
+                ev = 2 * sum(probability * self.hand_ev(card + value, card == 1 or value == 1, True, False, True,
+                                                        upcard, remaining)
+                             for value, probability, remaining in card_draws(composition))
+            else:
+                raise Exception(f"Unknown PlayerAction: {ACTIONS[action]}")
+        self.hand_cache[key] = ev
+        return ev
+
+    def evaluate(self) -> ExpectedValue:
+        """
+        Deals the player's first card, the dealer's upcard and the player's second card in every possible way
+        """
+        weighted = {}
+        for upcard, upcard_probability, after_upcard in card_draws(self.composition):
+            for first, first_probability, after_first in card_draws(after_upcard):
+                for second, second_probability, remaining in card_draws(after_first):
+                    probability = upcard_probability * first_probability * second_probability
+                    hard_total, has_ace = first + second, first == 1 or second == 1
+                    ev = self.hand_ev(hard_total, has_ace, True, first == second, False, upcard, remaining)
+                    key = (*kind_and_total(hard_total, has_ace, first == second), upcard_key(upcard))
+                    hand_probability, hand_ev = weighted.get(key, (0.0, 0.0))
+                    weighted[key] = (hand_probability + probability, hand_ev + probability * ev)
+        hands = {key: HandExpectedValue(probability, ev / probability) for key, (probability, ev) in
+                 sorted(weighted.items())}
+        return ExpectedValue(sum(ev for _, ev in weighted.values()), hands)
+
+
+def expected_value(strategy: Union[StrategyTable, object], composition: Optional[tuple] = None) -> ExpectedValue:
+    """
+    :param strategy: a StrategyTable, or a strategy whose action only depends on its StrategyTable cell (it is
+    compiled with strategy_table.compile_strategy)
+    :param composition: number of cards of each hard value in the shoe (see dealer_odds.full_composition), or None
+    for an infinite deck
+    :return: expected value per unit bet of a round, overall and for every first two cards and upcard
+    """
+    if getattr(strategy, "bet_size", None) is not None:
+        raise ValueError(f"{strategy.name} sizes its bets from the shoe, which the exact evaluation doesn't track")
+    if not isinstance(strategy, StrategyTable):
+        strategy = compile_strategy(strategy)
+    return ExactEvaluator(strategy, composition).evaluate()
+
+
+def main(argv=None):
+    from simulation import all_strategies
+
+    parser = argparse.ArgumentParser(description="Compute the exact expected value of a blackjack strategy.")
+    parser.add_argument("--strategy", default="Known Strategy", choices=[strategy.name for strategy in all_strategies
+                                                                         if strategy.name != "Random Action"])
+    parser.add_argument("--decks", type=int, default=None, help="number of decks in the shoe (default: infinite)")
+    parser.add_argument("--hands", action="store_true", help="also print the expected value of every starting hand")
+    args = parser.parse_args(argv)
+
+    strategy = next(strategy for strategy in all_strategies if strategy.name == args.strategy)
+    result = expected_value(strategy, None if args.decks is None else full_composition(args.decks))
+    if args.hands:
+        print(f"{'Hand':<6}{'Total':>6}{'Upcard':>8}{'Probability':>13}{'EV':>10}")
+        for (kind, total, upcard), (probability, ev) in result.hands.items():
+            print(f"{kind.name.lower():<6}{total:>6}{upcard:>8}{probability:>13.6f}{ev:>10.4f}")
+    print(f"{strategy.name}: expected value {result.expected_value:.5f} per unit bet, "
+          f"{result.expected_value * strategy.bet:.4f} per round at a bet of {strategy.bet}")
+    return result
+
+
+if __name__ == "__main__":
+    main()
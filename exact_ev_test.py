@@ -0,0 +1,55 @@
+import unittest
+from itertools import permutations
+
+from batch import run_batch_simulation
+from blackjack import Player, table_payout
+from cards import Card, Rank, Shoe, Suit
+from dealer_odds import full_composition
+from exact_ev import expected_value
+from simulation import play_round, always_stand_strategy, hit_under_seventeen, play_known_strategy, \
+    always_split_when_possible, hi_lo_bet_spread
+
+RANKS_BY_VALUE = {1: Rank.ACE, 2: Rank.TWO, 3: Rank.THREE, 4: Rank.FOUR, 5: Rank.FIVE, 6: Rank.SIX, 7: Rank.SEVEN,
+                  8: Rank.EIGHT, 9: Rank.NINE, 10: Rank.TEN}
+
+
+def played_out_ev(strategy, values):
+    """
+    Mean payout per unit bet of play_round over every distinct ordering of a small shoe
+    """
+    orderings = set(permutations(values))
+    total = 0
+    for ordering in orderings:
+        dealing_shoe = Shoe.from_cards([Card(RANKS_BY_VALUE[value], Suit.CLUB) for value in ordering])
+        total += table_payout(play_round(strategy, dealing_shoe))[Player("Maddie")]
+    return total / len(orderings) / strategy.bet
+
+
+class ExactEvTests(unittest.TestCase):
+    def test_hands(self):
+        result = expected_value(play_known_strategy)
+        self.assertAlmostEqual(1, sum(probability for probability, _ in result.hands.values()))
+        self.assertAlmostEqual(result.expected_value,
+                               sum(probability * ev for probability, ev in result.hands.values()))
+
+    def test_small_shoe_matches_every_deal(self):
+        values = (10, 10, 10, 10, 9, 5, 1)
+        composition = tuple(values.count(value) for value in range(1, 11))
+        for strategy in [always_stand_strategy, hit_under_seventeen]:
+            self.assertAlmostEqual(played_out_ev(strategy, values), expected_value(strategy, composition)[0])
+
+    def test_matches_simulation(self):
+        # the batch engine deals every round from a fresh six deck shoe
+        for strategy in [always_stand_strategy, play_known_strategy, always_split_when_possible]:
+            simulated = run_batch_simulation(strategy, 200_000, 1)
+            half_width = 2 * simulated.confidence_interval_half_width() / strategy.bet
+            exact = expected_value(strategy, None if strategy == play_known_strategy else full_composition(6))[0]
+            self.assertAlmostEqual(exact, simulated.expected_winnings() / strategy.bet, delta=half_width)
+
+    def test_bet_sizing_is_rejected(self):
+        with self.assertRaises(ValueError):
+            expected_value(hi_lo_bet_spread)
+
+
+if __name__ == '__main__':
+    unittest.main()
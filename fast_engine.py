@@ -0,0 +1,212 @@
+from functools import lru_cache
+
+from blackjack import CARD_HARD_VALUES, CARD_IS_ACE, BettingBox, Dealer, Hand, PlayerAction, Table
+from cards import CARDS, Shoe, ShoeExhausted
+from strategy_table import ACTIONS, HandKind, MemoizedAction, StrategyTable, compile_action
+
+UPCARD_KEYS = bytes(11 if is_ace else value for value, is_ace in zip(CARD_HARD_VALUES, CARD_IS_ACE))  # by card code
+
+
+class Box:
+    """
+    A mutable betting box: the card codes of its hand, with the hand's hard total and number of aces kept up to date
+    """
+    __slots__ = ("seat", "codes", "hard_total", "num_aces", "bet", "split")
+
+    def __init__(self, seat: int, bet: int, split=False):
+        self.seat = seat
+        self.codes = []
+        self.hard_total = 0
+        self.num_aces = 0
+        self.bet = bet
+        self.split = split
+
+    def add(self, code: int):
+        self.codes.append(code)
+        self.hard_total += CARD_HARD_VALUES[code]
+        self.num_aces += CARD_IS_ACE[code]
+
+    def is_blackjack(self) -> bool:
+        return len(self.codes) == 2 and self.num_aces > 0 and self.hard_total == 11
+
+    def can_double_down(self) -> bool:
+        return len(self.codes) == 2 and not self.split
+
+    def can_split(self) -> bool:
+        return (len(self.codes) == 2 and not self.split and
+                CARD_HARD_VALUES[self.codes[0]] == CARD_HARD_VALUES[self.codes[1]])
+
+    def best_total(self) -> int:
+        return self.hard_total + 10 if self.num_aces and self.hard_total <= 11 else self.hard_total
+
+
+def table_decider(strategy_table: StrategyTable):
+    """
+    :return: decide(box, upcard code, table) looking the action up in strategy_table, like StrategyTable.get_action
+    """
+    actions = [[[[ACTIONS[code] for code in cell] for cell in row] for row in kind]
+               for kind in strategy_table.actions.tolist()]
+    hard, soft, pair = actions[HandKind.HARD], actions[HandKind.SOFT], actions[HandKind.PAIR]
+
+    def decide(box: Box, upcard_code: int, table) -> PlayerAction:
+        codes = box.codes
+        can_double = len(codes) == 2 and not box.split
+        if can_double and CARD_HARD_VALUES[codes[0]] == CARD_HARD_VALUES[codes[1]]:
+            row = pair[box.hard_total]
+        elif box.num_aces and box.hard_total <= 11:
+            row = soft[box.hard_total + 10]
+        else:
+            row = hard[box.hard_total]
+        return row[UPCARD_KEYS[upcard_code]][can_double]
+
+    return decide
+
+
+def view_decider(get_action, player):
+    """
+    :return: decide(box, upcard code, table) calling get_action with an immutable Table holding just the box being
+    played, the dealer's upcard and the shoe, for strategies that aren't table-driven
+    """
+
+    def decide(box: Box, upcard_code: int, table) -> PlayerAction:
+        hand = Hand([CARDS[code] for code in box.codes], box.hard_total, box.num_aces)
+        dealer = Dealer(Hand([CARDS[upcard_code]]), table.shoe())
+        return get_action(Table([BettingBox(hand, player, box.bet, box.split)], dealer, 0))
+
+    return decide
+
+
+@lru_cache(maxsize=None)
+def compiled_action(get_action: MemoizedAction) -> StrategyTable:
+    return compile_action(get_action)
+
+
+def strategy_decider(strategy, player):
+    """
+    :return: the fastest decide(box, upcard code, table) for strategy: a table lookup if its get_action is a
+    StrategyTable or a MemoizedAction (which is compiled once), and otherwise a call of get_action on an immutable view
+    """
+    get_action = strategy.get_action
+    if isinstance(get_action, MemoizedAction):
+        return table_decider(compiled_action(get_action))
+    if isinstance(getattr(get_action, "__self__", None), StrategyTable):
+        return table_decider(get_action.__self__)
+    return view_decider(get_action, player)
+
+
+class FastTable:
+    """
+    An in-place version of simulation.play_table: a table of seats, each deciding with its own decide function, that
+    deals from a cursor into a shoe's buffer and updates mutable boxes instead of rebuilding tuples after every action.
+    Given the same shoe and strategies it deals and plays exactly like the reference engine in blackjack.py.
+    """
+    __slots__ = ("buffer", "position", "cut_card", "counts", "deciders", "bets", "boxes", "dealer")
+
+    def __init__(self, dealing_shoe: Shoe, deciders: list, bets: list):
+        self.deciders = deciders
+        self.bets = bets
+        self.boxes = []
+        self.dealer = None
+        self.load_shoe(dealing_shoe)
+
+    def load_shoe(self, dealing_shoe: Shoe):
+        self.buffer = dealing_shoe.buffer
+        self.position = dealing_shoe.position
+        self.cut_card = dealing_shoe.cut_card
+        self.counts = dealing_shoe.shoe_counts()
+
+    def shoe(self) -> Shoe:
+        return Shoe(self.buffer, self.position, self.cut_card, self.counts)
+
+    def needs_reshuffle(self) -> bool:
+        return self.cut_card is not None and self.position >= self.cut_card
+
+    def reshuffle(self):
+        self.load_shoe(self.shoe().reshuffle())
+
+    def draw(self) -> int:
+        try:
+            code = self.buffer[self.position]
+        except IndexError:
+            raise ShoeExhausted("The shoe ran out of cards in the middle of a round") from None
+        self.position += 1
+        return code
+
+    def play_round(self) -> list:
+        """
+        Deals and plays one round from the current position in the shoe, with every seat betting its amount in bets
+        :return: the winnings of every seat
+        """
+        boxes = self.boxes = [Box(seat, bet) for seat, bet in enumerate(self.bets)]
+        dealer = self.dealer = Box(-1, 0)
+        for box in boxes:
+            box.add(self.draw())
+        dealer.add(self.draw())
+        for box in boxes:
+            box.add(self.draw())
+        return self.play_boxes()
+
+    def play_boxes(self) -> list:
+        """
+        Plays the turns of the boxes already dealt and then the dealer's hand, from the dealer's upcard on
+        :return: the winnings of every seat
+        """
+        boxes = self.boxes
+        dealer = self.dealer
+        upcard = dealer.codes[0]
+        deciders = self.deciders
+        turn = 0
+        while turn < len(boxes):
+            box = boxes[turn]
+            if box.is_blackjack() or box.hard_total > 21:
+                turn += 1
+                continue
+
+            action = deciders[box.seat](box, upcard, self)
+            if action is PlayerAction.Hit:
+                box.add(self.draw())
+            elif action is PlayerAction.Stand:
+                turn += 1
+            elif action is PlayerAction.DoubleDown:
+                if not box.can_double_down():
+                    raise Exception("Can't double down after hitting")
+                box.bet *= 2
+                box.add(self.draw())
+                turn += 1
+            elif action is PlayerAction.Split:
+                if not box.can_split():
+                    raise Exception("Can't Split Busted Hand")
+                first, second = Box(box.seat, box.bet, True), Box(box.seat, box.bet, True)
+                first.add(box.codes[0])
+                first.add(self.draw())
+                second.add(box.codes[1])
+                second.add(self.draw())
+                boxes[turn:turn + 1] = [first, second]
+            else:
+                raise Exception(f"Unknown PlayerAction: {action}")
+
+        dealer.add(self.draw())
+        while dealer.hard_total + 10 * dealer.num_aces < 17:
+            dealer.add(self.draw())
+        return self.payouts()
+
+    def payouts(self) -> list:
+        """
+        :return: the winnings of every seat, by the rules of blackjack.hand_result
+        """
+        dealer = self.dealer
+        dealer_blackjack = dealer.is_blackjack()
+        dealer_busted = dealer.hard_total > 21
+        dealer_total = dealer.best_total()
+        winnings = [0] * len(self.bets)
+        for box in self.boxes:
+            if box.is_blackjack():
+                if not dealer_blackjack:
+                    winnings[box.seat] += box.bet
+            elif dealer_blackjack or box.hard_total > 21:
+                winnings[box.seat] -= box.bet
+            elif dealer_busted or box.best_total() > dealer_total:
+                winnings[box.seat] += box.bet
+            elif box.best_total() < dealer_total:
+                winnings[box.seat] -= box.bet
+        return winnings
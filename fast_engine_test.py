@@ -0,0 +1,48 @@
+import unittest
+from random import seed
+
+from blackjack import Player
+from cards import Deck, Shoe, ShoeExhausted
+from fast_engine import FastTable, strategy_decider
+from simulation import SharedShoes, all_strategies, always_hit_strategy, always_stand_strategy, hi_lo_bet_spread, \
+    choose_random_strategy, play_known_strategy, play_round, run_simulation, run_table_simulation
+from strategy_table import compile_strategy
+
+
+class FastEngineTests(unittest.TestCase):
+    def test_matches_reference_engine(self):
+        for strategy in all_strategies + [always_hit_strategy, hi_lo_bet_spread]:
+            seed(1)
+            reference = run_simulation(strategy, 300, penetration=0.5, fast=False)
+            seed(1)
+            self.assertEqual(reference, run_simulation(strategy, 300, penetration=0.5), strategy.name)
+
+    def test_strategy_table_get_action(self):
+        table_strategy = play_known_strategy._replace(get_action=compile_strategy(play_known_strategy).get_action)
+        seed(2)
+        reference = run_simulation(table_strategy, 300, fast=False)
+        seed(2)
+        self.assertEqual(reference, run_simulation(table_strategy, 300))
+
+    def test_table_matches_reference_engine(self):
+        strategies = [always_stand_strategy, choose_random_strategy, play_known_strategy] + all_strategies[-4:]
+        seed(3)
+        reference = run_table_simulation(strategies, 200, fast=False)
+        seed(3)
+        self.assertEqual(reference, run_table_simulation(strategies, 200))
+
+    def test_shared_shoes(self):
+        reference = run_simulation(play_known_strategy, 300, shoes=SharedShoes("shoes"), fast=False)
+        self.assertEqual(reference, run_simulation(play_known_strategy, 300, shoes=SharedShoes("shoes")))
+
+    def test_empty_shoe(self):
+        short_shoe = Shoe.from_cards(Deck.standard_deck().cards[:3])
+        table = FastTable(short_shoe, [strategy_decider(always_stand_strategy, Player("Maddie"))], [10])
+        with self.assertRaises(ShoeExhausted):
+            table.play_round()
+        with self.assertRaises(ShoeExhausted):
+            play_round(always_stand_strategy, short_shoe)
+
+
+if __name__ == '__main__':
+    unittest.main()
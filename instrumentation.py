@@ -0,0 +1,67 @@
+from abc import ABC, abstractmethod
+from collections import Counter
+from time import perf_counter
+from typing import Callable, NamedTuple
+
+
+class InstrumentationHook(ABC):
+    """
+    Receives a record call for every timed call of an instrumented phase. Subclass this to send timings to a
+    metrics sink of your own.
+    """
+
+    @abstractmethod
+    def record(self, phase: str, seconds: float):
+        pass
+
+
+class PhaseTimer(InstrumentationHook):
+    """
+    Collects the total time and number of calls of every phase
+    """
+
+    def __init__(self):
+        self.seconds = Counter()
+        self.calls = Counter()
+
+    def record(self, phase: str, seconds: float):
+        self.seconds[phase] += seconds
+        self.calls[phase] += 1
+
+    def report(self) -> str:
+        total = sum(self.seconds.values())
+        lines = [f"{'Phase':<16}{'Calls':>12}{'Total (s)':>12}{'Mean (us)':>12}{'Share':>8}"]
+        for phase, seconds in self.seconds.most_common():
+            lines.append(f"{phase:<16}{self.calls[phase]:>12}{seconds:>12.3f}"
+                         f"{seconds / self.calls[phase] * 1e6:>12.2f}{seconds / total:>8.1%}")
+        return "\n".join(lines)
+
+
+class Instrumentation:
+    """
+    Times calls to functions and passes each timing to every hook
+    """
+
+    def __init__(self, *hooks: InstrumentationHook):
+        self.hooks = hooks
+
+    def timed(self, phase: str, fn: Callable) -> Callable:
+        hooks = self.hooks
+
+        def timed_fn(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                seconds = perf_counter() - start
+                for hook in hooks:
+                    hook.record(phase, seconds)
+
+        return timed_fn
+
+    def wrap(self, phases: NamedTuple) -> NamedTuple:
+        """
+        :param phases: named tuple of functions
+        :return: the same named tuple with every function timed under its field name
+        """
+        return phases._replace(**{phase: self.timed(phase, fn) for phase, fn in phases._asdict().items()})
@@ -0,0 +1,46 @@
+import random
+import unittest
+
+from instrumentation import Instrumentation, InstrumentationHook, PhaseTimer
+from simulation import run_simulation, run_all_simulations, always_split_when_possible, play_known_strategy
+
+
+class ListHook(InstrumentationHook):
+    def __init__(self):
+        self.records = []
+
+    def record(self, phase, seconds):
+        self.records.append((phase, seconds))
+
+
+class InstrumentationTests(unittest.TestCase):
+    def test_timed(self):
+        hook = ListHook()
+        timed = Instrumentation(hook).timed("double", lambda x: 2 * x)
+        self.assertEqual(4, timed(2))
+        with self.assertRaises(TypeError):
+            InstrumentationHook()
+        self.assertEqual("double", hook.records[0][0])
+        self.assertGreaterEqual(hook.records[0][1], 0)
+
+    def test_round_phases(self):
+        timer = PhaseTimer()
+        random.seed(1)
+        instrumented = run_simulation(always_split_when_possible, 200, instrumentation=Instrumentation(timer))
+        random.seed(1)
+        self.assertEqual(run_simulation(always_split_when_possible, 200), instrumented)
+        self.assertEqual(1, timer.calls["new_shoe"])
+        self.assertEqual(200, timer.calls["initial_draw"])
+        self.assertEqual(200, timer.calls["dealer_moves"])
+        self.assertEqual(200, timer.calls["table_payout"])
+        self.assertGreater(timer.calls["split"], 0)
+        self.assertGreaterEqual(timer.calls["strategy"], timer.calls["stand"])
+        self.assertIn("dealer_moves", timer.report())
+
+    def test_not_supported_with_workers(self):
+        with self.assertRaises(ValueError):
+            run_all_simulations([play_known_strategy], 5, 5, workers=1, instrumentation=Instrumentation())
+
+
+if __name__ == '__main__':
+    unittest.main()
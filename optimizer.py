@@ -0,0 +1,305 @@
+import argparse
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import combinations_with_replacement
+from math import factorial, sqrt
+from random import Random
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from blackjack import CARD_HARD_VALUES, PlayerAction
+from cards import Shoe
+from checkpoint import Checkpoint
+from dealer_odds import CARD_VALUES, INFINITE_DECK
+from fast_engine import Box, FastTable, table_decider
+from strategy_table import ACTIONS, DOUBLE_DOWN, HIT, MAX_UPCARD, SPLIT, STAND, HandKind, StrategyTable, \
+    compile_strategy, kind_and_total, probe_betting_boxes, save_chart
+
+DEAL_DEPTH = 40  # cards dealt at random after the hand and upcard, more than any round from a cell draws
+
+
+class Cell(NamedTuple):
+    kind: HandKind
+    total: int
+    upcard: int  # as in StrategyTable: an ace showing is 11
+    can_double: bool
+
+    def index(self) -> tuple:
+        """
+        :return: the cell's index into StrategyTable.actions
+        """
+        return self.kind, self.total, self.upcard, int(self.can_double)
+
+
+class CellResult(NamedTuple):
+    """
+    Simulated value of every legal first action in a cell, with the strategy played from then on
+    """
+    actions: tuple  # action codes
+    expected_values: tuple  # per unit bet, by action
+    difference_errors: tuple  # standard error of the difference in value between every two actions
+
+
+class StartingHand(NamedTuple):
+    values: tuple  # card hard values
+    split: bool
+    weight: float  # relative probability of being dealt
+
+
+class OptimizedStrategy(NamedTuple):
+    strategy_table: StrategyTable
+    changes: list  # (cell, old action, new action), in the order they were made
+    result: object  # simulation.SimulationResult of playing strategy_table
+    initial_result: object  # simulation.SimulationResult of playing the table the optimizer started from
+
+
+def hand_cell(values: tuple, split: bool) -> Optional[tuple]:
+    """
+    :return: (hand kind, total, can double down) of a hand of cards of the given hard values, like
+    strategy_table.hand_key, or None if the hand is busted or a blackjack (which the player doesn't act on)
+    """
+    hard_total, num_aces = sum(values), values.count(1)
+    if hard_total > 21 or (len(values) == 2 and num_aces and hard_total == 11):
+        return None
+    can_double = len(values) == 2 and not split
+    return (*kind_and_total(hard_total, num_aces > 0, can_double and values[0] == values[1]), can_double)
+
+
+@lru_cache(maxsize=None)
+def starting_hands() -> dict:
+    """
+    Hands that reach every (hand kind, total, can double down) cell: unsplit two card hands for the cells that can
+    double down, and three card hands and split two card hands for the ones that can't, each weighted by how likely
+    it is to be dealt from an infinite deck
+    :return: dictionary of (hand kind, total, can double down) to a list of StartingHand
+    """
+    candidates = [(values, False) for num_cards in (2, 3) for values in combinations_with_replacement(CARD_VALUES,
+                                                                                                      num_cards)]
+    candidates += [(values, True) for values in combinations_with_replacement(CARD_VALUES, 2)]
+    hands = {}
+    for values, split in candidates:
+        cell = hand_cell(values, split)
+        if cell is None:
+            continue
+        orderings = factorial(len(values))
+        for value in set(values):
+            orderings //= factorial(values.count(value))
+        weight = orderings * np.prod([INFINITE_DECK[CARD_VALUES.index(value)] for value in values])
+        hands.setdefault(cell, []).append(StartingHand(values, split, weight))
+    return hands
+
+
+def legal_actions(cell: Cell) -> tuple:
+    if not cell.can_double:
+        return HIT, STAND
+    if cell.kind == HandKind.PAIR:
+        return HIT, STAND, DOUBLE_DOWN, SPLIT
+    return HIT, STAND, DOUBLE_DOWN
+
+
+def optimizable_cells() -> list:
+    """
+    :return: every cell the strategy can be asked to decide in, in StrategyTable order
+    """
+    hands = starting_hands()
+    return [Cell(kind, total, upcard, can_double) for kind, total, can_double in sorted(probe_betting_boxes())
+            if (kind, total, can_double) in hands for upcard in range(2, MAX_UPCARD + 1)]
+
+
+def continuation_key(actions: np.ndarray, cell: Cell) -> bytes:
+    """
+    After its first action a hand can't double down any more, so the value of a cell only depends on the actions the
+    strategy takes against the same upcard in cells that can't double down, other than the cell itself
+    :return: those actions, as a cache key
+    """
+    continuation = actions[:, :, cell.upcard, 0].copy()
+    if not cell.can_double:
+        continuation[cell.kind, cell.total] = -1
+    return continuation.tobytes()
+
+
+class FirstAction:
+    """
+    A decide function for FastTable that takes action on its first decision of a round and decides as decide after
+    """
+    __slots__ = ("action", "decide", "pending")
+
+    def __init__(self, action: PlayerAction, decide):
+        self.action = action
+        self.decide = decide
+        self.pending = True
+
+    def __call__(self, box: Box, upcard_code: int, table) -> PlayerAction:
+        if self.pending:
+            self.pending = False
+            return self.action
+        return self.decide(box, upcard_code, table)
+
+
+def card_code(value: int) -> int:
+    return CARD_HARD_VALUES.index(value)
+
+
+def evaluate_cell(actions: np.ndarray, cell: Cell, num_rounds: int, num_decks: int, cell_seed) -> CellResult:
+    """
+    Plays num_rounds rounds from hands that reach cell, dealt from a shoe of num_decks decks, once with each legal
+    first action and then as actions says. Every action is played on the same cards, so their differences are
+    measured with much less noise than their values.
+    """
+    rng = Random(cell_seed)
+    upcard = 1 if cell.upcard == MAX_UPCARD else cell.upcard
+    full_shoe = list(range(len(CARD_HARD_VALUES))) * num_decks
+    hands = starting_hands()[cell.kind, cell.total, cell.can_double]
+    dealt = []
+    for hand in hands:
+        remaining = list(full_shoe)
+        for value in hand.values + (upcard,):
+            remaining.remove(card_code(value))
+        dealt.append(([card_code(value) for value in hand.values], hand.split, remaining))
+
+    legal = legal_actions(cell)
+    first_actions = [FirstAction(ACTIONS[action], table_decider(StrategyTable(actions))) for action in legal]
+    tables = [FastTable(Shoe(array("B")), [first_action], [1]) for first_action in first_actions]
+    payouts = np.zeros((len(legal), num_rounds))
+    for i, (codes, split, remaining) in enumerate(rng.choices(dealt, [hand.weight for hand in hands], k=num_rounds)):
+        dealing_shoe = Shoe(array("B", rng.sample(remaining, DEAL_DEPTH)))
+        for action_index, (table, first_action) in enumerate(zip(tables, first_actions)):
+            table.load_shoe(dealing_shoe)
+            box = Box(0, 1, split)
+            for code in codes:
+                box.add(code)
+            table.boxes = [box]
+            table.dealer = Box(-1, 0)
+            table.dealer.add(card_code(upcard))
+            first_action.pending = True
+            payouts[action_index, i] = table.play_boxes()[0]
+
+    errors = tuple(tuple(float(np.std(first - second, ddof=1) / sqrt(num_rounds)) if num_rounds > 1 else float("inf")
+                         for second in payouts) for first in payouts)
+    return CellResult(legal, tuple(float(value) for value in payouts.mean(axis=1)), errors)
+
+
+def improved_action(current: int, cell_result: CellResult, min_z: float) -> int:
+    """
+    :return: the action with the highest value in cell_result if it beats current by more than min_z standard errors
+    (or current isn't legal in the cell), otherwise current
+    """
+    values = dict(zip(cell_result.actions, cell_result.expected_values))
+    best = max(values, key=values.get)
+    if current not in values:
+        return best
+    current_index, best_index = cell_result.actions.index(current), cell_result.actions.index(best)
+    if values[best] - values[current] > min_z * cell_result.difference_errors[best_index][current_index]:
+        return best
+    return current
+
+
+def optimize_strategy(strategy_table: StrategyTable, num_rounds=2000, num_decks=6, seed=0, workers=None,
+                      min_z=2.0, max_passes=10, cache_path=None, cells=None, eval_rounds=200_000,
+                      progress=None) -> OptimizedStrategy:
+    """
+    Improves a strategy table cell by cell. Every pass simulates the legal first actions of each cell from hands that
+    reach it (see evaluate_cell) and switches the cell to the best one if it beats the current action significantly.
+    Passes repeat until none changes the table. A cell's result is cached under the actions it depends on (see
+    continuation_key), so only cells downstream of a change are simulated again.
+    :param strategy_table: table to start from, which is not modified
+    :param num_rounds: rounds simulated per action per cell
+    :param seed: seed of the simulations: the result for a seed is the same for any number of workers
+    :param workers: number of worker processes, or None to simulate in this process
+    :param min_z: number of standard errors an action has to beat the current one by to replace it
+    :param cache_path: file to keep the cache of cell results in between calls, through a Checkpoint
+    :param cells: cells to optimize (default: all of them, see optimizable_cells)
+    :param eval_rounds: rounds the starting and improved tables are each played for to estimate their expected value
+    :param progress: called with (pass number, cells simulated, cells changed) after every pass
+    """
+    from batch import run_batch_simulation
+    from simulation import Strategy
+
+    cells = optimizable_cells() if cells is None else cells
+    settings = {"num_rounds": num_rounds, "num_decks": num_decks, "seed": seed}
+    checkpoint = Checkpoint(cache_path) if cache_path is not None else None
+    state = checkpoint.load() if checkpoint is not None else None
+    if state is not None and state["settings"] != settings:
+        raise ValueError(f"Cache {cache_path} was made with different settings: {state['settings']}")
+    cache = state["cells"] if state is not None else {}
+
+    actions = strategy_table.actions.copy()
+    changes = []
+    executor = ProcessPoolExecutor(max_workers=workers) if workers is not None else None
+    try:
+        for pass_number in range(1, max_passes + 1):
+            keys = {cell: (cell, continuation_key(actions, cell)) for cell in cells}
+            pending = [cell for cell in cells if keys[cell] not in cache]
+            tasks = [(actions, cell, num_rounds, num_decks, f"{seed}/{cell.kind.name}/{cell.total}/{cell.upcard}/"
+                                                            f"{int(cell.can_double)}") for cell in pending]
+            if executor is None:
+                cell_results = [evaluate_cell(*task) for task in tasks]
+            else:
+                cell_results = list(executor.map(evaluate_cell, *zip(*tasks))) if tasks else []
+            for cell, cell_result in zip(pending, cell_results):
+                cache[keys[cell]] = cell_result
+            if checkpoint is not None:
+                checkpoint.save({"settings": settings, "cells": cache})
+
+            # every cell is decided on the table as it was at the start of the pass
+            improved = [(cell, improved_action(actions.item(cell.index()), cache[keys[cell]], min_z))
+                        for cell in cells]
+            changed = [(cell, actions.item(cell.index()), action) for cell, action in improved
+                       if action != actions.item(cell.index())]
+            for cell, _, action in changed:
+                actions[cell.index()] = action
+            changes += [(cell, ACTIONS[old], ACTIONS[new]) for cell, old, new in changed]
+            if progress is not None:
+                progress(pass_number, len(pending), len(changed))
+            if not changed:
+                break
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    optimized = StrategyTable(actions)
+    result = run_batch_simulation(Strategy(optimized.get_action, 1, "Optimized", "black"), eval_rounds, seed,
+                                  num_decks)
+    initial_result = run_batch_simulation(Strategy(strategy_table.get_action, 1, "Initial", "black"), eval_rounds,
+                                          seed, num_decks)
+    return OptimizedStrategy(optimized, changes, result, initial_result)
+
+
+def main(argv=None):
+    from simulation import all_strategies
+
+    parser = argparse.ArgumentParser(description="Improve a blackjack strategy chart by simulating every cell.")
+    parser.add_argument("--strategy", default="Known Strategy", choices=[strategy.name for strategy in all_strategies
+                                                                         if strategy.name != "Random Action"])
+    parser.add_argument("--rounds", type=int, default=2000, help="rounds simulated per action per cell")
+    parser.add_argument("--decks", type=int, default=6, help="number of decks in the shoe")
+    parser.add_argument("--seed", type=int, default=5, help="random seed")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--min-z", type=float, default=2.0,
+                        help="standard errors an action has to beat the chart's by to replace it")
+    parser.add_argument("--cache", default=None, metavar="PATH",
+                        help="keep simulated cells here, so cells that are already settled aren't simulated again")
+    parser.add_argument("--eval-rounds", type=int, default=200_000,
+                        help="rounds played to estimate the expected value of the charts")
+    parser.add_argument("--output", default="optimized_strategy.csv", help="path of the improved chart")
+    args = parser.parse_args(argv)
+
+    strategy = next(strategy for strategy in all_strategies if strategy.name == args.strategy)
+    optimized = optimize_strategy(compile_strategy(strategy), args.rounds, args.decks, args.seed, args.workers,
+                                  args.min_z, cache_path=args.cache, eval_rounds=args.eval_rounds,
+                                  progress=lambda pass_number, simulated, changed: print(
+                                      f"Pass {pass_number}: simulated {simulated} cells, changed {changed}"))
+    for (kind, total, upcard, can_double), old, new in optimized.changes:
+        print(f"{kind.name.lower()} {total}{'' if can_double else ' (no double)'} against {upcard}: "
+              f"{old.name} -> {new.name}")
+    save_chart(optimized.strategy_table, args.output)
+    for name, result in (("Initial", optimized.initial_result), ("Optimized", optimized.result)):
+        low, high = result.confidence_interval_winnings()
+        print(f"{name} expected value: {result.expected_winnings():.5f} per unit bet (95% CI {low:.5f} to {high:.5f})")
+    return optimized
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+
+from blackjack import PlayerAction
+from optimizer import Cell, evaluate_cell, hand_cell, improved_action, optimizable_cells, optimize_strategy, \
+    starting_hands
+from simulation import always_stand_strategy, play_known_strategy
+from strategy_table import DOUBLE_DOWN, HIT, STAND, HandKind, StrategyTable, compile_strategy, probe_betting_boxes
+
+ELEVEN_AGAINST_SIX = Cell(HandKind.HARD, 11, 6, True)
+TWENTY_AGAINST_SIX = Cell(HandKind.HARD, 20, 6, False)
+
+
+class StartingHandTests(unittest.TestCase):
+    def test_hand_cell(self):
+        self.assertEqual((HandKind.PAIR, 16, True), hand_cell((8, 8), False))
+        self.assertEqual((HandKind.HARD, 16, False), hand_cell((8, 8), True))
+        self.assertEqual((HandKind.SOFT, 17, False), hand_cell((1, 3, 3), False))
+        self.assertIsNone(hand_cell((1, 10), True))
+        self.assertIsNone(hand_cell((10, 6, 8), False))
+
+    def test_every_decision_is_reached(self):
+        hands = starting_hands()
+        self.assertEqual(set(probe_betting_boxes()), set(hands))
+        for cell, cell_hands in hands.items():
+            for hand in cell_hands:
+                self.assertEqual(cell, hand_cell(hand.values, hand.split))
+        self.assertEqual(len(optimizable_cells()), 10 * len(hands))
+
+
+class EvaluateCellTests(unittest.TestCase):
+    def test_same_seed_same_result(self):
+        actions = compile_strategy(play_known_strategy).actions
+        self.assertEqual(evaluate_cell(actions, ELEVEN_AGAINST_SIX, 200, 6, "a"),
+                         evaluate_cell(actions, ELEVEN_AGAINST_SIX, 200, 6, "a"))
+
+    def test_improved_action(self):
+        actions = StrategyTable.filled(PlayerAction.Stand).actions
+        result = evaluate_cell(actions, ELEVEN_AGAINST_SIX, 1000, 6, "b")
+        self.assertEqual((HIT, STAND, DOUBLE_DOWN), result.actions)
+        self.assertAlmostEqual(2 * result.expected_values[0], result.expected_values[2])
+        self.assertEqual(DOUBLE_DOWN, improved_action(STAND, result, 2.0))
+        self.assertEqual(HIT, improved_action(HIT, result, 1000.0))
+
+
+class OptimizeStrategyTests(unittest.TestCase):
+    def test_optimize_strategy(self):
+        passes = []
+        optimized = optimize_strategy(compile_strategy(always_stand_strategy), 500, cells=[ELEVEN_AGAINST_SIX,
+                                                                                            TWENTY_AGAINST_SIX],
+                                      eval_rounds=5000, progress=lambda *counts: passes.append(counts))
+        self.assertEqual([(ELEVEN_AGAINST_SIX, PlayerAction.Stand, PlayerAction.DoubleDown)], optimized.changes)
+        self.assertEqual([(1, 2, 1), (2, 0, 0)], passes)
+        self.assertGreater(optimized.result.expected_winnings(), optimized.initial_result.expected_winnings())
+
+    def test_workers_and_cache(self):
+        cells = [ELEVEN_AGAINST_SIX, Cell(HandKind.HARD, 16, 10, False)]
+        table = compile_strategy(play_known_strategy)
+        expected = optimize_strategy(table, 300, cells=cells, eval_rounds=1000)
+        with tempfile.TemporaryDirectory() as directory:
+            cache_path = os.path.join(directory, "cells.pickle")
+            self.assertEqual(expected.changes, optimize_strategy(table, 300, workers=2, cells=cells, eval_rounds=1000,
+                                                                 cache_path=cache_path).changes)
+            passes = []
+            cached = optimize_strategy(table, 300, cells=cells, eval_rounds=1000, cache_path=cache_path,
+                                       progress=lambda *counts: passes.append(counts))
+            self.assertEqual(expected.changes, cached.changes)
+            self.assertTrue(all(simulated == 0 for _, simulated, _ in passes))
+            with self.assertRaises(ValueError):
+                optimize_strategy(table, 400, cells=cells, eval_rounds=1000, cache_path=cache_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
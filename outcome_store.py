@@ -0,0 +1,112 @@
+import os
+import sys
+from array import array
+from typing import Iterable
+
+import numpy as np
+
+OUTCOME_DTYPE = np.dtype("<f8")  # every outcome is one little-endian float64 record
+RUNS = "runs"
+ROUNDS = "rounds"
+
+
+class OutcomeWriter:
+    """
+    Appends outcomes to a file of fixed-width OUTCOME_DTYPE records. Outcomes are buffered in memory and written in
+    bulk once buffer_size of them have been collected, and on flush and close.
+    """
+
+    def __init__(self, path, buffer_size: int = 1 << 16):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.buffer = array("d")
+        self.file = open(path, "ab")
+        self.records = self.file.tell() // OUTCOME_DTYPE.itemsize  # records on disk, not counting the buffer
+
+    def append(self, outcome: float):
+        self.buffer.append(outcome)
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def extend(self, outcomes: Iterable[float]):
+        self.buffer.extend(outcomes)
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if sys.byteorder == "big":
+            self.buffer.byteswap()
+        self.buffer.tofile(self.file)
+        self.file.flush()
+        self.records += len(self.buffer)
+        del self.buffer[:]
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_outcomes(path) -> np.ndarray:
+    """
+    :return: read-only array of the outcomes in a file written by OutcomeWriter, memory-mapped so that only the parts
+    that are used are read from disk
+    """
+    if os.path.getsize(path) == 0:  # a zero length file can't be mapped
+        return np.empty(0, dtype=OUTCOME_DTYPE)
+    return np.memmap(path, dtype=OUTCOME_DTYPE, mode="r")
+
+
+class OutcomeStore:
+    """
+    A directory holding, for every strategy, the total winnings of each run in "<strategy name>.runs.f8" and, if
+    keep_rounds, the winnings of each round in "<strategy name>.rounds.f8", in the order they were simulated
+    """
+
+    def __init__(self, directory, keep_rounds=False):
+        self.directory = directory
+        self.keep_rounds = keep_rounds
+
+    def kinds(self) -> tuple:
+        return (RUNS, ROUNDS) if self.keep_rounds else (RUNS,)
+
+    def path(self, name: str, kind: str = RUNS) -> str:
+        return os.path.join(self.directory, f"{name}.{kind}.f8")
+
+    def read(self, name: str, kind: str = RUNS) -> np.ndarray:
+        return read_outcomes(self.path(name, kind))
+
+    def writers(self, names, records: dict) -> dict:
+        """
+        Opens a writer for every kind of outcome of every strategy, after cutting each file down to the number of
+        records it is given in records (none if missing), so a resumed simulation doesn't store outcomes twice
+        :return: dictionary of (strategy name, kind) to OutcomeWriter
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        writers = {}
+        for name in names:
+            for kind in self.kinds():
+                with open(self.path(name, kind), "ab") as f:
+                    f.truncate(records.get((name, kind), 0) * OUTCOME_DTYPE.itemsize)
+                writers[name, kind] = OutcomeWriter(self.path(name, kind))
+        return writers
+
+
+def flush_writers(writers: dict) -> dict:
+    """
+    :return: dictionary of (strategy name, kind) to the number of records on disk after flushing every writer
+    """
+    for writer in writers.values():
+        writer.flush()
+    return {key: writer.records for key, writer in writers.items()}
+
+
+def close_writers(writers: dict):
+    for writer in writers.values():
+        writer.close()
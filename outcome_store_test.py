@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+from collections import Counter
+from random import seed
+
+from checkpoint import Checkpoint
+from checkpoint_test import Interrupted, interrupted_after
+from outcome_store import ROUNDS, OutcomeStore, OutcomeWriter, read_outcomes
+from simulation import SimulationResult, always_stand_strategy, choose_random_strategy, run_all_simulations
+
+
+class OutcomeWriterTests(unittest.TestCase):
+    def test_append_and_read(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "outcomes.f8")
+            with OutcomeWriter(path, buffer_size=4) as writer:
+                writer.extend([10, -10])
+                for outcome in [15, 0, -20]:
+                    writer.append(outcome)
+                self.assertEqual(4, writer.records)
+            self.assertEqual(5 * 8, os.path.getsize(path))
+            self.assertEqual([10, -10, 15, 0, -20], read_outcomes(path).tolist())
+            with OutcomeWriter(path) as writer:
+                writer.append(5)
+            self.assertEqual([10, -10, 15, 0, -20, 5], read_outcomes(path).tolist())
+
+    def test_read_empty(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "outcomes.f8")
+            OutcomeWriter(path).close()
+            self.assertEqual(0, len(read_outcomes(path)))
+
+
+class OutcomeStoreTests(unittest.TestCase):
+    def test_matches_results(self):
+        strategies = [always_stand_strategy, choose_random_strategy]
+        for workers in [None, 1]:
+            with tempfile.TemporaryDirectory() as directory:
+                store = OutcomeStore(directory, keep_rounds=True)
+                results = run_all_simulations(strategies, 5, 300, workers=workers, run_seed=3, outcomes=store)
+                for strategy in strategies:
+                    runs = store.read(strategy.name)
+                    self.assertEqual(300, len(runs))
+                    self.assertEqual(300 * 5, len(store.read(strategy.name, ROUNDS)))
+                    self.assertEqual(results[strategy].total_winnings(), runs.sum())
+                    self.assertEqual(runs.sum(), store.read(strategy.name, ROUNDS).sum())
+                    self.assertEqual(results[strategy].range(), SimulationResult.from_outcomes(runs).range())
+
+    def test_chunked_matches_sequential_order(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = OutcomeStore(directory)
+            first = run_all_simulations([choose_random_strategy], 5, 600, workers=1, run_seed=3, outcomes=store)
+            stored = store.read(choose_random_strategy.name).tolist()
+            # a rerun replaces the stored outcomes rather than appending to them
+            run_all_simulations([choose_random_strategy], 5, 600, workers=1, run_seed=3, outcomes=store)
+            self.assertEqual(stored, store.read(choose_random_strategy.name).tolist())
+            self.assertEqual(first[choose_random_strategy].result_counter, Counter(stored))
+
+    def test_resume(self):
+        for workers in [None, 1]:
+            with tempfile.TemporaryDirectory() as directory:
+                expected_store = OutcomeStore(os.path.join(directory, "expected"), keep_rounds=True)
+                seed(7)
+                run_all_simulations([choose_random_strategy], 5, 600, workers=workers, run_seed=3,
+                                    outcomes=expected_store)
+                store = OutcomeStore(os.path.join(directory, "resumed"), keep_rounds=True)
+                checkpoint = Checkpoint(os.path.join(directory, "sweep.checkpoint"), every=0)
+                seed(7)
+                with self.assertRaises(Interrupted):
+                    run_all_simulations([interrupted_after(choose_random_strategy, 2000)], 5, 600, workers=workers,
+                                        run_seed=3, checkpoint=checkpoint, outcomes=store)
+                run_all_simulations([choose_random_strategy], 5, 600, workers=workers, run_seed=3,
+                                    checkpoint=checkpoint, outcomes=store)
+                for kind in expected_store.kinds():
+                    self.assertEqual(expected_store.read(choose_random_strategy.name, kind).tolist(),
+                                     store.read(choose_random_strategy.name, kind).tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
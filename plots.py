@@ -0,0 +1,151 @@
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from math import ceil
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+NUM_BINS = 60
+DEFAULT_TITLE = "Profit/Loss for {num_rounds} Rounds Simulated {num_runs} Times"
+
+
+class Histogram(NamedTuple):
+    edges: list  # one more than there are bins
+    counts: list
+
+    @staticmethod
+    def from_counter(result_counter, num_bins=NUM_BINS):
+        """
+        Bins a histogram of every winnings value into at most num_bins bins of equal width. For integer winnings the
+        width is a multiple of the spacing between the values, so every bin holds the same number of possible values.
+        """
+        values = np.fromiter(result_counter.keys(), dtype=float, count=len(result_counter))
+        occurrences = np.fromiter(result_counter.values(), dtype=np.int64, count=len(result_counter))
+        low, high = values.min(), values.max()
+        if np.all(values == np.rint(values)):
+            step = int(np.gcd.reduce(np.rint(values - low).astype(np.int64))) or 1
+            width = step * ceil((high - low + step) / (step * num_bins))
+            start = low - step / 2
+            num_bins = int((high - start) // width) + 1
+        elif high == low:
+            start, width, num_bins = low - 0.5, 1.0, 1
+        else:
+            # the bins span low to high exactly, and high falls in the last bin rather than opening one of its own
+            start, width = low, (high - low) / num_bins
+        indices = np.minimum((values - start) // width, num_bins - 1).astype(np.int64)
+        counts = np.bincount(indices, weights=occurrences, minlength=num_bins)
+        return Histogram((start + width * np.arange(num_bins + 1)).tolist(), counts.astype(np.int64).tolist())
+
+
+class StoredResult(NamedTuple):
+    name: str
+    color: str
+    summary: dict  # see simulation.SimulationResult.summary
+    histogram: Optional[Histogram]
+
+
+class StoredResults(NamedTuple):
+    """
+    What the plots of a simulation are rendered from, so they can be rendered again without simulating
+    """
+    num_rounds: int
+    num_runs: Optional[int]  # None if the strategies were simulated a different number of times
+    results: list  # of StoredResult
+    joint: list  # names of the strategies in the joint histogram
+
+
+def save_results(stored: StoredResults, path):
+    with open(path, "w") as f:
+        json.dump({"num_rounds": stored.num_rounds, "num_runs": stored.num_runs, "joint": stored.joint,
+                   "results": [{"name": result.name, "color": result.color, "summary": result.summary,
+                                "histogram": None if result.histogram is None else result.histogram._asdict()}
+                               for result in stored.results]}, f, indent=1)
+
+
+def load_results(path) -> StoredResults:
+    with open(path) as f:
+        stored = json.load(f)
+    results = [StoredResult(result["name"], result["color"], result["summary"],
+                            None if result["histogram"] is None else Histogram(**result["histogram"]))
+               for result in stored["results"]]
+    return StoredResults(stored["num_rounds"], stored["num_runs"], results, stored["joint"])
+
+
+def runs_label(results: list) -> str:
+    """
+    :return: the number of runs of results (the count of their summaries), as a range if it isn't the same for all
+    """
+    counts = sorted({result.summary["count"] for result in results}) or [0]
+    return str(counts[0]) if len(counts) == 1 else f"{counts[0]} to {counts[-1]}"
+
+
+def render_histogram(path, results: list, title: str, mean_line=False):
+    """
+    Saves a PNG of the binned histograms of results, on one chart, with a dashed line at the mean if mean_line.
+    Uses a Figure of its own rather than pyplot's current figure, so charts can be rendered in parallel.
+    """
+    from matplotlib.figure import Figure
+
+    figure = Figure(dpi=200)
+    axes = figure.add_subplot()
+    for result in results:
+        edges = np.asarray(result.histogram.edges)
+        axes.bar(edges[:-1], result.histogram.counts, np.diff(edges), align="edge", linewidth=1, edgecolor="black",
+                 alpha=0.4, label=result.name, color=result.color)
+        if mean_line:
+            axes.axvline(result.summary["total"] / result.summary["count"], linewidth=2, linestyle="--",
+                         color="black")
+    axes.legend(fontsize=12)
+    axes.set_title(title, fontsize=12)
+    figure.savefig(path)
+
+
+def render_results(stored: StoredResults, directory=".", workers=None, title=DEFAULT_TITLE, colors=None) -> list:
+    """
+    Renders a joint histogram of stored.joint and one histogram per strategy as PNGs in directory, on a pool of
+    workers processes if workers is more than 1. Results stored without a histogram are skipped.
+    :param title: chart title, where {num_rounds} is replaced by that of the simulation and {num_runs} by the number
+    of runs of the strategies on the chart (see runs_label)
+    :param colors: optional dictionary of strategy name to a color to draw it in instead of its own
+    :return: paths of the PNGs rendered
+    """
+    colors = colors or {}
+    results = [result._replace(color=colors.get(result.name, result.color)) for result in stored.results
+               if result.histogram is not None]
+    joint = [result for result in results if result.name in stored.joint]
+    charts = [(os.path.join(directory, "joint_histogram.png"), joint, False)]
+    charts += [(os.path.join(directory, f"{result.name}.png"), [result], True) for result in results]
+    charts = [(path, chart_results, title.format(num_rounds=stored.num_rounds, num_runs=runs_label(chart_results)),
+               mean_line) for path, chart_results, mean_line in charts]
+    if workers is None or workers == 1:
+        for chart in charts:
+            render_histogram(*chart)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(render_histogram, *zip(*charts)))
+    return [path for path, *_ in charts]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render the histograms of saved simulation results.")
+    parser.add_argument("results", help="results file written by simulation.py (see its --results-file)")
+    parser.add_argument("--plot-dir", default=".", help="directory to save histograms in")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes rendering charts")
+    parser.add_argument("--title", default=DEFAULT_TITLE,
+                        help="chart title; {num_rounds} and {num_runs} are replaced by the number of rounds and "
+                             "runs simulated")
+    parser.add_argument("--color", nargs="+", default=[], metavar="NAME=COLOR",
+                        help="draw these strategies in other colors")
+    args = parser.parse_args(argv)
+
+    colors = dict(color.rsplit("=", 1) for color in args.color)
+    paths = render_results(load_results(args.results), args.plot_dir, args.workers, args.title, colors)
+    for path in paths:
+        print(f"Saved {path}")
+    return paths
+
+
+if __name__ == "__main__":
+    main()
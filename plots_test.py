@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+from collections import Counter
+
+from plots import Histogram, load_results, main, render_results, runs_label, save_results
+from simulation import SimulationResult, always_stand_strategy, play_known_strategy, stored_results
+
+
+class HistogramTests(unittest.TestCase):
+    def test_bins_follow_the_spacing_of_the_values(self):
+        counter = Counter({-20: 1, -10: 2, 0: 3, 30: 1})
+        self.assertEqual(Histogram([-25, -15, -5, 5, 15, 25, 35], [1, 2, 3, 0, 0, 1]), Histogram.from_counter(counter))
+        self.assertEqual(Histogram([-25, 5, 35], [6, 1]), Histogram.from_counter(counter, num_bins=2))
+
+    def test_bins_of_many_values(self):
+        counter = Counter({value: value % 7 + 1 for value in range(-1000, 1001, 2)})
+        histogram = Histogram.from_counter(counter, num_bins=50)
+        self.assertLessEqual(len(histogram.counts), 50)
+        self.assertEqual(len(histogram.counts) + 1, len(histogram.edges))
+        self.assertEqual(sum(counter.values()), sum(histogram.counts))
+        self.assertLessEqual(histogram.edges[0], -1000)
+        self.assertGreater(histogram.edges[-1], 1000)
+
+    def test_single_and_fractional_values(self):
+        self.assertEqual(Histogram([4.5, 5.5], [3]), Histogram.from_counter(Counter({5: 3})))
+        histogram = Histogram.from_counter(Counter({0.5: 1, 1.25: 1, 2.5: 2}), num_bins=4)
+        self.assertEqual(4, sum(histogram.counts))
+        self.assertLessEqual(len(histogram.counts), 4)
+        fractions = Counter({value / 7: 1 for value in range(100)})
+        for num_bins in (1, 2, 60):
+            histogram = Histogram.from_counter(fractions, num_bins)
+            self.assertLessEqual(len(histogram.counts), num_bins)
+            self.assertEqual(100, sum(histogram.counts))
+
+
+class StoredResultsTests(unittest.TestCase):
+    def test_summary(self):
+        result = SimulationResult(Counter({10: 2, -20: 3}))
+        restored = SimulationResult.from_summary(result.summary())
+        self.assertEqual(result.summary(), restored.summary())
+        self.assertEqual(result.confidence_interval_winnings(), restored.confidence_interval_winnings())
+
+    def test_save_load_and_render(self):
+        results = {always_stand_strategy: SimulationResult(Counter({10: 2, -20: 3, 40: 1})),
+                   play_known_strategy: SimulationResult(Counter({0: 4, 20: 1})),
+                   always_stand_strategy._replace(name="No Histogram"): SimulationResult(keep_histogram=False).add(1)}
+        stored = stored_results(results, 5)
+        self.assertEqual([play_known_strategy.name, always_stand_strategy.name], stored.joint)
+        self.assertIsNone(stored.num_runs)
+        self.assertEqual("1 to 6", runs_label(stored.results))
+        self.assertEqual("5", runs_label(stored.results[1:2]))
+        self.assertEqual(5, stored_results({play_known_strategy: results[play_known_strategy]}, 5).num_runs)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.json")
+            save_results(stored, path)
+            self.assertEqual(stored, load_results(path))
+            paths = render_results(load_results(path), directory, colors={play_known_strategy.name: "navy"})
+            self.assertEqual({"joint_histogram.png", "Always Stand.png", "Known Strategy.png"},
+                             {os.path.basename(png) for png in paths})
+            for png in paths:
+                self.assertGreater(os.path.getsize(png), 0)
+
+            plot_dir = os.path.join(directory, "plots")
+            os.mkdir(plot_dir)
+            main([path, "--plot-dir", plot_dir, "--workers", "2", "--title", "{num_runs} runs",
+                  "--color", "Always Stand=black"])
+            self.assertEqual({"joint_histogram.png", "Always Stand.png", "Known Strategy.png"},
+                             set(os.listdir(plot_dir)))
+
+
+if __name__ == '__main__':
+    unittest.main()
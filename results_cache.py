@@ -0,0 +1,177 @@
+import hashlib
+import importlib
+import inspect
+import os
+from functools import lru_cache
+from typing import Optional
+
+from checkpoint import Checkpoint
+from fast_engine import compiled_action
+from strategy_table import MemoizedAction, StrategyTable
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+ENTRY_EXTENSION = ".pickle"
+# modules whose code decides the outcome of a round; a change to any of them invalidates every cached result
+RULE_MODULES = ("blackjack", "cards", "counting", "fast_engine", "rng_streams", "strategy_table")
+# the parts of simulation.py that do
+SIMULATION_RULES = ("SimulationResult", "SharedShoes", "new_shoe", "play_round", "play_phases", "play_table",
+                    "run_simulation", "run_fast_rounds", "run_simulation_chunk", "simulation_chunks", "with_rng")
+IMMUTABLE_TYPES = (type(None), bool, int, float, str, bytes)
+
+
+def digest(*parts) -> str:
+    """
+    :return: a sha256 hex digest of parts, which must be strings, bytes or values with a stable repr
+    """
+    sha = hashlib.sha256()
+    for part in parts:
+        data = part if isinstance(part, bytes) else repr(part).encode()
+        sha.update(len(data).to_bytes(8, "little"))
+        sha.update(data)
+    return sha.hexdigest()
+
+
+def instance_state(value) -> list:
+    """
+    :return: (name, value) of every attribute of value, from its __dict__ and the __slots__ of its class, by name
+    """
+    state = dict(getattr(value, "__dict__", {}))
+    for cls in type(value).__mro__:
+        slots = cls.__dict__.get("__slots__", ())
+        for name in [slots] if isinstance(slots, str) else slots:
+            if name not in ("__dict__", "__weakref__") and hasattr(value, name):
+                state[name] = getattr(value, name)
+    return sorted(state.items())
+
+
+def definition(value) -> Optional[str]:
+    """
+    :return: a digest of what value does: the compiled table of a table-driven strategy, the source of a function
+    (and of the values its closure captured) or of the class of any other callable (and the values of its
+    attributes), and the repr of immutable values and tuples of them. None if value is not known well enough to be
+    cached, for example a lambda typed in a shell, or a closure or callable object holding mutable state.
+    """
+    if isinstance(value, IMMUTABLE_TYPES):
+        return digest(value)
+    if isinstance(value, MemoizedAction):
+        return digest(compiled_action(value).actions.tobytes())
+    if isinstance(getattr(value, "__self__", None), StrategyTable):
+        return digest(value.__self__.actions.tobytes())
+    if isinstance(value, tuple):
+        parts = [definition(item) for item in value]
+        return None if None in parts else digest(type(value).__qualname__, *parts)
+    if not callable(value):
+        return None
+    function = value if inspect.isfunction(value) or inspect.ismethod(value) else type(value)
+    try:
+        source = inspect.getsource(function)
+    except (OSError, TypeError):
+        return None
+    captured = [definition(cell.cell_contents) for cell in getattr(value, "__closure__", None) or ()]
+    if function is not value:
+        attributes = [(name, definition(attribute)) for name, attribute in instance_state(value)]
+        captured += [None if part is None else digest(name, part) for name, part in attributes]
+    return None if None in captured else digest(source, *captured)
+
+
+def strategy_fingerprint(strategy) -> Optional[str]:
+    """
+    :return: a digest of everything about strategy that its simulated winnings depend on: its name (which names its
+    random streams), bet, actions and bet sizing. None if the strategy can't be cached (see definition).
+    """
+    parts = [definition(strategy.get_action), definition(strategy.bet_size)]
+    return None if None in parts else digest(strategy.name, strategy.bet, *parts)
+
+
+@lru_cache(maxsize=None)
+def rules_fingerprint() -> str:
+    """
+    :return: a digest of the game rules: the code of RULE_MODULES and SIMULATION_RULES, the number of decks in a shoe,
+    its penetration and the size of a chunk of runs
+    """
+    import simulation
+
+    sources = [inspect.getsource(importlib.import_module(name)) for name in RULE_MODULES]
+    sources += [inspect.getsource(getattr(simulation, name)) for name in SIMULATION_RULES]
+    return digest(*sources, simulation.num_decks, simulation.penetration, simulation.chunk_size)
+
+
+class ResultsCache:
+    """
+    A directory of simulation results, addressed by the content of what was simulated: there is one entry per
+    strategy definition, game rules, number of rounds and run seed, holding the SimulationResult (summary statistics
+    and histogram) of every chunk of runs simulated with them. A chunk's result only depends on its seed and size, so a
+    simulation of any number of runs reuses the chunks it shares with earlier ones and only simulates the rest: asking
+    for more runs extends a cached result instead of starting over. Entries are evicted least recently used first once
+    the directory holds more than max_bytes.
+    """
+
+    def __init__(self, directory, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def entry_path(self, strategy, num_rounds, run_seed) -> Optional[str]:
+        """
+        :return: path of the entry of strategy, or None if it can't be cached
+        """
+        fingerprint = strategy_fingerprint(strategy)
+        if fingerprint is None:
+            return None
+        key = digest(fingerprint, rules_fingerprint(), num_rounds, run_seed)
+        return os.path.join(self.directory, key + ENTRY_EXTENSION)
+
+    def load_entry(self, path) -> dict:
+        """
+        :return: the chunk results in the entry at path, by (chunk seed, number of runs); empty if there is none
+        """
+        entry = Checkpoint(path).load() if path is not None else None
+        if entry is None:
+            return {}
+        os.utime(path)  # marks the entry as recently used
+        return entry["chunk_results"]
+
+    def lookup(self, chunks: list, run_seed) -> dict:
+        """
+        :param chunks: run_simulation_chunk argument tuples, see simulation.simulation_chunks
+        :return: the cached results of chunks, by index in chunks
+        """
+        entries = {}
+        results = {}
+        for index, (strategy, num_rounds, num_runs, chunk_seed) in enumerate(chunks):
+            if (strategy, num_rounds) not in entries:
+                entries[strategy, num_rounds] = self.load_entry(self.entry_path(strategy, num_rounds, run_seed))
+            result = entries[strategy, num_rounds].get((chunk_seed, num_runs))
+            if result is not None:
+                results[index] = result
+        return results
+
+    def store(self, chunks: list, run_seed, chunk_results: dict):
+        """
+        Adds the results of chunks, by index in chunks, to the entries of their strategies, then evicts entries until
+        the cache fits in max_bytes
+        """
+        by_entry = {}
+        for index, (strategy, num_rounds, num_runs, chunk_seed) in enumerate(chunks):
+            if index in chunk_results:
+                by_entry.setdefault((strategy, num_rounds), {})[chunk_seed, num_runs] = chunk_results[index]
+        for (strategy, num_rounds), results in by_entry.items():
+            path = self.entry_path(strategy, num_rounds, run_seed)
+            if path is None:
+                continue
+            stored = self.load_entry(path)
+            stored.update(results)
+            Checkpoint(path).save({"strategy": strategy.name, "num_rounds": num_rounds, "run_seed": run_seed,
+                                   "chunk_results": stored})
+        self.evict()
+
+    def evict(self):
+        entries = [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                   if name.endswith(ENTRY_EXTENSION)]
+        entries.sort(key=os.path.getmtime)
+        size = sum(os.path.getsize(path) for path in entries)
+        for path in entries:
+            if size <= self.max_bytes:
+                break
+            size -= os.path.getsize(path)
+            os.remove(path)
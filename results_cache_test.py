@@ -0,0 +1,125 @@
+import os
+import tempfile
+import unittest
+from random import Random
+from unittest import mock
+
+from checkpoint_test import interrupted_after
+from counting import HI_LO, BetSpread
+from outcome_store import OutcomeStore
+from results_cache import ResultsCache, definition, rules_fingerprint, strategy_fingerprint
+from simulation import RandomAction, always_stand_strategy, choose_random_strategy, hi_lo_bet_spread, main, \
+    play_known_strategy, run_all_simulations, run_simulation_chunk
+from strategy_table import StrategyTable, compile_strategy
+
+
+class FlatBet:
+    __slots__ = ("units",)
+
+    def __init__(self, units):
+        self.units = units
+
+    def __call__(self, shoe):
+        return self.units
+
+
+class FingerprintTests(unittest.TestCase):
+    def test_strategies(self):
+        self.assertEqual(strategy_fingerprint(play_known_strategy), strategy_fingerprint(play_known_strategy))
+        fingerprints = {strategy_fingerprint(strategy) for strategy in
+                        [play_known_strategy, always_stand_strategy, choose_random_strategy, hi_lo_bet_spread,
+                         play_known_strategy._replace(bet=20), play_known_strategy._replace(name="Renamed"),
+                         hi_lo_bet_spread._replace(bet_size=BetSpread(HI_LO, 10, 4))]}
+        self.assertEqual(7, len(fingerprints))
+        self.assertNotIn(None, fingerprints)
+
+    def test_tables_are_fingerprinted_by_their_actions(self):
+        table = compile_strategy(play_known_strategy)
+        same = StrategyTable(table.actions.copy())
+        changed = StrategyTable(table.actions.copy())
+        changed.actions[0, 12, 2, 0] = 1 - changed.actions[0, 12, 2, 0]
+        fingerprint = strategy_fingerprint(play_known_strategy._replace(get_action=table.get_action))
+        self.assertEqual(fingerprint, strategy_fingerprint(play_known_strategy._replace(get_action=same.get_action)))
+        self.assertNotEqual(fingerprint,
+                            strategy_fingerprint(play_known_strategy._replace(get_action=changed.get_action)))
+
+    def test_callable_objects_are_fingerprinted_with_their_state(self):
+        self.assertEqual(definition(FlatBet(10)), definition(FlatBet(10)))
+        self.assertNotEqual(definition(FlatBet(10)), definition(FlatBet(20)))
+        self.assertIsNotNone(definition(RandomAction()))
+        self.assertIsNone(definition(RandomAction(Random(1))))
+
+    def test_uncacheable(self):
+        self.assertIsNone(strategy_fingerprint(interrupted_after(always_stand_strategy, 10)))
+        self.assertEqual(rules_fingerprint(), rules_fingerprint())
+
+
+class ResultsCacheTests(unittest.TestCase):
+    def simulate(self, cache, num_runs, strategies=(always_stand_strategy, choose_random_strategy)) -> tuple:
+        """
+        :return: (results, number of chunks simulated)
+        """
+        with mock.patch("simulation.run_simulation_chunk", wraps=run_simulation_chunk) as run_chunk:
+            results = run_all_simulations(list(strategies), 5, num_runs, workers=1, run_seed=3, cache=cache)
+        return results, run_chunk.call_count
+
+    def test_reuse_and_extend(self):
+        expected = run_all_simulations([always_stand_strategy, choose_random_strategy], 5, 750, workers=1, run_seed=3)
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ResultsCache(directory)
+            self.assertEqual(4, self.simulate(cache, 500)[1])
+            self.assertEqual((expected, 2), self.simulate(cache, 750))
+            self.assertEqual((expected, 0), self.simulate(cache, 750))
+            self.assertEqual(2, len(os.listdir(directory)))
+
+            renamed = choose_random_strategy._replace(name="Renamed")
+            results, chunks_simulated = self.simulate(cache, 750, [always_stand_strategy, renamed])
+            self.assertEqual(3, chunks_simulated)
+            self.assertEqual(expected[always_stand_strategy], results[always_stand_strategy])
+
+    def test_uncacheable_strategies_are_simulated(self):
+        strategy = interrupted_after(always_stand_strategy, 10 ** 6)
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ResultsCache(directory)
+            self.assertEqual(1, self.simulate(cache, 250, [strategy])[1])
+            self.assertEqual(1, self.simulate(cache, 250, [strategy])[1])
+            self.assertEqual([], os.listdir(directory))
+
+    def test_eviction(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ResultsCache(directory)
+            self.simulate(cache, 250, [choose_random_strategy])
+            entry_size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+            cache = ResultsCache(directory, max_bytes=entry_size)
+            self.simulate(cache, 250, [always_stand_strategy])
+            self.assertEqual(1, len(os.listdir(directory)))
+            self.assertEqual(0, self.simulate(cache, 250, [always_stand_strategy])[1])
+            self.assertEqual(1, self.simulate(cache, 250, [choose_random_strategy])[1])
+
+    def test_unsupported(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ResultsCache(directory)
+            with self.assertRaises(ValueError):
+                run_all_simulations([always_stand_strategy], 5, 10, cache=cache)
+            with self.assertRaises(ValueError):
+                run_all_simulations([always_stand_strategy], 5, 10, workers=1, cache=cache,
+                                    outcomes=OutcomeStore(directory))
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as directory:
+            arguments = ["--strategies", "Always Stand", "Known Strategy", "--rounds", "5", "--workers", "1",
+                         "--no-plots", "--output", os.path.join(directory, "results.csv")]
+            cached = arguments + ["--cache", os.path.join(directory, "cache"), "--cache-size", "1"]
+            expected = main(arguments + ["--runs", "300"])
+            main(cached + ["--runs", "250"])
+            with mock.patch("simulation.run_simulation_chunk", wraps=run_simulation_chunk) as run_chunk:
+                self.assertEqual(expected, main(cached + ["--runs", "300"]))
+            self.assertEqual(2, run_chunk.call_count)
+            with self.assertRaises(SystemExit):
+                main(cached + ["--runs", "300", "--workers", "1", "--paired"])
+            with self.assertRaises(SystemExit):
+                main(["--cache", directory, "--no-plots", "--output", os.path.join(directory, "results.csv")])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import hashlib
+from array import array
+
+import numpy as np
+
+from cards import CARDS, Shoe, ShoeCounts, cut_card_position
+
+
+def stream_entropy(key) -> int:
+    """
+    :return: key if it's a non-negative int, otherwise a stable 64 bit hash of its string form (the same in every
+    process, unlike hash)
+    """
+    if isinstance(key, int) and key >= 0:
+        return key
+    return int.from_bytes(hashlib.sha256(str(key).encode()).digest()[:8], "little")
+
+
+def seed_sequence(run_seed, *keys) -> np.random.SeedSequence:
+    """
+    :param keys: names the stream within the run, for example a strategy name and the first run of a chunk
+    :return: the seed of an independent random stream, which can be split further with spawn. Streams with different
+    keys are independent, and a stream only depends on run_seed and its keys, not on what other streams drew.
+    """
+    return np.random.SeedSequence(stream_entropy(run_seed), spawn_key=tuple(stream_entropy(key) for key in keys))
+
+
+def rng_stream(run_seed, *keys) -> np.random.Generator:
+    """
+    :return: a NumPy Generator drawing from the stream of seed_sequence(run_seed, *keys)
+    """
+    return np.random.default_rng(seed_sequence(run_seed, *keys))
+
+
+def python_seed(sequence: np.random.SeedSequence) -> int:
+    """
+    :return: a 128 bit seed from sequence for a random.Random (or the global random state), for code that takes one
+    """
+    return int.from_bytes(sequence.generate_state(4).tobytes(), "little")
+
+
+class ShoeStream:
+    """
+    Shuffled shoes of num_decks decks drawn from a NumPy Generator, batch_size at a time: every batch is one call to
+    Generator.permuted on a matrix with one shoe per row, so shuffling runs in native code
+    """
+
+    def __init__(self, rng: np.random.Generator, penetration: float, num_decks: int = 6, batch_size: int = 64):
+        self.rng = rng
+        self.template = np.tile(np.tile(np.arange(len(CARDS), dtype=np.uint8), num_decks), (batch_size, 1))
+        self.cut_card = cut_card_position(self.template.shape[1], penetration)
+        self.batch = self.template[:0]
+        self.next_row = 0
+
+    def next_shoe(self) -> Shoe:
+        if self.next_row == len(self.batch):
+            self.batch = self.rng.permuted(self.template, axis=1)
+            self.next_row = 0
+        buffer = array("B", self.batch[self.next_row].tobytes())
+        self.next_row += 1
+        return Shoe(buffer, 0, self.cut_card, ShoeCounts(buffer))
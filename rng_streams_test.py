@@ -0,0 +1,53 @@
+import unittest
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from cards import CARDS
+from rng_streams import ShoeStream, python_seed, rng_stream, seed_sequence, stream_entropy
+from simulation import choose_random_strategy, play_known_strategy, run_simulation_chunk, simulation_chunks
+
+
+class StreamTests(unittest.TestCase):
+    def test_streams_are_named_by_their_keys(self):
+        self.assertEqual(5, stream_entropy(5))
+        self.assertEqual(stream_entropy("Known Strategy"), stream_entropy("Known Strategy"))
+        self.assertEqual(python_seed(seed_sequence(3, "Known Strategy", 250)),
+                         python_seed(seed_sequence(3, "Known Strategy", 250)))
+        self.assertNotEqual(python_seed(seed_sequence(3, "Known Strategy", 250)),
+                            python_seed(seed_sequence(3, "Known Strategy", 500)))
+        self.assertNotEqual(python_seed(seed_sequence(3, "Known Strategy")),
+                            python_seed(seed_sequence(4, "Known Strategy")))
+
+
+class ShoeStreamTests(unittest.TestCase):
+    def test_shoes(self):
+        stream = ShoeStream(rng_stream(1), 0.75, num_decks=2, batch_size=3)
+        shoes = [stream.next_shoe() for _ in range(7)]
+        for shoe in shoes:
+            self.assertEqual(Counter({code: 2 for code in range(len(CARDS))}), Counter(shoe.buffer))
+            self.assertEqual((0, 78), (shoe.position, shoe.cut_card))
+        self.assertEqual(7, len({shoe.buffer.tobytes() for shoe in shoes}))
+        same_stream = ShoeStream(rng_stream(1), 0.75, num_decks=2, batch_size=3)
+        self.assertEqual(shoes, [same_stream.next_shoe() for _ in range(7)])
+
+    def test_penetration(self):
+        with self.assertRaises(ValueError):
+            ShoeStream(rng_stream(1), 0)
+        with self.assertRaises(ValueError):
+            ShoeStream(rng_stream(1), 1)
+        with self.assertRaises(ValueError):
+            ShoeStream(rng_stream(1), 0.9, num_decks=1)
+
+
+class ChunkStreamTests(unittest.TestCase):
+    def test_chunks_are_reproducible_on_threads(self):
+        chunks = simulation_chunks(choose_random_strategy, 10, 1000, 4) + simulation_chunks(play_known_strategy, 10,
+                                                                                            1000, 4)
+        expected = [run_simulation_chunk(*chunk) for chunk in chunks]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            self.assertEqual(expected, list(executor.map(lambda chunk: run_simulation_chunk(*chunk), chunks)))
+        self.assertEqual(expected, [run_simulation_chunk(*chunk) for chunk in reversed(chunks)][::-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
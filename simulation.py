@@ -1,71 +1,187 @@
+import argparse
 import csv
+import os
 import typing
-from collections import Counter
+from array import array
+from collections import Counter, deque
 from math import sqrt
-from random import choice, seed
-from typing import NamedTuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+from functools import partial
+from itertools import islice
+from random import Random, choice, seed, getrandbits, getstate, setstate
+from time import perf_counter
+from typing import NamedTuple, Optional
 
-from matplotlib import pyplot as plt
-import matplotlib as mpl
-from progressbar import progressbar
+import numpy as np
 
 from blackjack import Table, PlayerAction, BettingBox, Player, Hand, Dealer, shoe, initial_draw, \
     table_payout, hit, stand, dealer_moves, double_down, split
-from cards import Deck, Rank
-
-seed(5)
+from cards import Deck, Rank, Shoe
+from checkpoint import Checkpoint
+from counting import HI_LO, BetSpread
+from fast_engine import FastTable, strategy_decider
+from instrumentation import Instrumentation, PhaseTimer
+from outcome_store import ROUNDS, RUNS, OutcomeStore, close_writers, flush_writers
+from plots import NUM_BINS, Histogram, StoredResult, StoredResults, render_results, save_results
+from results_cache import DEFAULT_MAX_BYTES, ResultsCache, strategy_fingerprint
+from rng_streams import ShoeStream, python_seed, rng_stream, seed_sequence
+from status import SimulationStatus, StatusServer
+from strategy_table import MemoizedAction, load_chart
 
 
 # Assumes that the same bet is being used for each hand
-class SimulationResult(NamedTuple):
-    result_counter: Counter[int]
+class SimulationResult:
+    """
+    Streaming summary of winnings: count, exact total, sum of squared deviations from the mean (Welford), min/max and
+    the number of profitable results, each updated in O(1) by add and combined by merge. Optionally keeps a
+    histogram of every winnings value alongside, in result_counter.
+    """
+
+    def __init__(self, result_counter: Counter = None, keep_histogram=True):
+        self.count = 0
+        self.total = 0
+        self.m2 = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.profitable = 0
+        self.result_counter = Counter() if keep_histogram else None
+        for winnings, occurrences in (result_counter or {}).items():
+            self.add(winnings, occurrences)
+
+    def add(self, winnings, occurrences=1):
+        if occurrences <= 0:
+            return self
+        old_mean = self.total / self.count if self.count else 0.0
+        self.count += occurrences
+        self.total += winnings * occurrences
+        self.m2 += (winnings - old_mean) * (winnings - self.total / self.count) * occurrences
+        self.minimum = winnings if self.minimum is None else min(self.minimum, winnings)
+        self.maximum = winnings if self.maximum is None else max(self.maximum, winnings)
+        if winnings >= 0:
+            self.profitable += occurrences
+        if self.result_counter is not None:
+            self.result_counter[winnings] += occurrences
+        return self
+
+    def merge(self, x):
+        """
+        Adds the results summarised by x to this summary in place (Chan et al.'s parallel variance update)
+        """
+        if x.count == 0:
+            return self
+        if self.count == 0:
+            self.m2 = x.m2
+        else:
+            delta = x.total / x.count - self.total / self.count
+            self.m2 += x.m2 + delta ** 2 * self.count * x.count / (self.count + x.count)
+        self.count += x.count
+        self.total += x.total
+        self.minimum = x.minimum if self.minimum is None else min(self.minimum, x.minimum)
+        self.maximum = x.maximum if self.maximum is None else max(self.maximum, x.maximum)
+        self.profitable += x.profitable
+        if self.result_counter is not None:
+            if x.result_counter is None:
+                self.result_counter = None
+            else:
+                self.result_counter.update(x.result_counter)
+        return self
+
+    def copy(self):
+        result = SimulationResult(keep_histogram=False)
+        result.merge(self)
+        result.result_counter = None if self.result_counter is None else self.result_counter.copy()
+        return result
 
     def __add__(self, x):
-        return SimulationResult(self.result_counter + x.result_counter)
+        return self.copy().merge(x)
+
+    def __iadd__(self, x):
+        return self.merge(x)
+
+    def __eq__(self, x):
+        if not isinstance(x, SimulationResult):
+            return NotImplemented
+        return (self.count, self.total, self.m2, self.minimum, self.maximum, self.profitable, self.result_counter) == \
+               (x.count, x.total, x.m2, x.minimum, x.maximum, x.profitable, x.result_counter)
+
+    def __repr__(self) -> str:
+        return f"SimulationResult(count={self.count}, total={self.total}, m2={self.m2}, minimum={self.minimum}, " \
+               f"maximum={self.maximum}, profitable={self.profitable})"
+
+    @staticmethod
+    def from_outcomes(outcomes, keep_histogram=True, block_size=1 << 20):
+        """
+        Summarises stored outcomes, such as an OutcomeStore's memory-mapped array, one block at a time so the whole
+        array is never loaded into memory
+        """
+        simulation_result = SimulationResult(keep_histogram=keep_histogram)
+        for start in range(0, len(outcomes), block_size):
+            values, counts = np.unique(outcomes[start:start + block_size], return_counts=True)
+            simulation_result.merge(SimulationResult(Counter(dict(zip(values.tolist(), counts.tolist()))),
+                                                     keep_histogram))
+        return simulation_result
 
     def total_games(self) -> int:
-        return sum(self.result_counter.values())
+        return self.count
 
     def expected_winnings(self) -> float:
         return self.total_winnings() / self.total_games()
 
     def sample_variance_winnings(self) -> float:
-        expected_winnings = self.expected_winnings()
-
-        variance_sum = 0
-        for winnings, occurrences in self.result_counter.items():
-            variance_sum += (winnings ** 2) * occurrences
-        variance_sum /= self.total_games()
-        return variance_sum - (expected_winnings ** 2)
+        return self.m2 / self.total_games()
 
     def sample_std_deviation(self) -> float:
         return sqrt(self.sample_variance_winnings())
 
+    def confidence_interval_half_width(self) -> float:
+        return 1.96 * self.sample_std_deviation() / sqrt(self.total_games())
+
     def confidence_interval_winnings(self) -> tuple:
         expected_winnings = self.expected_winnings()
-        sample_std_dev = self.sample_std_deviation()
-        lower_bound = expected_winnings - 1.96 * sample_std_dev / sqrt(self.total_games())
-        upper_bound = expected_winnings + 1.96 * sample_std_dev / sqrt(self.total_games())
-        return lower_bound, upper_bound
+        half_width = self.confidence_interval_half_width()
+        return expected_winnings - half_width, expected_winnings + half_width
 
     def total_winnings(self):
-        return sum((winnings * occurrences for winnings, occurrences in self.result_counter.items()))
+        return self.total
 
     def percentage_games_profitable(self):
-        count = 0
-        for winnings, occurrences in self.result_counter.items():
-            if winnings >= 0:
-                count += occurrences
-        return count / self.total_games()
+        return self.profitable / self.total_games()
 
     def range(self) -> tuple:
-        min_winnings = min(self.result_counter)
-        max_winnings = max(self.result_counter)
-        return min_winnings, max_winnings
-
-    def create_hist(self, name, color):
-        labels, values = zip(*sorted(self.result_counter.items()))
-        plt.bar(labels, values, 10, linewidth=1, edgecolor="black", alpha=0.4, label=name, color=color)
+        if self.count == 0:
+            raise ValueError("No results to take the range of")
+        return self.minimum, self.maximum
+
+    def summary(self) -> dict:
+        """
+        :return: everything but the histogram, as a dictionary of plain numbers (see from_summary)
+        """
+        return {"count": self.count, "total": self.total, "m2": self.m2, "minimum": self.minimum,
+                "maximum": self.maximum, "profitable": self.profitable}
+
+    @staticmethod
+    def from_summary(summary: dict):
+        simulation_result = SimulationResult(keep_histogram=False)
+        for field, value in summary.items():
+            setattr(simulation_result, field, value)
+        return simulation_result
+
+    def histogram(self, num_bins=NUM_BINS) -> Histogram:
+        """
+        :return: the histogram of winnings in at most num_bins bins (see plots.Histogram.from_counter)
+        """
+        if self.result_counter is None:
+            raise ValueError("Histogram was not kept for this result")
+        return Histogram.from_counter(self.result_counter, num_bins)
+
+    def create_hist(self, name, color, num_bins=NUM_BINS):
+        from matplotlib import pyplot as plt
+
+        histogram = self.histogram(num_bins)
+        edges = np.asarray(histogram.edges)
+        plt.bar(edges[:-1], histogram.counts, np.diff(edges), align="edge", linewidth=1, edgecolor="black", alpha=0.4,
+                label=name, color=color)
         plt.xlabel("Winnings")
         plt.ylabel("Frequency")
 
@@ -75,11 +191,28 @@ class Strategy(NamedTuple):
     bet: int
     name: str
     color: str
+    bet_size: Optional[typing.Callable[[Shoe], int]] = None  # sizes every round's bet from the shoe instead of bet
 
+    def round_bet(self, dealing_shoe: Shoe) -> int:
+        return self.bet if self.bet_size is None else self.bet_size(dealing_shoe)
 
-always_stand_strategy = Strategy(lambda table: PlayerAction.Stand, 10, "Always Stand", "orange")
-always_hit_strategy = Strategy(lambda table: PlayerAction.Hit, 10, "Always Hit", "pink")
-always_double_down = Strategy(lambda table: PlayerAction.DoubleDown, 10, "Always Double Down", "green")
+
+# Strategy functions are defined at module level (not as lambdas) so strategies can be pickled to worker processes
+def always_stand_fn(table):
+    return PlayerAction.Stand
+
+
+def always_hit_fn(table):
+    return PlayerAction.Hit
+
+
+def always_double_down_fn(table):
+    return PlayerAction.DoubleDown
+
+
+always_stand_strategy = Strategy(MemoizedAction(always_stand_fn), 10, "Always Stand", "orange")
+always_hit_strategy = Strategy(MemoizedAction(always_hit_fn), 10, "Always Hit", "pink")
+always_double_down = Strategy(MemoizedAction(always_double_down_fn), 10, "Always Double Down", "green")
 
 
 def hit_under_seventeen_fn(table):
@@ -89,21 +222,42 @@ def hit_under_seventeen_fn(table):
         return PlayerAction.Stand
 
 
-hit_under_seventeen = Strategy(hit_under_seventeen_fn, 10, "Hit Under 17", "purple")
+hit_under_seventeen = Strategy(MemoizedAction(hit_under_seventeen_fn), 10, "Hit Under 17", "purple")
 
 
-def random_strategy_fn(table):
-    choices = [PlayerAction.Hit, PlayerAction.Stand]
-    if table.current_player_betting_box().can_double_down():
-        choices.append(PlayerAction.DoubleDown)
-    if table.current_player_betting_box().can_split():
-        choices.append(PlayerAction.Split)
-    return choice(choices)
+class RandomAction:
+    """
+    get_action choosing uniformly among the actions allowed, with rng (a random.Random) or, if rng is None, the
+    global random state
+    """
 
+    def __init__(self, rng: Optional[Random] = None):
+        self.rng = rng
 
+    def __call__(self, table):
+        choices = [PlayerAction.Hit, PlayerAction.Stand]
+        if table.current_player_betting_box().can_double_down():
+            choices.append(PlayerAction.DoubleDown)
+        if table.current_player_betting_box().can_split():
+            choices.append(PlayerAction.Split)
+        return (choice if self.rng is None else self.rng.choice)(choices)
+
+    def with_rng(self, rng: Random):
+        return RandomAction(rng)
+
+
+random_strategy_fn = RandomAction()
 choose_random_strategy = Strategy(random_strategy_fn, 10, "Random Action", "red")
 
 
+def with_rng(strategy: Strategy, rng: Random) -> Strategy:
+    """
+    :return: strategy making its own random choices with rng, if its get_action can be given one (has with_rng)
+    """
+    bind = getattr(strategy.get_action, "with_rng", None)
+    return strategy if bind is None else strategy._replace(get_action=bind(rng))
+
+
 def double_down_on_eleven_fn(table):
     if len(table.current_player_betting_box().hand.cards) == 2 and table.current_player_betting_box().hand.card_totals() == {
         11}:
@@ -112,7 +266,7 @@ def double_down_on_eleven_fn(table):
         return PlayerAction.Stand
 
 
-double_down_on_eleven = Strategy(double_down_on_eleven_fn, 10, "Double Down on 11", "aqua")
+double_down_on_eleven = Strategy(MemoizedAction(double_down_on_eleven_fn), 10, "Double Down on 11", "aqua")
 
 
 def split_when_possible(table):
@@ -122,7 +276,7 @@ def split_when_possible(table):
     return PlayerAction.Stand
 
 
-always_split_when_possible = Strategy(split_when_possible, 10, "Split When Possible", "yellow")
+always_split_when_possible = Strategy(MemoizedAction(split_when_possible), 10, "Split When Possible", "yellow")
 
 
 def known_strategy(table):  # implemented when dealer stands on soft 17
@@ -224,60 +378,629 @@ def known_strategy(table):  # implemented when dealer stands on soft 17
             return PlayerAction.Stand
 
 
-play_known_strategy = Strategy(known_strategy, 10, "Known Strategy", "blue")
+play_known_strategy = Strategy(MemoizedAction(known_strategy), 10, "Known Strategy", "blue")
+hi_lo_bet_spread = Strategy(play_known_strategy.get_action, 10, "Hi-Lo Bet Spread", "brown", BetSpread(HI_LO, 10, 8))
 
 
-def run_single_simulation(strategy) -> SimulationResult:
-    dealer = Dealer(Hand([]), shoe(Deck.standard_deck(), 6).shuffle())
-    table = Table([BettingBox(Hand([]), Player("Maddie"), strategy.bet)], dealer, 0)
-    table = initial_draw(table)
+def chart_strategy(path, bet, name, color) -> Strategy:
+    """
+    Builds a strategy from a basic strategy chart file (see strategy_table.save_chart)
+    """
+    return Strategy(load_chart(path).get_action, bet, name, color)
+
+
+num_decks = 6
+penetration = 0.75  # share of the shoe dealt before the cut card comes out and the shoe is reshuffled
+
+
+def new_shoe(penetration=penetration, rng=None, seats=1) -> Shoe:
+    """
+    :param seats: number of betting boxes the shoe deals to, which the penetration must leave room behind the cut
+    card for (see cards.cut_card_position)
+    """
+    return shoe(Deck.standard_deck(), num_decks).with_penetration(penetration, seats).shuffle(rng)
+
+
+class RoundPhases(NamedTuple):
+    """
+    The functions a simulated round is made of, so they can be swapped for instrumented versions
+    """
+    new_shoe: typing.Callable = new_shoe
+    reshuffle: typing.Callable = Shoe.reshuffle
+    initial_draw: typing.Callable = initial_draw
+    hit: typing.Callable = hit
+    stand: typing.Callable = stand
+    double_down: typing.Callable = double_down
+    split: typing.Callable = split
+    dealer_moves: typing.Callable = dealer_moves
+    table_payout: typing.Callable = table_payout
+
+
+round_phases = RoundPhases()
+
+
+def instrumented_phases(strategy, instrumentation: Optional[Instrumentation]) -> tuple:
+    """
+    :return: the round phases and the strategy's get_action, timed if instrumentation is given
+    """
+    if instrumentation is None:
+        return round_phases, strategy.get_action
+    return instrumentation.wrap(round_phases), instrumentation.timed("strategy", strategy.get_action)
+
+
+def play_round(strategy, dealing_shoe, instrumentation=None) -> Table:
+    """
+    Plays a single round for one player following strategy, dealing from dealing_shoe
+    :param instrumentation: optional Instrumentation timing each phase of the round
+    :return: the table after the dealer has finished
+    """
+    phases, get_action = instrumented_phases(strategy, instrumentation)
+    return play_phases(phases, get_action, strategy.round_bet(dealing_shoe), dealing_shoe)
+
+
+def play_phases(phases: RoundPhases, get_action, bet, dealing_shoe) -> Table:
+    maddie = Player("Maddie")
+    return play_table(phases, [BettingBox(Hand([]), maddie, bet)], {maddie: get_action}, dealing_shoe)
+
+
+def play_table(phases: RoundPhases, betting_boxes: list, get_actions: dict, dealing_shoe) -> Table:
+    """
+    Plays a single round at a table of empty betting boxes: every box in turn, then the dealer once for all of them
+    :param get_actions: dictionary of Player to the get_action deciding for that player's boxes
+    :return: the table after the dealer has finished
+    """
+    table = Table(betting_boxes, Dealer(Hand([]), dealing_shoe), 0)
+    table = phases.initial_draw(table)
     while table.play_in_progress():
-        if table.current_player_betting_box().hand.is_blackjack():
+        betting_box = table.current_player_betting_box()
+        if betting_box.hand.is_blackjack():
             table = table.advance_player()
             continue
 
-        if table.current_player_betting_box().hand.is_busted():
+        if betting_box.hand.is_busted():
             table = table.advance_player()
             continue
 
-        action = strategy.get_action(table)
+        action = get_actions[betting_box.player](table)
         if action == PlayerAction.Hit:
-            table = hit(table)
+            table = phases.hit(table)
         elif action == PlayerAction.Stand:
-            table = stand(table)
+            table = phases.stand(table)
             table = table.advance_player()
         elif action == PlayerAction.DoubleDown:
-            table = double_down(table)
+            table = phases.double_down(table)
             table = table.advance_player()
         elif action == PlayerAction.Split:
-            table = split(table)
+            table = phases.split(table)
         else:
             raise Exception(f"Unknown PlayerAction: {action}")
 
-    table = dealer_moves(table)
+    return phases.dealer_moves(table)
+
+
+MAX_SEATS = 7
+
+
+def seat_strategies(strategies, instrumentation: Optional[Instrumentation]) -> tuple:
+    """
+    Seats one player per strategy, each a different Player so table_payout keeps the winnings of seats playing the
+    same strategy apart
+    :return: the round phases, the players in seat order and a dictionary of player to get_action, timed if
+    instrumentation is given
+    """
+    if not 1 <= len(strategies) <= MAX_SEATS:
+        raise ValueError(f"A table seats 1 to {MAX_SEATS} betting boxes, got {len(strategies)}")
+    players = [Player(f"Seat {seat}") for seat in range(1, len(strategies) + 1)]
+    phases = instrumented_phases(strategies[0], instrumentation)[0]
+    get_actions = {player: instrumented_phases(strategy, instrumentation)[1]
+                   for player, strategy in zip(players, strategies)}
+    return phases, players, get_actions
+
+
+def play_table_round(strategies, dealing_shoe, instrumentation=None) -> Table:
+    """
+    Plays a single round with one betting box per strategy, seated in order, dealing from dealing_shoe
+    :param instrumentation: optional Instrumentation timing each phase of the round
+    :return: the table after the dealer has finished
+    """
+    phases, players, get_actions = seat_strategies(strategies, instrumentation)
+    return play_table(phases, [BettingBox(Hand([]), player, strategy.round_bet(dealing_shoe)) for player, strategy in
+                               zip(players, strategies)], get_actions, dealing_shoe)
+
+
+def run_single_simulation(strategy) -> SimulationResult:
+    table = play_round(strategy, new_shoe())
     payout = table_payout(table)[Player("Maddie")]
     sim_result = SimulationResult(Counter([payout]))
     return sim_result
 
 
-def run_simulation(strategy, num_runs) -> SimulationResult:
-    simulation_result = SimulationResult(Counter())
+def run_simulation(strategy, num_runs, penetration=penetration, keep_histogram=True,
+                   instrumentation=None, round_outcomes=None, shoes=None, fast=True) -> SimulationResult:
+    """
+    Plays num_runs rounds from one shoe that lasts across rounds and is reshuffled whenever the cut card has come out
+    :param instrumentation: optional Instrumentation timing each phase of every round
+    :param round_outcomes: optional list-like (such as an OutcomeWriter) the winnings of every round are appended to
+    :param shoes: optional SharedShoes to take the first shoe and each shoe after a reshuffle from, in order, instead
+    of shuffling them (the cut card is then placed by shoes' penetration)
+    :param fast: play rounds with the in-place engine of fast_engine rather than the round phases, unless
+    instrumentation is given. Both give the same results from the same random state.
+    """
+    if fast and instrumentation is None:
+        return run_fast_rounds([strategy], [Player("Maddie")], num_runs, penetration, keep_histogram, round_outcomes,
+                               shoes)[0]
+    phases, get_action = instrumented_phases(strategy, instrumentation)
+    simulation_result = SimulationResult(keep_histogram=keep_histogram)
+    dealing_shoe = phases.new_shoe(penetration) if shoes is None else shoes[0]
+    shoes_used = 1
     for i in range(num_runs):
-        simulation_result += run_single_simulation(strategy)
+        if dealing_shoe.needs_reshuffle():
+            if shoes is None:
+                dealing_shoe = phases.reshuffle(dealing_shoe)
+            else:
+                dealing_shoe = shoes[shoes_used]
+                shoes_used += 1
+        table = play_phases(phases, get_action, strategy.round_bet(dealing_shoe), dealing_shoe)
+        dealing_shoe = table.dealer.shoe
+        winnings = phases.table_payout(table)[Player("Maddie")]
+        simulation_result.add(winnings)
+        if round_outcomes is not None:
+            round_outcomes.append(winnings)
     return simulation_result
 
 
-def run_simulation_multi_round(strategy, num_rounds, num_runs) -> SimulationResult:
-    simulation_result = SimulationResult(Counter())
+def run_fast_rounds(strategies, players, num_runs, penetration=penetration, keep_histogram=True, round_outcomes=None,
+                    shoes=None) -> list:
+    """
+    The in-place version of run_table_simulation, see run_simulation
+    :return: one SimulationResult of the winnings of every round per seat
+    """
+    table = FastTable(new_shoe(penetration, seats=len(strategies)) if shoes is None else shoes[0],
+                      [strategy_decider(strategy, player) for strategy, player in zip(strategies, players)],
+                      [strategy.bet for strategy in strategies])
+    seat_results = [SimulationResult(keep_histogram=keep_histogram) for _ in strategies]
+    sized = any(strategy.bet_size is not None for strategy in strategies)
+    shoes_used = 1
+    for i in range(num_runs):
+        if table.needs_reshuffle():
+            if shoes is None:
+                table.reshuffle()
+            else:
+                table.load_shoe(shoes[shoes_used])
+                shoes_used += 1
+        if sized:
+            dealing_shoe = table.shoe()
+            table.bets = [strategy.round_bet(dealing_shoe) for strategy in strategies]
+        payouts = table.play_round()
+        for seat_result, winnings in zip(seat_results, payouts):
+            seat_result.add(winnings)
+        if round_outcomes is not None:
+            round_outcomes.append(payouts[0])
+    return seat_results
+
+
+def run_table_simulation(strategies, num_runs, penetration=penetration, keep_histogram=True,
+                         instrumentation=None, fast=True) -> list:
+    """
+    Plays num_runs rounds at a table with one betting box per strategy (at most MAX_SEATS), seated in order, all
+    dealt from one shoe that lasts across rounds and with one dealer hand per round
+    :param instrumentation: optional Instrumentation timing each phase of every round
+    :param fast: play rounds with the in-place engine, unless instrumentation is given (see run_simulation)
+    :return: one SimulationResult of the winnings of every round per seat
+    :raise ValueError: if penetration leaves too few cards behind the cut card for a round at this many seats
+    """
+    phases, players, get_actions = seat_strategies(strategies, instrumentation)
+    if fast and instrumentation is None:
+        return run_fast_rounds(strategies, players, num_runs, penetration, keep_histogram)
+    seat_results = [SimulationResult(keep_histogram=keep_histogram) for _ in strategies]
+    dealing_shoe = phases.new_shoe(penetration, seats=len(strategies))
+    for i in range(num_runs):
+        if dealing_shoe.needs_reshuffle():
+            dealing_shoe = phases.reshuffle(dealing_shoe)
+        betting_boxes = [BettingBox(Hand([]), player, strategy.round_bet(dealing_shoe))
+                         for player, strategy in zip(players, strategies)]
+        table = play_table(phases, betting_boxes, get_actions, dealing_shoe)
+        dealing_shoe = table.dealer.shoe
+        payouts = phases.table_payout(table)
+        for player, seat_result in zip(players, seat_results):
+            seat_result.add(payouts[player])
+    return seat_results
+
+
+def run_table_simulation_multi_round(strategies, num_rounds, num_runs, instrumentation=None) -> list:
+    """
+    Simulates num_runs independent runs of num_rounds rounds each at a table seating one box per strategy
+    :return: one SimulationResult of the total winnings of every run per seat
+    """
+    from progressbar import progressbar
+
+    seat_results = [SimulationResult() for _ in strategies]
     for i in progressbar(range(num_runs)):
-        individual_performance = run_simulation(strategy, num_rounds)
-        simulation_result += SimulationResult(Counter([individual_performance.total_winnings()]))
+        run_results = run_table_simulation(strategies, num_rounds, keep_histogram=False,
+                                           instrumentation=instrumentation)
+        for seat_result, run_result in zip(seat_results, run_results):
+            seat_result.add(run_result.total_winnings())
+    return seat_results
+
+
+def run_simulation_multi_round(strategy, num_rounds, num_runs, workers=None, run_seed=None, instrumentation=None,
+                               checkpoint=None, outcomes=None, status=None) -> SimulationResult:
+    """
+    Simulates num_runs independent runs of num_rounds rounds each and collects the total winnings of every run
+    :param workers: if None, runs are simulated one after another from the global random state. Otherwise runs are
+    split into seeded chunks and simulated on a pool of this many worker processes (see run_all_simulations)
+    :param run_seed: seed for the chunked mode; drawn from the global random state if not given
+    :param instrumentation: optional Instrumentation timing each phase of every round (only without workers)
+    :param checkpoint: optional Checkpoint to periodically save progress to and resume from
+    :param outcomes: optional OutcomeStore to write the winnings of every run (and round) to
+    :param status: optional status.SimulationStatus to publish progress and interim statistics to
+    """
+    return run_all_simulations([strategy], num_rounds, num_runs, workers, run_seed, instrumentation, checkpoint,
+                               outcomes, status)[strategy]
+
+
+chunk_size = 250
+
+
+def run_simulation_chunk(strategy, num_rounds, num_runs, chunk_seed, run_outcomes=None,
+                         round_outcomes=None) -> SimulationResult:
+    """
+    Simulates one chunk of runs from the random stream named chunk_seed (see rng_streams.seed_sequence), so that the
+    outcome of a chunk does not depend on which process or thread runs it or what ran before it. The stream is split
+    in two: one part shuffles the chunk's shoes in bulk, the other makes the strategy's own random choices (given to
+    it with with_rng, and also seeding the global random state for strategies that use that).
+    :param run_outcomes: optional list-like the total winnings of every run are appended to
+    :param round_outcomes: optional list-like the winnings of every round are appended to
+    """
+    shoe_sequence, strategy_sequence = seed_sequence(chunk_seed).spawn(2)
+    strategy_seed = python_seed(strategy_sequence)
+    seed(strategy_seed)
+    strategy = with_rng(strategy, Random(strategy_seed))
+    shoe_stream = ShoeStream(np.random.default_rng(shoe_sequence), penetration, num_decks)
+    simulation_result = SimulationResult()
+    for i in range(num_runs):
+        individual_performance = run_simulation(strategy, num_rounds, keep_histogram=False,
+                                                round_outcomes=round_outcomes, shoes=SharedShoes(stream=shoe_stream))
+        simulation_result.add(individual_performance.total_winnings())
+        if run_outcomes is not None:
+            run_outcomes.append(individual_performance.total_winnings())
     return simulation_result
 
 
+def run_outcome_chunk(strategy, num_rounds, num_runs, chunk_seed, keep_rounds=False) -> tuple:
+    """
+    Same as run_simulation_chunk, also collecting the winnings of every run and, if keep_rounds, of every round
+    :return: (SimulationResult, array of run winnings, array of round winnings or None)
+    """
+    run_outcomes = array("d")
+    round_outcomes = array("d") if keep_rounds else None
+    simulation_result = run_simulation_chunk(strategy, num_rounds, num_runs, chunk_seed, run_outcomes, round_outcomes)
+    return simulation_result, run_outcomes, round_outcomes
+
+
+def simulation_chunks(strategy, num_rounds, num_runs, run_seed) -> list:
+    """
+    Splits num_runs runs of a strategy into chunks of at most chunk_size runs
+    :return: list of run_simulation_chunk argument tuples, one per chunk
+    """
+    return [(strategy, num_rounds, min(chunk_size, num_runs - start), f"{run_seed}/{strategy.name}/{start}")
+            for start in range(0, num_runs, chunk_size)]
+
+
+def run_all_simulations(strategies, num_rounds, num_runs, workers=None, run_seed=None, instrumentation=None,
+                        checkpoint=None, outcomes=None, status=None, cache=None,
+                        random_seed=None) -> {Strategy: SimulationResult}:
+    """
+    Runs run_simulation_multi_round for every strategy
+    :param workers: if None, strategies are simulated one after another from the global random state. Otherwise the
+    strategy x run work is split into seeded chunks which are simulated on a pool of this many worker processes
+    (in this process when workers is 1). The result for a given run_seed is the same for any number of workers.
+    :param run_seed: seed for the chunked mode; drawn from the global random state if not given
+    :param instrumentation: optional Instrumentation timing each phase of every round (only without workers)
+    :param checkpoint: optional Checkpoint. Partial results and the random state are saved to it as the simulation
+    goes, and a simulation started with a checkpoint from an interrupted one resumes where it was saved and gives
+    bit-identical results
+    :param outcomes: optional OutcomeStore. The total winnings of every run and, if it keeps rounds, the winnings of
+    every round are written to it in the order they were simulated, replacing what it held for these strategies
+    :param status: optional status.SimulationStatus. Runs done, rounds per second and the interim mean and confidence
+    interval of every strategy are published to it whenever it is due, and once a strategy is done
+    :param cache: optional results_cache.ResultsCache (only with workers, and not with outcomes). Chunks it holds for
+    the same strategy definitions, rules and run_seed are reused instead of simulated, and the chunks simulated are
+    added to it
+    :param random_seed: the seed the global random state was seeded with, if known. It is saved with the checkpoint,
+    which is then only resumed by a simulation with the same random_seed
+    """
+    if workers is None:
+        if cache is not None:
+            raise ValueError("The results cache is only supported with workers")
+        return run_sequential_simulations(strategies, num_rounds, num_runs, instrumentation, checkpoint, outcomes,
+                                          status, random_seed)
+    if instrumentation is not None:
+        raise ValueError("Instrumentation is only supported without workers")
+    return run_chunked_simulations(strategies, num_rounds, num_runs, workers, run_seed, checkpoint, outcomes, status,
+                                   cache, random_seed)
+
+
+def simulation_settings(strategies, random_seed, **settings) -> dict:
+    """
+    :return: settings identifying a simulation in its checkpoint: the given ones, the seed of the global random state
+    and the names and fingerprints (see results_cache.strategy_fingerprint) of the strategies
+    """
+    return {**settings, "strategies": [strategy.name for strategy in strategies], "random_seed": random_seed,
+            "fingerprints": [strategy_fingerprint(strategy) for strategy in strategies]}
+
+
+def same_settings(saved: dict, settings: dict) -> bool:
+    """
+    :return: whether saved and settings are those of the same simulation. A strategy without a fingerprint (one that
+    can't be fingerprinted, like a closure over mutable state) is matched by its name only.
+    """
+    saved_fingerprints = saved.get("fingerprints", [])
+    fingerprints = settings["fingerprints"]
+    return ({**saved, "fingerprints": None} == {**settings, "fingerprints": None}
+            and len(saved_fingerprints) == len(fingerprints)
+            and all(None in pair or pair[0] == pair[1] for pair in zip(saved_fingerprints, fingerprints)))
+
+
+def resume_state(checkpoint, settings: dict) -> Optional[dict]:
+    """
+    :return: the state saved in checkpoint, if there is a checkpoint and it was saved by a simulation with settings
+    """
+    state = checkpoint.load() if checkpoint is not None else None
+    if state is not None and not same_settings(state["settings"], settings):
+        raise ValueError(f"Checkpoint {checkpoint.path} was saved by a different simulation: {state['settings']}")
+    return state
+
+
+def outcome_settings(outcomes) -> Optional[tuple]:
+    return None if outcomes is None else (os.path.abspath(outcomes.directory), outcomes.keep_rounds)
+
+
+def run_sequential_simulations(strategies, num_rounds, num_runs, instrumentation=None, checkpoint=None,
+                               outcomes=None, status=None, random_seed=None) -> {Strategy: SimulationResult}:
+    from progressbar import progressbar
+
+    settings = simulation_settings(strategies, random_seed, mode="sequential", num_rounds=num_rounds,
+                                   num_runs=num_runs, outcomes=outcome_settings(outcomes))
+    state = resume_state(checkpoint, settings)
+    if state is None:
+        state = {"settings": settings, "results": {}, "runs_done": {}, "outcome_records": {}}
+    else:
+        setstate(state["random_state"])
+    writers = outcomes.writers(settings["strategies"], state["outcome_records"]) if outcomes is not None else {}
+
+    def save():
+        state["outcome_records"] = flush_writers(writers)
+        checkpoint.save({**state, "random_state": getstate()})
+
+    results, runs_done = state["results"], state["runs_done"]
+    try:
+        for strategy in strategies:
+            simulation_result = results.setdefault(strategy.name, SimulationResult())
+            run_writer, round_writer = writers.get((strategy.name, RUNS)), writers.get((strategy.name, ROUNDS))
+            if status is not None:
+                status.begin(strategy.name, num_runs, runs_done.get(strategy.name, 0))
+            for i in progressbar(range(runs_done.get(strategy.name, 0), num_runs)):
+                individual_performance = run_simulation(strategy, num_rounds, keep_histogram=False,
+                                                        instrumentation=instrumentation, round_outcomes=round_writer)
+                simulation_result.add(individual_performance.total_winnings())
+                if run_writer is not None:
+                    run_writer.append(individual_performance.total_winnings())
+                runs_done[strategy.name] = i + 1
+                if checkpoint is not None and checkpoint.due():
+                    save()
+                if status is not None and status.due():
+                    status.publish(strategy.name, simulation_result, num_rounds)
+            if status is not None:
+                status.publish(strategy.name, simulation_result, num_rounds, done=True)
+        if checkpoint is not None:
+            save()
+    finally:
+        close_writers(writers)
+    return {strategy: results[strategy.name] for strategy in strategies}
+
+
+def run_chunked_simulations(strategies, num_rounds, num_runs, workers, run_seed=None, checkpoint=None,
+                            outcomes=None, status=None, cache=None, random_seed=None) -> {Strategy: SimulationResult}:
+    from progressbar import progressbar
+
+    if cache is not None and outcomes is not None:
+        raise ValueError("The results cache can't be combined with outcomes")
+
+    settings = simulation_settings(strategies, random_seed, mode="chunked", num_rounds=num_rounds, num_runs=num_runs,
+                                   chunk_size=chunk_size, run_seed=run_seed, outcomes=outcome_settings(outcomes))
+    state = resume_state(checkpoint, settings)
+    if state is None:
+        state = {"settings": settings, "run_seed": getrandbits(64) if run_seed is None else run_seed,
+                 "chunk_results": {}, "outcome_records": {}, "unwritten_outcomes": {}, "chunks_written": 0}
+    writers = outcomes.writers(settings["strategies"], state["outcome_records"]) if outcomes is not None else {}
+
+    chunks = [chunk for strategy in strategies
+              for chunk in simulation_chunks(strategy, num_rounds, num_runs, state["run_seed"])]
+    chunk_results, unwritten_outcomes = state["chunk_results"], state["unwritten_outcomes"]
+    if cache is not None:
+        for index, chunk_result in cache.lookup(chunks, state["run_seed"]).items():
+            chunk_results.setdefault(index, chunk_result)
+    pending = [index for index in range(len(chunks)) if index not in chunk_results]
+    run_chunk = run_simulation_chunk if outcomes is None else partial(run_outcome_chunk,
+                                                                      keep_rounds=outcomes.keep_rounds)
+
+    def save():
+        state["outcome_records"] = flush_writers(writers)
+        checkpoint.save(state)
+
+    # interim results for the status, merged in the order chunks finish
+    interim = {strategy.name: SimulationResult() for strategy in strategies}
+    chunks_left = {strategy.name: 0 for strategy in strategies}
+    if status is not None:
+        for index, (strategy, *_) in enumerate(chunks):
+            if index in chunk_results:
+                interim[strategy.name] += chunk_results[index]
+            else:
+                chunks_left[strategy.name] += 1
+        for name, result in interim.items():
+            status.begin(name, num_runs, result.total_games())
+
+    def publish(index, chunk_result):
+        name = chunks[index][0].name
+        interim[name] += chunk_result
+        chunks_left[name] -= 1
+        if status.due():
+            for name, result in interim.items():
+                status.publish(name, result, num_rounds, done=chunks_left[name] == 0)
+
+    def record(index, chunk_result):
+        if outcomes is not None:
+            chunk_result, run_outcomes, round_outcomes = chunk_result
+            unwritten_outcomes[index] = run_outcomes, round_outcomes
+            # outcomes are written in chunk order, as soon as the outcomes of every chunk before them are written
+            while state["chunks_written"] in unwritten_outcomes:
+                name = chunks[state["chunks_written"]][0].name
+                run_outcomes, round_outcomes = unwritten_outcomes.pop(state["chunks_written"])
+                writers[name, RUNS].extend(run_outcomes)
+                if round_outcomes is not None:
+                    writers[name, ROUNDS].extend(round_outcomes)
+                state["chunks_written"] += 1
+        chunk_results[index] = chunk_result
+        if status is not None:
+            publish(index, chunk_result)
+        if checkpoint is not None and checkpoint.due():
+            save()
+
+    try:
+        if workers == 1:
+            for index in progressbar(pending):
+                record(index, run_chunk(*chunks[index]))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(run_chunk, *chunks[index]): index for index in pending}
+                for future in progressbar(as_completed(futures), max_value=len(futures)):
+                    record(futures[future], future.result())
+        if checkpoint is not None:
+            save()
+        if cache is not None:
+            cache.store(chunks, state["run_seed"], chunk_results)
+        if status is not None:
+            for name, result in interim.items():
+                status.publish(name, result, num_rounds, done=True)
+    finally:
+        close_writers(writers)
+
+    # merged in chunk order, so the result doesn't depend on the order chunks finished in
+    results = {strategy: SimulationResult() for strategy in strategies}
+    for index, (strategy, *_) in enumerate(chunks):
+        results[strategy] += chunk_results[index]
+    return results
+
+
+class SharedShoes:
+    """
+    The shuffled shoes of one run, generated as they are first needed and shared by every strategy that plays the
+    run, so strategies are compared on the same cards (common random numbers)
+    """
+
+    def __init__(self, shoe_seed=None, penetration=penetration, stream: Optional[ShoeStream] = None):
+        """
+        :param stream: ShoeStream to take the shoes from, instead of shuffling them with random.Random(shoe_seed)
+        """
+        self.next_shoe = stream.next_shoe if stream is not None else partial(new_shoe, penetration, Random(shoe_seed))
+        self.shoes = []
+
+    def __getitem__(self, index) -> Shoe:
+        while len(self.shoes) <= index:
+            self.shoes.append(self.next_shoe())
+        return self.shoes[index]
+
+
+class PairedSimulationResult(NamedTuple):
+    """
+    Results of strategies that played the same shoes in every run, and for every strategy other than baseline the
+    SimulationResult of the per-run difference between its total winnings and baseline's
+    """
+    baseline: Strategy
+    results: dict
+    differences: dict
+
+
+def run_paired_chunk(strategies, baseline, num_rounds, start, num_runs, run_seed) -> tuple:
+    """
+    Simulates runs start to start + num_runs of a paired simulation. The shoes of each run come from the random stream
+    of run_seed and the run's index, so they don't depend on how runs are split into chunks. Every strategy makes its
+    own random choices from a stream of its own.
+    :return: (results, differences), both keyed by strategy name
+    """
+    seed(python_seed(seed_sequence(run_seed, "paired", start)))
+    results = {strategy.name: SimulationResult() for strategy in strategies}
+    differences = {strategy.name: SimulationResult() for strategy in strategies if strategy != baseline}
+    strategies = [with_rng(strategy, Random(python_seed(seed_sequence(run_seed, "paired", start, strategy.name))))
+                  for strategy in strategies]
+    for run in range(start, start + num_runs):
+        shoes = SharedShoes(stream=ShoeStream(rng_stream(run_seed, "shoes", run), penetration, num_decks,
+                                              batch_size=4))
+        winnings = {strategy.name: run_simulation(strategy, num_rounds, keep_histogram=False,
+                                                  shoes=shoes).total_winnings()
+                    for strategy in strategies}
+        for name, strategy_winnings in winnings.items():
+            results[name].add(strategy_winnings)
+            if name in differences:
+                differences[name].add(strategy_winnings - winnings[baseline.name])
+    return results, differences
+
+
+def run_paired_simulations(strategies, num_rounds, num_runs, baseline=None, workers=None,
+                           run_seed=None, status=None) -> PairedSimulationResult:
+    """
+    Simulates num_runs runs of num_rounds rounds for every strategy, where every strategy plays the same shoes in a
+    given run, and compares each strategy to baseline (the first strategy by default) run by run
+    :param workers: if more than 1, chunks of runs are simulated on a pool of this many worker processes. The result
+    for a given run_seed is the same for any number of workers.
+    :param run_seed: seed of the shoes and of the strategies' own random choices; drawn from the global random state
+    if not given
+    :param status: optional status.SimulationStatus to publish progress and interim statistics to
+    """
+    from progressbar import progressbar
+
+    baseline = strategies[0] if baseline is None else baseline
+    if baseline not in strategies:
+        raise ValueError(f"Baseline {baseline.name} is not one of the strategies simulated")
+    if run_seed is None:
+        run_seed = getrandbits(64)
+    chunks = [(strategies, baseline, num_rounds, start, min(chunk_size, num_runs - start), run_seed)
+              for start in range(0, num_runs, chunk_size)]
+
+    results = {strategy.name: SimulationResult() for strategy in strategies}
+    differences = {strategy.name: SimulationResult() for strategy in strategies if strategy != baseline}
+
+    def merge(chunk_results):
+        if status is not None:
+            for name in results:
+                status.begin(name, num_runs)
+        for chunk_result, chunk_differences in progressbar(chunk_results, max_value=len(chunks)):
+            for name, result in chunk_result.items():
+                results[name] += result
+            for name, difference in chunk_differences.items():
+                differences[name] += difference
+            if status is not None and status.due():
+                for name, result in results.items():
+                    status.publish(name, result, num_rounds)
+        if status is not None:
+            for name, result in results.items():
+                status.publish(name, result, num_rounds, done=True)
+
+    if workers is None or workers == 1:
+        merge(run_paired_chunk(*chunk) for chunk in chunks)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            merge(executor.map(run_paired_chunk, *zip(*chunks)))
+    return PairedSimulationResult(baseline, {strategy: results[strategy.name] for strategy in strategies},
+                                  {strategy: differences[strategy.name] for strategy in strategies
+                                   if strategy != baseline})
+
+
 def print_simulation_result(simulation, strategy):
     print(strategy.name)
     print(simulation)
+    print(f"Runs: {simulation.total_games()}")
     # for k, v in simulation.result_counter.items():
     #     print(f"{k}, {v}")
     print(f"Sample Mean: {simulation.expected_winnings()}")
@@ -294,40 +1017,110 @@ num_runs = 15_000
 num_rounds = 100
 
 
-def joint_histogram(strategies: [(Strategy, SimulationResult)], num_rounds=num_rounds, num_runs=num_runs):
-    for strategy, simulation_result in strategies:
-        simulation_result.create_hist(strategy.name, strategy.color)
-    plt.legend()
-    plt.title(f"Profit/Loss for {num_rounds} Rounds Simulated {num_runs} Times")
-
-
-def individual_histogram(strategy, simulation_result, num_rounds=num_rounds, num_runs=num_runs):
-    mean = simulation_result.expected_winnings()
-    simulation_result.create_hist(strategy.name, strategy.color)
-    plt.axvline(mean, linewidth=2, linestyle="--", color="black")
-    plt.legend()
-    plt.title(f"Profit/Loss for {num_rounds} Rounds Simulated {num_runs} Times")
+def adaptive_chunk_results(chunks, executor=None, workers=1):
+    """
+    Yields the results of chunks in order, keeping up to workers chunks running ahead on executor (if given).
+    Chunks still running when the generator is closed are cancelled.
+    """
+    if executor is None:
+        for chunk in chunks:
+            yield run_simulation_chunk(*chunk)
+        return
+    chunks = iter(chunks)
+    futures = deque(executor.submit(run_simulation_chunk, *chunk) for chunk in islice(chunks, workers))
+    try:
+        while futures:
+            chunk_result = futures.popleft().result()
+            for chunk in islice(chunks, 1):
+                futures.append(executor.submit(run_simulation_chunk, *chunk))
+            yield chunk_result
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def run_adaptive_simulation(strategy, num_rounds, target_half_width, max_runs=num_runs, max_seconds=None,
+                            run_seed=None, executor=None, workers=1, status=None) -> SimulationResult:
+    """
+    Simulates runs of num_rounds rounds, chunk_size runs at a time, until the half-width of the 95% confidence interval
+    of the expected winnings is at most target_half_width, or max_runs runs were simulated, or max_seconds passed.
+    Chunks are seeded and merged in order as in run_all_simulations, so the runs that were simulated (and, unless the
+    time ran out, when the simulation stopped) are the same for any number of workers.
+    :param status: optional status.SimulationStatus to publish progress and interim statistics to
+    :return: result of all runs simulated; its total_games is the number of runs it took
+    """
+    if run_seed is None:
+        run_seed = getrandbits(64)
+    deadline = None if max_seconds is None else perf_counter() + max_seconds
+    simulation_result = SimulationResult()
+    chunk_results = adaptive_chunk_results(simulation_chunks(strategy, num_rounds, max_runs, run_seed), executor,
+                                           workers)
+    if status is not None:
+        status.begin(strategy.name, max_runs)
+    for chunk_result in chunk_results:
+        simulation_result += chunk_result
+        if status is not None and status.due():
+            status.publish(strategy.name, simulation_result, num_rounds)
+        if simulation_result.count > 1 and simulation_result.confidence_interval_half_width() <= target_half_width:
+            break
+        if deadline is not None and perf_counter() >= deadline:
+            break
+    chunk_results.close()
+    if status is not None:
+        status.publish(strategy.name, simulation_result, num_rounds, done=True)
+    return simulation_result
 
 
-def output_simulation_results(results: {Strategy: SimulationResult}):
-    with open("results.csv", "w", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=["Name", "Sample Mean",
-                                               "Sample Variance",
-                                               "Sample Standard Deviation",
-                                               "95% Confidence Interval",
-                                               "% of Games Profitable (winnings >=0)",
-                                               "Range of Winnings"])
+def run_adaptive_simulations(strategies, num_rounds, target_half_width, max_runs=num_runs, max_seconds=None,
+                             workers=None, run_seed=None, status=None) -> {Strategy: SimulationResult}:
+    """
+    Runs run_adaptive_simulation for every strategy, on a pool of workers processes if workers is more than 1.
+    max_seconds is the time budget of each strategy.
+    """
+    if run_seed is None:
+        run_seed = getrandbits(64)
+    if workers is None or workers == 1:
+        return {strategy: run_adaptive_simulation(strategy, num_rounds, target_half_width, max_runs, max_seconds,
+                                                  run_seed, status=status)
+                for strategy in strategies}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return {strategy: run_adaptive_simulation(strategy, num_rounds, target_half_width, max_runs, max_seconds,
+                                                  run_seed, executor, workers, status)
+                for strategy in strategies}
+
+
+def output_simulation_results(results: {Strategy: SimulationResult}, path="results.csv",
+                              differences: {Strategy: SimulationResult} = None):
+    """
+    :param differences: optional paired differences to a baseline strategy (see run_paired_simulations), written as
+    two more columns
+    """
+    fieldnames = ["Name", "Runs", "Sample Mean",
+                  "Sample Variance",
+                  "Sample Standard Deviation",
+                  "95% Confidence Interval",
+                  "% of Games Profitable (winnings >=0)",
+                  "Range of Winnings"]
+    if differences is not None:
+        fieldnames += ["Paired Mean Difference", "Paired Difference 95% Confidence Interval"]
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
         writer.writeheader()
         for strategy, result in results.items():
             strategy: Strategy = strategy
             result: SimulationResult = result
-            writer.writerow({"Name": strategy.name,
-                             "Sample Mean": result.expected_winnings(),
-                             "Sample Variance": result.sample_variance_winnings(),
-                             "Sample Standard Deviation": result.sample_std_deviation(),
-                             "95% Confidence Interval": result.confidence_interval_winnings(),
-                             "% of Games Profitable (winnings >=0)": result.percentage_games_profitable(),
-                             "Range of Winnings": result.range()})
+            row = {"Name": strategy.name,
+                   "Runs": result.total_games(),
+                   "Sample Mean": result.expected_winnings(),
+                   "Sample Variance": result.sample_variance_winnings(),
+                   "Sample Standard Deviation": result.sample_std_deviation(),
+                   "95% Confidence Interval": result.confidence_interval_winnings(),
+                   "% of Games Profitable (winnings >=0)": result.percentage_games_profitable(),
+                   "Range of Winnings": result.range()}
+            if differences is not None and strategy in differences:
+                row["Paired Mean Difference"] = differences[strategy].expected_winnings()
+                row["Paired Difference 95% Confidence Interval"] = differences[strategy].confidence_interval_winnings()
+            writer.writerow(row)
 
 
 joint_strategies = [play_known_strategy,
@@ -337,21 +1130,175 @@ individual_strategies = [choose_random_strategy,
                          hit_under_seventeen,
                          always_split_when_possible]
 
-mpl.rc("font", size=12)
-plt.figure(1, dpi=200)
-
 all_strategies = [choose_random_strategy, always_stand_strategy, hit_under_seventeen, always_double_down,
                   always_split_when_possible, play_known_strategy]
-
-simulation_results = {strategy: run_simulation_multi_round(strategy, num_rounds, num_runs) for strategy in
-                      all_strategies}
-
-output_simulation_results(simulation_results)
-
-joint_histogram([(strategy, simulation_results[strategy]) for strategy in joint_strategies])
-plt.savefig("joint_histogram.png")
-
-for i, strategy in enumerate(all_strategies):
-    plt.figure(i + 2, dpi=200)
-    individual_histogram(strategy, simulation_results[strategy])
-    plt.savefig(f"{strategy.name}.png")
+# strategies that size their bets from the count, only simulated when named with --strategies or --seats
+counting_strategies = [hi_lo_bet_spread]
+
+
+def stored_results(results: {Strategy: SimulationResult}, num_rounds=num_rounds, num_runs=None, num_bins=NUM_BINS,
+                   joint=None) -> StoredResults:
+    """
+    :param num_runs: number of runs of every strategy (default: the runs of the results if they all have the same
+    number, None otherwise, as strategies simulated until a target confidence interval do)
+    :param joint: names of the strategies to draw on the joint histogram (default: the joint_strategies simulated)
+    :return: the summary and binned histogram of every result, which plots.render_results draws the histograms from
+    """
+    if joint is None:
+        joint = [strategy.name for strategy in joint_strategies if strategy in results]
+    if num_runs is None:
+        run_counts = {result.total_games() for result in results.values()}
+        num_runs = run_counts.pop() if len(run_counts) == 1 else None
+    return StoredResults(num_rounds, num_runs,
+                         [StoredResult(strategy.name, strategy.color, result.summary(),
+                                       None if result.result_counter is None else result.histogram(num_bins))
+                          for strategy, result in results.items()], joint)
+
+
+def save_histograms(results: {Strategy: SimulationResult}, num_rounds=num_rounds, num_runs=None, directory=".",
+                    workers=None):
+    """
+    Saves a joint histogram of the joint_strategies that were simulated and one histogram per strategy as PNGs
+    """
+    render_results(stored_results(results, num_rounds, num_runs), directory, workers)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate blackjack strategies and report their winnings.")
+    named_strategies = {strategy.name: strategy for strategy in all_strategies + counting_strategies}
+    parser.add_argument("--strategies", nargs="+", metavar="NAME", choices=list(named_strategies),
+                        default=[strategy.name for strategy in all_strategies],
+                        help="names of the strategies to simulate (default: all of them except the ones that count "
+                             "cards to size their bets, like Hi-Lo Bet Spread)")
+    parser.add_argument("--runs", type=int, default=num_runs, help="number of runs per strategy")
+    parser.add_argument("--rounds", type=int, default=num_rounds, help="number of rounds per run")
+    parser.add_argument("--seed", type=int, default=5, help="random seed")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of worker processes; results for a seed are the same for any number of workers")
+    parser.add_argument("--output", default="results.csv", help="path of the summary statistics CSV")
+    parser.add_argument("--results-file", default=None,
+                        help="path to save the summary and binned histogram of every strategy to, which plots.py "
+                             "renders the histograms from (default: --output with a .json extension)")
+    parser.add_argument("--plot-dir", default=".", help="directory to save histograms in")
+    parser.add_argument("--plot-workers", type=int, default=None, help="number of processes rendering histograms")
+    parser.add_argument("--no-plots", action="store_true", help="don't save histograms")
+    parser.add_argument("--instrument", action="store_true",
+                        help="time each phase of the round loop and print a report at the end (not with --workers). "
+                             "The phases are those of the reference engine in blackjack.py, which is slower than "
+                             "the fast engine that simulations use otherwise")
+    parser.add_argument("--checkpoint", default=None, metavar="PATH",
+                        help="periodically save progress here, and resume from it if it exists")
+    parser.add_argument("--checkpoint-every", type=float, default=60, metavar="SECONDS",
+                        help="seconds between checkpoints")
+    parser.add_argument("--cache", default=None, metavar="DIRECTORY",
+                        help="with --workers, reuse the results of strategies simulated before with the same "
+                             "definition, rules, seed and rounds from this directory, simulating only the runs it "
+                             "doesn't hold yet (so raising --runs extends a cached result), and add new ones to it")
+    parser.add_argument("--cache-size", type=float, default=DEFAULT_MAX_BYTES / 2 ** 20, metavar="MB",
+                        help="evict the least recently used results once the cache is larger than this")
+    parser.add_argument("--outcomes", default=None, metavar="DIRECTORY",
+                        help="write the total winnings of every run to binary files in this directory")
+    parser.add_argument("--keep-rounds", action="store_true",
+                        help="with --outcomes, also write the winnings of every round")
+    parser.add_argument("--target-half-width", type=float, default=None, metavar="WINNINGS",
+                        help="simulate each strategy until the 95%% confidence interval of its expected winnings is "
+                             "at most this wide on either side, or --runs runs or --max-seconds have been used")
+    parser.add_argument("--max-seconds", type=float, default=None,
+                        help="with --target-half-width, the time budget of each strategy")
+    parser.add_argument("--paired", action="store_true",
+                        help="play every strategy on the same shoes in each run and report each strategy's mean "
+                             "difference in winnings to --baseline")
+    parser.add_argument("--baseline", default=None, metavar="NAME",
+                        help="with --paired, the strategy to compare to (default: the first one simulated)")
+    parser.add_argument("--seats", nargs="+", metavar="NAME", choices=list(named_strategies),
+                        help=f"instead of simulating strategies one by one, seat up to {MAX_SEATS} betting boxes at "
+                             f"one table playing these strategies in seat order")
+    parser.add_argument("--status-port", type=int, default=None, metavar="PORT",
+                        help="serve the progress and interim statistics of every strategy as JSON over HTTP on this "
+                             "local port (0 picks a free one)")
+    parser.add_argument("--status-socket", default=None, metavar="PATH",
+                        help="serve the same JSON status over HTTP on this Unix socket")
+    parser.add_argument("--status-interval", type=float, default=1.0, metavar="SECONDS",
+                        help="seconds between updates of the status")
+    args = parser.parse_args(argv)
+    if args.instrument and args.workers is not None:
+        parser.error("--instrument can't be combined with --workers")
+    if args.target_half_width is not None and (args.instrument or args.checkpoint or args.outcomes):
+        parser.error("--target-half-width can't be combined with --instrument, --checkpoint or --outcomes")
+    if args.max_seconds is not None and args.target_half_width is None:
+        parser.error("--max-seconds requires --target-half-width")
+    if args.paired and (args.instrument or args.checkpoint or args.outcomes or args.target_half_width is not None):
+        parser.error("--paired can't be combined with --instrument, --checkpoint, --outcomes or --target-half-width")
+    if args.baseline is not None and (not args.paired or args.baseline not in args.strategies):
+        parser.error("--baseline requires --paired and must be one of the strategies simulated")
+    if args.seats and (args.workers is not None or args.checkpoint or args.outcomes or args.paired
+                       or args.target_half_width is not None):
+        parser.error("--seats can't be combined with --workers, --checkpoint, --outcomes, --paired or "
+                     "--target-half-width")
+    if args.seats and len(args.seats) > MAX_SEATS:
+        parser.error(f"--seats takes at most {MAX_SEATS} strategies")
+    if args.cache and (args.workers is None or args.outcomes or args.paired or args.target_half_width is not None):
+        parser.error("--cache requires --workers and can't be combined with --outcomes, --paired or "
+                     "--target-half-width")
+    if args.status_port is not None and args.status_socket is not None:
+        parser.error("--status-port can't be combined with --status-socket")
+    if args.seats and (args.status_port is not None or args.status_socket is not None):
+        parser.error("--seats can't be combined with --status-port or --status-socket")
+
+    seed(args.seed)
+    strategies = [strategy for strategy in all_strategies + counting_strategies if strategy.name in args.strategies]
+    phase_timer = PhaseTimer() if args.instrument else None
+    instrumentation = Instrumentation(phase_timer) if args.instrument else None
+    checkpoint = Checkpoint(args.checkpoint, args.checkpoint_every) if args.checkpoint else None
+    outcomes = OutcomeStore(args.outcomes, args.keep_rounds) if args.outcomes else None
+    cache = ResultsCache(args.cache, int(args.cache_size * 2 ** 20)) if args.cache else None
+    status = None
+    server = nullcontext()
+    if args.status_port is not None or args.status_socket is not None:
+        status = SimulationStatus(args.status_interval)
+        server = StatusServer(status, port=args.status_port or 0, unix_path=args.status_socket)
+    with server:
+        if status is not None:
+            print(f"Serving status on {server.address()}")
+        differences = None
+        if args.paired:
+            baseline = next((strategy for strategy in strategies if strategy.name == args.baseline), None)
+            paired = run_paired_simulations(strategies, args.rounds, args.runs, baseline, args.workers, status=status)
+            simulation_results, differences = paired.results, paired.differences
+            for strategy, difference in differences.items():
+                print(f"{strategy.name} - {paired.baseline.name}: mean difference "
+                      f"{difference.expected_winnings():.3f}, 95% confidence interval "
+                      f"{difference.confidence_interval_winnings()}")
+        elif args.seats:
+            seated = [named_strategies[name] for name in args.seats]
+            seat_results = run_table_simulation_multi_round(seated, args.rounds, args.runs, instrumentation)
+            simulation_results = {strategy._replace(name=f"Seat {seat} - {strategy.name}"): seat_result
+                                  for seat, (strategy, seat_result) in enumerate(zip(seated, seat_results), 1)}
+        elif args.target_half_width is None:
+            simulation_results = run_all_simulations(strategies, args.rounds, args.runs, workers=args.workers,
+                                                     instrumentation=instrumentation, checkpoint=checkpoint,
+                                                     outcomes=outcomes, status=status, cache=cache,
+                                                     random_seed=args.seed)
+        else:
+            simulation_results = run_adaptive_simulations(strategies, args.rounds, args.target_half_width, args.runs,
+                                                          args.max_seconds, args.workers, status=status)
+            for strategy, simulation_result in simulation_results.items():
+                print(f"{strategy.name}: {simulation_result.total_games()} runs, 95% confidence interval half-width "
+                      f"{simulation_result.confidence_interval_half_width():.3f}")
+    if phase_timer is not None:
+        print(phase_timer.report())
+
+    output_simulation_results(simulation_results, args.output, differences)
+    # seats are renamed, so none of them is one of the joint_strategies: their joint histogram holds every seat
+    joint = [strategy.name for strategy in simulation_results] if args.seats else None
+    stored = stored_results(simulation_results, args.rounds, joint=joint)
+    save_results(stored, args.results_file or f"{os.path.splitext(args.output)[0]}.json")
+    if not args.no_plots:
+        render_results(stored, args.plot_dir, args.plot_workers)
+    if checkpoint is not None:
+        checkpoint.clear()
+    return simulation_results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from collections import Counter
+from random import seed
+
+from plots import load_results
+from simulation import run_all_simulations, run_simulation_multi_round, always_stand_strategy, \
+    choose_random_strategy, run_simulation, new_shoe, SimulationResult, main, run_adaptive_simulations, \
+    run_paired_simulations, always_hit_strategy, SharedShoes, play_table_round, run_table_simulation, \
+    run_table_simulation_multi_round, play_round, play_known_strategy
+
+
+class SimulationResultTests(unittest.TestCase):
+    def test_statistics(self):
+        result = SimulationResult(Counter({-10: 3, 0: 1, 20: 2}))
+        self.assertEqual(6, result.total_games())
+        self.assertEqual(10, result.total_winnings())
+        self.assertAlmostEqual(10 / 6, result.expected_winnings())
+        self.assertAlmostEqual((300 + 800) / 6 - (10 / 6) ** 2, result.sample_variance_winnings())
+        self.assertAlmostEqual(0.5, result.percentage_games_profitable())
+        self.assertEqual((-10, 20), result.range())
+        self.assertEqual(Counter({-10: 3, 0: 1, 20: 2}), result.result_counter)
+
+    def test_merge_matches_adding_one_by_one(self):
+        values = [5, -3, 12, 0, -40, 7, 7, 1]
+        streamed = SimulationResult()
+        for value in values:
+            streamed.add(value)
+        merged = SimulationResult(Counter(values[:3])) + SimulationResult(Counter(values[3:]))
+        self.assertEqual(streamed.total_games(), merged.total_games())
+        self.assertEqual(streamed.range(), merged.range())
+        self.assertAlmostEqual(streamed.sample_variance_winnings(), merged.sample_variance_winnings())
+        self.assertEqual(streamed.result_counter, merged.result_counter)
+
+    def test_add_does_not_modify_operands(self):
+        first, second = SimulationResult(Counter([1])), SimulationResult(Counter([2]))
+        first + second
+        self.assertEqual(1, first.total_games())
+        first += second
+        self.assertEqual(2, first.total_games())
+
+    def test_without_histogram(self):
+        result = SimulationResult(keep_histogram=False).add(4).add(-2, 3)
+        self.assertIsNone(result.result_counter)
+        self.assertEqual(4, result.total_games())
+        self.assertEqual((-2, 4), result.range())
+        self.assertIsNone((SimulationResult(Counter([1])) + result).result_counter)
+
+
+class SimulationTests(unittest.TestCase):
+    def test_new_shoe(self):
+        shoe = new_shoe(0.5)
+        self.assertEqual(312, len(shoe))
+        self.assertEqual(156, shoe.cut_card)
+
+    def test_run_simulation_reshuffles_persistent_shoe(self):
+        # 400 rounds of at least four cards each need several passes through a 312 card shoe
+        result = run_simulation(always_stand_strategy, 400, penetration=0.5)
+        self.assertEqual(400, result.total_games())
+
+
+class ParallelSimulationTests(unittest.TestCase):
+    def test_result_independent_of_workers(self):
+        strategies = [always_stand_strategy, choose_random_strategy]
+        serial = run_all_simulations(strategies, 5, 300, workers=1, run_seed=3)
+        parallel = run_all_simulations(strategies, 5, 300, workers=2, run_seed=3)
+        self.assertEqual(serial, parallel)
+        self.assertEqual(300, serial[always_stand_strategy].total_games())
+
+    def test_multi_round_workers(self):
+        result = run_simulation_multi_round(always_stand_strategy, 5, 300, workers=2, run_seed=3)
+        self.assertEqual(run_all_simulations([always_stand_strategy], 5, 300, workers=1, run_seed=3)[
+                             always_stand_strategy], result)
+
+
+class AdaptiveSimulationTests(unittest.TestCase):
+    def test_stops_at_target(self):
+        strategies = [always_stand_strategy, choose_random_strategy]
+        results = run_adaptive_simulations(strategies, 5, 3.0, max_runs=5000, run_seed=3)
+        for strategy, result in results.items():
+            self.assertLess(result.total_games(), 5000)
+            self.assertLessEqual(result.confidence_interval_half_width(), 3.0)
+            # the runs simulated are the first runs of a chunked simulation with the same seed
+            self.assertEqual(run_all_simulations([strategy], 5, result.total_games(), workers=1, run_seed=3)[strategy],
+                             result)
+        self.assertLess(results[always_stand_strategy].total_games(), results[choose_random_strategy].total_games())
+
+    def test_run_budget(self):
+        result = run_adaptive_simulations([choose_random_strategy], 5, 0.01, max_runs=600, run_seed=3)
+        self.assertEqual(600, result[choose_random_strategy].total_games())
+
+    def test_result_independent_of_workers(self):
+        self.assertEqual(run_adaptive_simulations([choose_random_strategy], 5, 3.0, run_seed=3),
+                         run_adaptive_simulations([choose_random_strategy], 5, 3.0, workers=2, run_seed=3))
+
+
+class PairedSimulationTests(unittest.TestCase):
+    def test_same_strategy_has_no_difference(self):
+        copy = always_hit_strategy._replace(name="Always Hit Again")
+        paired = run_paired_simulations([always_hit_strategy, copy], 20, 100, run_seed=3)
+        self.assertEqual(always_hit_strategy, paired.baseline)
+        self.assertEqual(paired.results[always_hit_strategy], paired.results[copy])
+        self.assertEqual((0, 0), paired.differences[copy].range())
+        self.assertNotIn(always_hit_strategy, paired.differences)
+
+    def test_differences(self):
+        paired = run_paired_simulations([always_stand_strategy, choose_random_strategy], 5, 300,
+                                        baseline=choose_random_strategy, run_seed=3)
+        self.assertEqual(paired.results[always_stand_strategy].total_winnings()
+                         - paired.results[choose_random_strategy].total_winnings(),
+                         paired.differences[always_stand_strategy].total_winnings())
+        self.assertEqual(300, paired.differences[always_stand_strategy].total_games())
+
+    def test_shared_shoes(self):
+        shoes = SharedShoes("seed")
+        self.assertIs(shoes[1], shoes[1])
+        self.assertEqual(SharedShoes("seed")[1], shoes[1])
+        self.assertNotEqual(shoes[0], shoes[1])
+
+    def test_result_independent_of_workers(self):
+        strategies = [always_stand_strategy, choose_random_strategy]
+        self.assertEqual(run_paired_simulations(strategies, 5, 300, run_seed=3),
+                         run_paired_simulations(strategies, 5, 300, workers=2, run_seed=3))
+
+    def test_baseline_must_be_simulated(self):
+        with self.assertRaises(ValueError):
+            run_paired_simulations([always_stand_strategy], 5, 10, baseline=choose_random_strategy)
+
+
+class TableSimulationTests(unittest.TestCase):
+    def test_one_seat_plays_like_play_round(self):
+        for shoe_seed in range(20):
+            seed(shoe_seed)
+            dealing_shoe = new_shoe()
+            seated = play_table_round([play_known_strategy], dealing_shoe)
+            single = play_round(play_known_strategy, dealing_shoe)
+            self.assertEqual(single.dealer, seated.dealer)
+            self.assertEqual([box.hand for box in single.betting_boxes], [box.hand for box in seated.betting_boxes])
+
+    def test_seats_share_one_dealer(self):
+        table = play_table_round([always_stand_strategy, always_hit_strategy, always_stand_strategy], new_shoe())
+        self.assertEqual(3, len({box.player for box in table.betting_boxes}))
+        always_stand_boxes = [box for box in table.betting_boxes if box.player.name != "Seat 2"]
+        # both always stand seats keep their first two cards
+        self.assertEqual([2, 2], [len(box.hand.cards) for box in always_stand_boxes])
+        self.assertGreaterEqual(len(table.dealer.hand.cards), 2)
+
+    def test_seat_results(self):
+        results = run_table_simulation([always_stand_strategy] * 7, 500, penetration=0.5)
+        self.assertEqual(7, len(results))
+        self.assertEqual([500] * 7, [result.total_games() for result in results])
+        runs = run_table_simulation_multi_round([always_stand_strategy, choose_random_strategy], 5, 20)
+        self.assertEqual([20, 20], [result.total_games() for result in runs])
+
+    def test_penetration_for_seats(self):
+        for fast in (True, False):
+            with self.assertRaises(ValueError):
+                run_table_simulation([always_hit_strategy] * 7, 3000, penetration=0.93, fast=fast)
+            results = run_table_simulation([always_hit_strategy] * 7, 3000, penetration=0.75, fast=fast)
+            self.assertEqual([3000] * 7, [result.total_games() for result in results])
+
+    def test_seat_limit(self):
+        with self.assertRaises(ValueError):
+            run_table_simulation([always_stand_strategy] * 8, 1)
+
+
+class CommandLineTests(unittest.TestCase):
+    def test_import_has_no_side_effects(self):
+        script = "import sys, simulation; print('matplotlib' in sys.modules, 'progressbar' in sys.modules)"
+        output = subprocess.run([sys.executable, "-c", script], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True).stdout
+        self.assertEqual("False False", output.strip())
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "results.csv")
+            results = main(["--strategies", "Always Stand", "Known Strategy", "--runs", "20", "--rounds", "5",
+                            "--output", output, "--plot-dir", directory])
+            self.assertEqual({"Always Stand", "Known Strategy"}, {strategy.name for strategy in results})
+            with open(output) as f:
+                self.assertEqual(3, len(f.readlines()))
+            self.assertTrue(os.path.exists(os.path.join(directory, "joint_histogram.png")))
+            self.assertTrue(os.path.exists(os.path.join(directory, "Always Stand.png")))
+
+    def test_main_adaptive(self):
+        with tempfile.TemporaryDirectory() as directory:
+            results = main(["--strategies", "Always Stand", "--runs", "5000", "--rounds", "5", "--target-half-width",
+                            "3", "--no-plots", "--output", os.path.join(directory, "results.csv")])
+            self.assertEqual(250, sum(result.total_games() for result in results.values()))
+            self.assertEqual(250, load_results(os.path.join(directory, "results.json")).num_runs)
+
+    def test_main_paired(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "results.csv")
+            main(["--strategies", "Always Stand", "Hit Under 17", "--runs", "20", "--rounds", "5", "--paired",
+                  "--baseline", "Hit Under 17", "--no-plots", "--output", output])
+            with open(output) as f:
+                self.assertIn("Paired Mean Difference", f.readline())
+
+    def test_main_seats(self):
+        with tempfile.TemporaryDirectory() as directory:
+            results = main(["--seats", "Always Stand", "Always Stand", "Known Strategy", "--runs", "10", "--rounds",
+                            "5", "--no-plots", "--output", os.path.join(directory, "results.csv")])
+            self.assertEqual(["Seat 1 - Always Stand", "Seat 2 - Always Stand", "Seat 3 - Known Strategy"],
+                             [strategy.name for strategy in results])
+            stored = load_results(os.path.join(directory, "results.json"))
+            self.assertEqual([strategy.name for strategy in results], stored.joint)
+
+    def test_main_status(self):
+        with tempfile.TemporaryDirectory() as directory:
+            arguments = ["--strategies", "Always Stand", "--runs", "10", "--rounds", "5", "--no-plots", "--output",
+                         os.path.join(directory, "results.csv")]
+            self.assertEqual(main(arguments), main(arguments + ["--status-port", "0"]))
+            with self.assertRaises(SystemExit):
+                main(arguments + ["--status-port", "0", "--status-socket", os.path.join(directory, "status.sock")])
+
+    def test_main_is_reproducible(self):
+        with tempfile.TemporaryDirectory() as directory:
+            arguments = ["--strategies", "Random Action", "--runs", "10", "--rounds", "5", "--no-plots", "--output",
+                         os.path.join(directory, "results.csv")]
+            self.assertEqual(list(main(arguments).values()), list(main(arguments).values()))
+
+
+if __name__ == '__main__':
+    unittest.main()
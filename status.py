@@ -0,0 +1,123 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+
+class SimulationStatus:
+    """
+    Progress of a running simulation, as the simulation loop last published it. The loop only calls publish when due
+    (at most once every interval seconds), which costs it a clock read per run.
+    """
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self.started = time.time()
+        self.last_published = time.monotonic()
+        self.strategies = {}  # replaced rather than updated, so readers on other threads always see a whole snapshot
+        self.started_at = {}  # name to (monotonic time, runs done) when the strategy started
+
+    def due(self) -> bool:
+        return time.monotonic() - self.last_published >= self.interval
+
+    def begin(self, name: str, num_runs: int, runs_done: int = 0):
+        """
+        Marks a strategy as started, with runs_done of its num_runs runs already done (when resuming)
+        """
+        self.started_at[name] = time.monotonic(), runs_done
+        self.strategies = {**self.strategies, name: {"runs": runs_done, "target_runs": num_runs,
+                                                      "rounds_per_second": None, "mean": None,
+                                                      "confidence_interval": None, "done": False}}
+
+    def publish(self, name: str, result, num_rounds: int, done: bool = False):
+        """
+        :param result: the strategy's SimulationResult so far
+        :param num_rounds: rounds per run
+        """
+        now = time.monotonic()
+        started, runs_before = self.started_at.get(name, (now, 0))
+        runs = result.total_games()
+        entry = dict(self.strategies.get(name, {"target_runs": None}))
+        entry.update(runs=runs, done=done,
+                     rounds_per_second=(runs - runs_before) * num_rounds / (now - started) if now > started else None)
+        if result.count > 1:
+            entry.update(mean=result.expected_winnings(),
+                         confidence_interval=list(result.confidence_interval_winnings()))
+        self.strategies = {**self.strategies, name: entry}
+        self.last_published = now
+
+    def snapshot(self) -> dict:
+        return {"pid": os.getpid(), "started": self.started, "elapsed_seconds": time.time() - self.started,
+                "strategies": self.strategies}
+
+
+class StatusServer:
+    """
+    Serves a SimulationStatus as JSON to HTTP GET requests for /, on a local TCP port or a Unix socket, from an
+    asyncio event loop on a background thread so the simulation loop never waits on a client
+    """
+
+    def __init__(self, status: SimulationStatus, host="127.0.0.1", port: int = 0, unix_path: Optional[str] = None):
+        self.status = status
+        self.host = host
+        self.port = port
+        self.unix_path = unix_path
+        self.loop = None
+        self.server = None
+        self.thread = None
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await reader.readuntil(b"\r\n\r\n")
+            method, path, *_ = request.decode("latin-1").split(" ", 2)
+            if method != "GET":
+                status_line, body = "405 Method Not Allowed", {"error": "only GET is supported"}
+            elif path.split("?")[0] != "/":
+                status_line, body = "404 Not Found", {"error": f"no such path {path}"}
+            else:
+                status_line, body = "200 OK", self.status.snapshot()
+            content = json.dumps(body).encode()
+            writer.write(f"HTTP/1.1 {status_line}\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(content)}\r\nConnection: close\r\n\r\n".encode() + content)
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self):
+        if self.unix_path is not None:
+            self.server = await asyncio.start_unix_server(self.handle, self.unix_path)
+        else:
+            self.server = await asyncio.start_server(self.handle, self.host, self.port)
+            self.port = self.server.sockets[0].getsockname()[1]
+
+    def start(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="status-server", daemon=True)
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self.serve(), self.loop).result()
+        return self
+
+    def stop(self):
+        async def close():
+            self.server.close()
+            await self.server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+        if self.unix_path is not None and os.path.exists(self.unix_path):
+            os.remove(self.unix_path)
+
+    def address(self) -> str:
+        return self.unix_path if self.unix_path is not None else f"http://{self.host}:{self.port}/"
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
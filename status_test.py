@@ -0,0 +1,100 @@
+import json
+import os
+import socket
+import tempfile
+import unittest
+import urllib.error
+import urllib.request
+from random import seed
+
+from simulation import SimulationResult, always_stand_strategy, play_known_strategy, run_adaptive_simulations, \
+    run_all_simulations
+from status import SimulationStatus, StatusServer
+
+
+def result_of(*winnings) -> SimulationResult:
+    result = SimulationResult()
+    for value in winnings:
+        result.add(value)
+    return result
+
+
+class SimulationStatusTests(unittest.TestCase):
+    def test_publish(self):
+        status = SimulationStatus(interval=60)
+        self.assertFalse(status.due())
+        status.begin("Known Strategy", 10)
+        self.assertEqual({"runs": 0, "target_runs": 10, "rounds_per_second": None, "mean": None,
+                          "confidence_interval": None, "done": False},
+                         status.snapshot()["strategies"]["Known Strategy"])
+        result = result_of(10, -20, 40)
+        status.publish("Known Strategy", result, 100, done=True)
+        entry = status.snapshot()["strategies"]["Known Strategy"]
+        self.assertEqual(3, entry["runs"])
+        self.assertEqual(10, entry["target_runs"])
+        self.assertTrue(entry["done"])
+        self.assertAlmostEqual(10, entry["mean"])
+        self.assertEqual(list(result.confidence_interval_winnings()), entry["confidence_interval"])
+        self.assertGreater(entry["rounds_per_second"], 0)
+        self.assertEqual(os.getpid(), status.snapshot()["pid"])
+
+    def test_sequential_simulation(self):
+        status = SimulationStatus(interval=0)
+        seed(1)
+        expected = run_all_simulations([always_stand_strategy, play_known_strategy], 10, 30)
+        seed(1)
+        results = run_all_simulations([always_stand_strategy, play_known_strategy], 10, 30, status=status)
+        self.assertEqual(expected, results)
+        for strategy, result in results.items():
+            entry = status.snapshot()["strategies"][strategy.name]
+            self.assertEqual((30, True), (entry["runs"], entry["done"]))
+            self.assertAlmostEqual(result.expected_winnings(), entry["mean"])
+
+    def test_chunked_and_adaptive_simulations(self):
+        status = SimulationStatus(interval=0)
+        results = run_all_simulations([play_known_strategy], 10, 300, workers=1, run_seed=2, status=status)
+        entry = status.snapshot()["strategies"][play_known_strategy.name]
+        self.assertEqual((300, True), (entry["runs"], entry["done"]))
+        self.assertAlmostEqual(results[play_known_strategy].expected_winnings(), entry["mean"])
+
+        status = SimulationStatus(interval=0)
+        results = run_adaptive_simulations([play_known_strategy], 10, 1000.0, 500, run_seed=2, status=status)
+        entry = status.snapshot()["strategies"][play_known_strategy.name]
+        self.assertEqual((results[play_known_strategy].total_games(), 500, True),
+                         (entry["runs"], entry["target_runs"], entry["done"]))
+
+
+class StatusServerTests(unittest.TestCase):
+    def test_http(self):
+        status = SimulationStatus()
+        status.publish("Known Strategy", result_of(1, 2), 100)
+        with StatusServer(status) as server:
+            with urllib.request.urlopen(server.address(), timeout=5) as response:
+                self.assertEqual("application/json", response.headers["Content-Type"])
+                body = json.load(response)
+            self.assertEqual(2, body["strategies"]["Known Strategy"]["runs"])
+            with self.assertRaises(urllib.error.HTTPError) as raised:
+                urllib.request.urlopen(server.address() + "missing", timeout=5)
+            self.assertEqual(404, raised.exception.code)
+
+    @unittest.skipUnless(hasattr(socket, "AF_UNIX"), "needs Unix sockets")
+    def test_unix_socket(self):
+        status = SimulationStatus()
+        status.begin("Known Strategy", 5)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "status.sock")
+            with StatusServer(status, unix_path=path):
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                    client.connect(path)
+                    client.sendall(b"GET / HTTP/1.1\r\nHost: localhost\r\n\r\n")
+                    response = b""
+                    while chunk := client.recv(4096):
+                        response += chunk
+            self.assertFalse(os.path.exists(path))
+        headers, body = response.split(b"\r\n\r\n", 1)
+        self.assertTrue(headers.startswith(b"HTTP/1.1 200 OK"))
+        self.assertEqual(5, json.loads(body)["strategies"]["Known Strategy"]["target_runs"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,186 @@
+import csv
+from enum import IntEnum, unique
+from functools import lru_cache
+from itertools import combinations_with_replacement
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+from blackjack import BettingBox, Dealer, Hand, Player, PlayerAction, Table, hard_value
+from cards import Card, Deck, Rank, Suit
+
+
+@unique
+class HandKind(IntEnum):
+    HARD = 0
+    SOFT = 1
+    PAIR = 2
+
+
+ACTIONS = tuple(PlayerAction)  # action codes stored in a StrategyTable index into this tuple
+HIT, STAND, DOUBLE_DOWN, SPLIT = (ACTIONS.index(action) for action in
+                                  (PlayerAction.Hit, PlayerAction.Stand, PlayerAction.DoubleDown, PlayerAction.Split))
+MAX_TOTAL = 21
+MAX_UPCARD = 11  # an ace showing counts as 11
+
+
+def kind_and_total(hard_total: int, has_ace: bool, is_pair: bool) -> tuple:
+    """
+    :param is_pair: whether the hand is two cards of the same hard value that can still be split
+    :return: (hand kind, player total) of a hand, the total as hand_key describes it
+    """
+    if is_pair:
+        return HandKind.PAIR, hard_total
+    if has_ace and hard_total <= 11:
+        return HandKind.SOFT, hard_total + 10
+    return HandKind.HARD, hard_total
+
+
+def kinds_and_totals(hard_totals: np.ndarray, has_ace: np.ndarray, is_pair: np.ndarray) -> tuple:
+    """
+    kind_and_total of many hands at once
+    :return: (hand kinds, player totals) arrays
+    """
+    soft = has_ace & (hard_totals <= 11) & ~is_pair
+    kinds = np.where(is_pair, HandKind.PAIR, np.where(soft, HandKind.SOFT, HandKind.HARD))
+    return kinds, np.where(soft, hard_totals + 10, hard_totals)
+
+
+def hand_key(betting_box: BettingBox, dealer: Dealer) -> tuple:
+    """
+    Summarises the state a table-driven strategy decides on
+    :return: (hand kind, player total, dealer upcard value, whether the player can double down). The total of a pair
+    is its hard total (so a pair of aces is 2), of a soft hand its largest total, and of a hard hand its hard total
+    """
+    hand = betting_box.hand
+    can_double = len(hand.cards) == 2 and not betting_box.split
+    # same as betting_box.can_split(), as two cards never bust
+    is_pair = can_double and hard_value(hand.cards[0]) == hard_value(hand.cards[1])
+    kind, total = kind_and_total(hand.hard_total, hand.num_aces > 0, is_pair)
+    upcard = dealer.hand.hard_total + 10 * dealer.hand.num_aces
+    return kind, total, upcard, can_double
+
+
+class StrategyTable(NamedTuple):
+    """
+    A strategy as a dense table of action codes indexed by [hand kind, player total, dealer upcard, can double down].
+    Can be used as a strategy's get_action, in which case each decision is a single indexed read.
+    """
+    actions: np.ndarray
+
+    @staticmethod
+    def filled(action: PlayerAction):
+        return StrategyTable(np.full((len(HandKind), MAX_TOTAL + 1, MAX_UPCARD + 1, 2), ACTIONS.index(action),
+                                     dtype=np.int8))
+
+    def action(self, kind: HandKind, total: int, upcard: int, can_double: bool) -> PlayerAction:
+        return ACTIONS[self.actions[kind, total, upcard, int(can_double)]]
+
+    def get_action(self, table: Table) -> PlayerAction:
+        kind, total, upcard, can_double = hand_key(table.current_player_betting_box(), table.dealer)
+        return ACTIONS[self.actions.item(kind, total, upcard, int(can_double))]
+
+
+PROBE_RANKS = [Rank.TWO, Rank.THREE, Rank.FOUR, Rank.FIVE, Rank.SIX, Rank.SEVEN, Rank.EIGHT, Rank.NINE, Rank.TEN,
+               Rank.ACE]
+PROBE_UPCARDS = {value: Card(rank, Suit.CLUB) for value, rank in zip(range(2, MAX_UPCARD + 1), PROBE_RANKS)}
+
+
+@lru_cache(maxsize=None)
+def probe_betting_boxes() -> dict:
+    """
+    Builds one representative betting box for every reachable (hand kind, total, can double down) cell, preferring
+    unsplit two card hands, then the fewest cards, and only then hands that were split
+    :return: dictionary of (hand kind, total, can double down) to BettingBox
+    """
+    candidates = [(ranks, False) for num_cards in range(2, 6)
+                  for ranks in combinations_with_replacement(PROBE_RANKS, num_cards)]
+    candidates += [(ranks, True) for ranks in combinations_with_replacement(PROBE_RANKS, 2)]
+    probes = {}
+    for ranks, is_split in candidates:
+        betting_box = BettingBox(Hand([Card(rank, Suit.HEART) for rank in ranks]), Player("Probe"), 1, is_split)
+        if betting_box.hand.is_busted() or betting_box.hand.is_blackjack():
+            continue
+        kind, total, _, can_double = hand_key(betting_box, Dealer.emptyDealer(Deck([])))
+        probes.setdefault((kind, total, can_double), betting_box)
+    return probes
+
+
+def compile_strategy(strategy) -> StrategyTable:
+    """
+    Compiles a strategy into a StrategyTable by asking it for its action in one representative position per cell.
+    Assumes the strategy's action only depends on the cell, which holds for the table-driven strategies
+    (but not, for example, for a random strategy). Unreachable cells are left as Stand.
+    """
+    return compile_action(strategy.get_action)
+
+
+def compile_action(get_action: Callable[[Table], PlayerAction]) -> StrategyTable:
+    """
+    Same as compile_strategy, for a strategy's get_action
+    """
+    compiled = StrategyTable.filled(PlayerAction.Stand)
+    for (kind, total, can_double), betting_box in probe_betting_boxes().items():
+        for upcard, upcard_card in PROBE_UPCARDS.items():
+            table = Table([betting_box], Dealer(Hand([upcard_card]), Deck([])), 0)
+            action = get_action(table)
+            if action not in ACTIONS:
+                raise Exception(f"Unknown PlayerAction: {action}")
+            compiled.actions[kind, total, upcard, int(can_double)] = ACTIONS.index(action)
+    return compiled
+
+
+ACTION_LETTERS = {PlayerAction.Hit: "H", PlayerAction.Stand: "S", PlayerAction.DoubleDown: "D",
+                  PlayerAction.Split: "P"}
+UPCARD_LABELS = {value: "A" if value == MAX_UPCARD else str(value) for value in PROBE_UPCARDS}
+
+
+def save_chart(strategy_table: StrategyTable, path):
+    """
+    Writes a strategy table as a basic strategy chart: one row per reachable (hand kind, total, can double down)
+    cell and one column per dealer upcard, holding H (hit), S (stand), D (double down) or P (split)
+    """
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["Hand", "Total", "Can Double"] + list(UPCARD_LABELS.values()))
+        writer.writeheader()
+        for kind, total, can_double in sorted(probe_betting_boxes()):
+            row = {"Hand": kind.name.lower(), "Total": total, "Can Double": "yes" if can_double else "no"}
+            for upcard, label in UPCARD_LABELS.items():
+                row[label] = ACTION_LETTERS[strategy_table.action(kind, total, upcard, can_double)]
+            writer.writerow(row)
+
+
+def load_chart(path) -> StrategyTable:
+    """
+    Reads a chart written by save_chart. Cells missing from the chart are Stand.
+    """
+    actions_by_letter = {letter: action for action, letter in ACTION_LETTERS.items()}
+    strategy_table = StrategyTable.filled(PlayerAction.Stand)
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            kind = HandKind[row["Hand"].upper()]
+            total = int(row["Total"])
+            can_double = row["Can Double"] == "yes"
+            for upcard, label in UPCARD_LABELS.items():
+                action = actions_by_letter[row[label].strip().upper()]
+                strategy_table.actions[kind, total, upcard, int(can_double)] = ACTIONS.index(action)
+    return strategy_table
+
+
+class MemoizedAction:
+    """
+    Wraps a strategy's get_action so it is only called once per (hand kind, total, upcard, can double down) cell;
+    later decisions in the same cell are answered from a cache. Only suitable for strategies whose action depends on
+    nothing but the cell.
+    """
+
+    def __init__(self, get_action: Callable[[Table], PlayerAction]):
+        self.get_action = get_action
+        self.cache = {}
+
+    def __call__(self, table: Table) -> PlayerAction:
+        key = hand_key(table.current_player_betting_box(), table.dealer)
+        action = self.cache.get(key)
+        if action is None:
+            action = self.cache[key] = self.get_action(table)
+        return action
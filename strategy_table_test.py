@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from blackjack import BettingBox, Dealer, Hand, Player, PlayerAction, Table
+from cards import Card, Deck, Rank, Suit
+from simulation import play_known_strategy, hit_under_seventeen, double_down_on_eleven
+from strategy_table import HandKind, compile_action, compile_strategy, hand_key, probe_betting_boxes, save_chart, \
+    load_chart, MemoizedAction, kind_and_total, kinds_and_totals
+
+
+def table_for(ranks, upcard, split=False):
+    betting_box = BettingBox(Hand([Card(rank, Suit.SPADE) for rank in ranks]), Player("Maddie"), 10, split)
+    return Table([betting_box], Dealer(Hand([Card(upcard, Suit.HEART)]), Deck([])), 0)
+
+
+class StrategyTableTests(unittest.TestCase):
+    def test_hand_key(self):
+        table = table_for([Rank.ACE, Rank.ACE], Rank.KING)
+        self.assertEqual((HandKind.PAIR, 2, 10, True), hand_key(table.betting_boxes[0], table.dealer))
+        table = table_for([Rank.ACE, Rank.SIX, Rank.TWO], Rank.ACE)
+        self.assertEqual((HandKind.SOFT, 19, 11, False), hand_key(table.betting_boxes[0], table.dealer))
+        table = table_for([Rank.TEN, Rank.SIX], Rank.FIVE, split=True)
+        self.assertEqual((HandKind.HARD, 16, 5, False), hand_key(table.betting_boxes[0], table.dealer))
+
+    def test_kinds_and_totals_match_kind_and_total(self):
+        hands = [(hard_total, has_ace, is_pair) for hard_total in range(2, 22) for has_ace in (False, True)
+                 for is_pair in (False, True)]
+        kinds, totals = kinds_and_totals(*(np.array(column) for column in zip(*hands)))
+        self.assertEqual([kind_and_total(*hand) for hand in hands], list(zip(kinds.tolist(), totals.tolist())))
+
+    def test_probes_cover_reachable_cells(self):
+        probes = probe_betting_boxes()
+        self.assertIn((HandKind.HARD, 4, False), probes)
+        self.assertIn((HandKind.SOFT, 12, False), probes)
+        self.assertIn((HandKind.PAIR, 2, True), probes)
+        self.assertNotIn((HandKind.HARD, 20, True), probes)
+        self.assertEqual(3, len(probes[(HandKind.HARD, 11, False)].hand.cards))
+
+    def test_compiled_strategy_matches_callable(self):
+        tables = [table_for([Rank.EIGHT, Rank.EIGHT], Rank.TEN),
+                  table_for([Rank.ACE, Rank.SEVEN], Rank.FOUR),
+                  table_for([Rank.ACE, Rank.SEVEN, Rank.KING], Rank.NINE),
+                  table_for([Rank.FIVE, Rank.SIX], Rank.SIX),
+                  table_for([Rank.TWO, Rank.FOUR, Rank.FIVE], Rank.SIX),
+                  table_for([Rank.NINE, Rank.SEVEN], Rank.SEVEN)]
+        for strategy in (play_known_strategy, hit_under_seventeen, double_down_on_eleven):
+            compiled = compile_strategy(strategy)
+            for table in tables:
+                self.assertEqual(strategy.get_action(table), compiled.get_action(table))
+        self.assertEqual(PlayerAction.Split, compile_strategy(play_known_strategy).action(HandKind.PAIR, 2, 10, True))
+        self.assertTrue(np.array_equal(compile_strategy(play_known_strategy).actions,
+                                       compile_action(play_known_strategy.get_action).actions))
+
+    def test_chart_round_trip(self):
+        compiled = compile_strategy(play_known_strategy)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "chart.csv")
+            save_chart(compiled, path)
+            self.assertTrue(np.array_equal(compiled.actions, load_chart(path).actions))
+
+    def test_shipped_chart_matches_known_strategy(self):
+        chart = load_chart(os.path.join(os.path.dirname(__file__), "charts", "known_strategy.csv"))
+        self.assertTrue(np.array_equal(compile_strategy(play_known_strategy).actions, chart.actions))
+
+    def test_memoized_action(self):
+        calls = []
+
+        def get_action(table):
+            calls.append(table)
+            return PlayerAction.Hit
+
+        memoized = MemoizedAction(get_action)
+        self.assertEqual(PlayerAction.Hit, memoized(table_for([Rank.TEN, Rank.SIX], Rank.TEN)))
+        self.assertEqual(PlayerAction.Hit, memoized(table_for([Rank.NINE, Rank.SEVEN], Rank.KING)))
+        self.assertEqual(1, len(calls))
+        memoized(table_for([Rank.NINE, Rank.SEVEN], Rank.NINE))
+        self.assertEqual(2, len(calls))
+
+
+if __name__ == '__main__':
+    unittest.main()